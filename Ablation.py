@@ -0,0 +1,108 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import sys
+import time
+import chess
+from Evaluate import EVALUATORS
+from Search import iterativedeepening
+from Search.Framework import ALL, Features, seed
+from Utilities import Memo
+from Utilities.Streams import read_lines
+
+# Ablation benchmark of the search features. Every position of a fixed set is searched to the same depth once with
+# all features of Search.Framework.Features switched on and once more with each feature switched off in turn, so the
+# nodes and time a feature saves show up as the growth of the search without it. The random tie-breaks are seeded
+# before every search, so two runs search the same trees. Without alpha_beta the search grows by orders of magnitude,
+# at the default depth that variant alone takes minutes, leave it out of --features for a quick run.
+
+ABLATION_SUITE = [
+    chess.STARTING_FEN,
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+    'r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4',
+    '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1',
+]
+
+
+def readPositions(path: str):
+    'The FENs of a file with one FEN or EPD record per line'
+    fens = []
+    for line in read_lines(path):
+        try:
+            fens.append(chess.Board(line).fen())
+        except ValueError:
+            fens.append(chess.Board.from_epd(line)[0].fen())
+    return fens
+
+
+def searchSuite(fens, features: Features, depth: int, evaluation, backend: str, seedValue: int):
+    'Searches every position with the features, returns the total nodes, the total time and the best moves'
+    nodes = 0
+    elapsed = 0.0
+    moves = []
+    for fen in fens:
+        seed(seedValue)
+        memo = Memo()
+        start = time.perf_counter()
+        _, move = iterativedeepening(depth, float('inf'), chess.Board(fen), evaluation, memo, backend=backend,
+                                     features=features)
+        elapsed += time.perf_counter() - start
+        nodes += memo.nodes
+        moves.append(move)
+    return nodes, elapsed, moves
+
+
+def ablation(fens=None, depth=3, evaluator='nnueEval', backend='bitboard', baseline: Features = ALL,
+             ablate=Features.NAMES, seedValue=2022):
+    """
+    Searches the positions with the baseline features and with each feature of ablate switched off
+    :param fens: The positions, ABLATION_SUITE by default
+    :param depth: The depth searched
+    :param evaluator: The name of the evaluator in Evaluate.EVALUATORS
+    :param backend: The search backend passed to iterativedeepening
+    :param baseline: The features every variant starts from
+    :param ablate: The names of the features to switch off one at a time
+    :param seedValue: Seed of the random tie-breaks of the search
+    :return: A list of (name, features, nodes, seconds, best moves) tuples, the baseline first
+    """
+    fens = fens or ABLATION_SUITE
+    evaluation = EVALUATORS[evaluator]
+    variants = [('baseline', baseline)]
+    variants += [(f'-{name}', baseline.replace(**{name: False})) for name in ablate if getattr(baseline, name)]
+
+    results = []
+    for name, features in variants:
+        nodes, elapsed, moves = searchSuite(fens, features, depth, evaluation, backend, seedValue)
+        results.append((name, features, nodes, elapsed, moves))
+        print(f'{name}: {nodes} nodes in {elapsed:.2f}s', file=sys.stderr)
+    return results
+
+
+def report(results):
+    'Prints the nodes and time of every variant relative to the baseline'
+    _, baseline, baseNodes, baseTime, baseMoves = results[0]
+    print(f'baseline: {", ".join(baseline.enabled())}')
+    print(f'{"variant":<22} {"nodes":>10} {"x nodes":>8} {"seconds":>9} {"x time":>7} {"same move":>10}')
+    for name, _, nodes, elapsed, moves in results:
+        same = sum(1 for move, baseMove in zip(moves, baseMoves) if move == baseMove)
+        print(f'{name:<22} {nodes:>10} {nodes / baseNodes:>8.2f} {elapsed:>9.2f} {elapsed / baseTime:>7.2f} '
+              f'{same:>6}/{len(moves)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the nodes and time each search feature saves')
+    parser.add_argument('--positions', help='File with one FEN or EPD per line, the built-in positions by default')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--evaluator', choices=sorted(EVALUATORS), default='nnueEval')
+    parser.add_argument('--backend', choices=('chess', 'bitboard'), default='bitboard')
+    parser.add_argument('--features', nargs='+', choices=Features.NAMES, default=list(Features.NAMES),
+                        help='The features to switch off one at a time')
+    parser.add_argument('--seed', type=int, default=2022)
+    args = parser.parse_args()
+
+    fens = readPositions(args.positions) if args.positions else None
+    report(ablation(fens, args.depth, args.evaluator, args.backend, ALL, args.features, args.seed))
@@ -0,0 +1,129 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+import chess
+import chess.pgn
+from Evaluate import EVALUATORS
+from Search import iterativedeepening
+from Utilities import Memo
+from Utilities.Parallel import bounded_imap
+from Utilities.Streams import read_pgn_games
+
+# Annotates every move of large PGN archives with the engine's score and best move. Games are streamed one at a time
+# and handed to a process pool. Each worker searches all positions of its game in order with one Memo, so later
+# positions start with a warm table. Finished games are appended to the output in input order and a checkpoint is
+# written after every game, so a crashed run picks up where it stopped.
+
+
+def annotateGame(task):
+    """
+    Worker entry point, searches every position of a game
+    :param task: Tuple of (game text, depth, timeout per position, evaluator name, search backend)
+    :return: The annotated game as PGN text, or None when the text could not be parsed
+    """
+    text, depth, timeout, evaluator, backend = task
+    game = chess.pgn.read_game(io.StringIO(text))
+    if game is None:
+        return None
+
+    evaluation = EVALUATORS[evaluator]
+    memo = Memo()
+    board = game.board()
+    for node in game.mainline():
+        if board.outcome() is None:
+            score, best = iterativedeepening(depth, timeout, board, evaluation, memo, backend=backend)
+            # Scores are from the side to move, comments report them from white's point of view
+            if board.turn == chess.BLACK:
+                score = -score
+            comment = f'score {score:.2f} best {best.uci() if best is not None else "-"}'
+            node.comment = f'{node.comment} {comment}'.strip()
+        board.push(node.move)
+
+    return game.accept(chess.pgn.StringExporter(headers=True, variations=True, comments=True)) + '\n\n'
+
+
+def loadCheckpoint(path: str):
+    if not os.path.exists(path):
+        return {'games': 0, 'offset': 0}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def saveCheckpoint(path: str, checkpoint: dict):
+    # Write to a temporary file and rename so a crash never leaves a half written checkpoint
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(checkpoint, handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+
+def annotate(paths, output: str, depth=4, timeout=2.0, evaluator='calculateRapid', backend='chess', processes=None,
+             checkpoint=None):
+    """
+    Annotates every game of the PGN files, resuming from the checkpoint when one exists
+    :param paths: The PGN files to annotate
+    :param output: The PGN file the annotated games are appended to
+    :param depth: The maximum search depth per position
+    :param timeout: The time in seconds allowed per position
+    :param evaluator: The name of the evaluator in Evaluate.EVALUATORS
+    :param backend: The search backend passed to iterativedeepening
+    :param processes: The number of worker processes, defaults to the number of cores
+    :param checkpoint: The checkpoint file, defaults to the output path with a .checkpoint suffix
+    :return: The total number of games written
+    """
+    processes = processes or multiprocessing.cpu_count()
+    checkpointPath = checkpoint or output + '.checkpoint'
+    state = loadCheckpoint(checkpointPath)
+    if state['games']:
+        print(f'Resuming after {state["games"]} games', file=sys.stderr)
+
+    games = itertools.chain.from_iterable(read_pgn_games(path) for path in paths)
+    games = itertools.islice(games, state['games'], None)
+    tasks = ((text, depth, timeout, evaluator, backend) for text in games)
+
+    start = time.time()
+    done = 0
+    mode = 'r+' if os.path.exists(output) else 'w'
+    with open(output, mode, encoding='utf-8') as handle, multiprocessing.Pool(processes) as pool:
+        # Drop anything written after the last checkpoint
+        handle.seek(state['offset'])
+        handle.truncate()
+
+        for annotated in bounded_imap(pool, annotateGame, tasks, processes * 2):
+            if annotated is not None:
+                handle.write(annotated)
+                handle.flush()
+                os.fsync(handle.fileno())
+            done += 1
+            state = {'games': state['games'] + 1, 'offset': handle.tell()}
+            saveCheckpoint(checkpointPath, state)
+            print(f'{state["games"]} games annotated, {done / (time.time() - start):.2f} games/sec', file=sys.stderr)
+
+    return state['games']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Annotate PGN archives with engine scores and best moves')
+    parser.add_argument('paths', nargs='+', help='PGN files to annotate')
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=2.0, help='Seconds per position')
+    parser.add_argument('--evaluator', choices=sorted(EVALUATORS), default='calculateRapid')
+    parser.add_argument('--backend', choices=('chess', 'bitboard'), default='chess')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--checkpoint', default=None)
+    args = parser.parse_args()
+
+    annotate(args.paths, args.output, args.depth, args.timeout, args.evaluator, args.backend, args.processes,
+             args.checkpoint)
@@ -0,0 +1,157 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing
+import struct
+import sys
+import time
+from array import array
+import chess
+from Evaluate import POSITION_EVALUATORS
+from Utilities.Parallel import bounded_imap
+from Utilities.Streams import read_lines
+
+# Offline scoring of large FEN/EPD dumps. Lines are read lazily, sharded into chunks across a process pool with a
+# bounded number of chunks in flight and the scores are written in input order, so memory use does not depend on the
+# size of the input.
+
+# Binary output: an 8 byte header (magic, version, reserved) followed by one little-endian float32 per input line.
+# Lines that could not be parsed are stored as NaN.
+BINARY_MAGIC = b'CEVL'
+BINARY_VERSION = 1
+
+
+def parsePosition(line: str):
+    'Builds a board from a FEN line or an EPD record'
+    fields = line.split()
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        return chess.Board(' '.join(fields[:6]))
+    board, _ = chess.Board.from_epd(line)
+    return board
+
+
+def evaluateChunk(task):
+    """
+    Worker entry point, scores a chunk of lines
+    :param task: Tuple of (evaluator name, perspective, list of lines)
+    :return: The list of scores, NaN for lines that are not a position
+    """
+    name, perspective, lines = task
+    evaluation = POSITION_EVALUATORS[name]
+    scores = []
+    for line in lines:
+        try:
+            board = parsePosition(line)
+        except (ValueError, IndexError):
+            scores.append(math.nan)
+            continue
+        color = chess.WHITE if perspective == 'white' else board.turn
+        scores.append(float(evaluation(board, color)))
+    return scores
+
+
+class CsvWriter:
+    def __init__(self, handle):
+        self.writer = csv.writer(handle)
+        self.writer.writerow(('position', 'score'))
+
+    def write(self, lines, scores):
+        self.writer.writerows(zip(lines, scores))
+
+
+class BinaryWriter:
+    def __init__(self, handle):
+        self.handle = handle
+        self.handle.write(BINARY_MAGIC + struct.pack('<HH', BINARY_VERSION, 0))
+
+    def write(self, lines, scores):
+        values = array('f', scores)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        values.tofile(self.handle)
+
+
+def readBinary(path: str):
+    'Loads the scores of a binary output file'
+    with open(path, 'rb') as handle:
+        header = handle.read(8)
+        if header[:4] != BINARY_MAGIC or struct.unpack('<H', header[4:6])[0] != BINARY_VERSION:
+            raise ValueError(f'{path} is not a bulk evaluation file')
+        values = array('f')
+        values.frombytes(handle.read())
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def bulkEvaluate(paths, output: str, evaluator='calculateRapid', outputFormat='csv', perspective='turn',
+                 processes=None, chunkSize=1000, reportEvery=5.0):
+    """
+    Scores every position of the input files with a registered evaluator
+    :param paths: FEN or EPD files, one position per line
+    :param output: The file to write the scores to
+    :param evaluator: The name of the evaluator in Evaluate.POSITION_EVALUATORS
+    :param outputFormat: 'csv' for position,score rows or 'binary' for packed float32 scores
+    :param perspective: 'turn' scores for the side to move, 'white' scores for white
+    :param processes: The number of worker processes, defaults to the number of cores
+    :param chunkSize: The number of lines sent to a worker at once
+    :param reportEvery: Seconds between throughput reports on stderr
+    :return: The number of positions scored and the throughput in positions per second
+    """
+    if evaluator not in POSITION_EVALUATORS:
+        raise ValueError(f'Evaluator {evaluator} cannot score positions without move history, expected one of '
+                         f'{", ".join(POSITION_EVALUATORS)}')
+    processes = processes or multiprocessing.cpu_count()
+
+    lines = itertools.chain.from_iterable(read_lines(path) for path in paths)
+    chunks = iter(lambda: list(itertools.islice(lines, chunkSize)), [])
+    # Keep the lines of each chunk on this side for the CSV output while the worker gets a copy
+    pending = []
+
+    def tasks():
+        for chunk in chunks:
+            pending.append(chunk)
+            yield evaluator, perspective, chunk
+
+    count = 0
+    start = time.time()
+    lastReport = start
+    if outputFormat == 'binary':
+        opened = open(output, 'wb')
+    else:
+        opened = open(output, 'w', newline='')
+    with opened as handle, multiprocessing.Pool(processes) as pool:
+        writer = BinaryWriter(handle) if outputFormat == 'binary' else CsvWriter(handle)
+        for scores in bounded_imap(pool, evaluateChunk, tasks(), processes * 4):
+            writer.write(pending.pop(0), scores)
+            count += len(scores)
+
+            now = time.time()
+            if now - lastReport >= reportEvery:
+                print(f'{count} positions, {count / (now - start):.0f} positions/sec', file=sys.stderr)
+                lastReport = now
+
+    elapsed = time.time() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f'Evaluated {count} positions in {elapsed:.1f}s ({rate:.0f} positions/sec)', file=sys.stderr)
+    return count, rate
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate large FEN/EPD files across all cores')
+    parser.add_argument('paths', nargs='+', help='FEN or EPD files, one position per line')
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--evaluator', choices=sorted(POSITION_EVALUATORS), default='calculateRapid')
+    parser.add_argument('--format', choices=('csv', 'binary'), default='csv')
+    parser.add_argument('--perspective', choices=('turn', 'white'), default='turn')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    bulkEvaluate(args.paths, args.output, args.evaluator, args.format, args.perspective, args.processes,
+                 args.chunk_size)
@@ -3,29 +3,71 @@
 # Version:      1.0
 
 import chess
-from Search import iterativedeepening
-from Evaluate import eval, calculate, evaluateScore, calculateRapid
+from Search import iterativedeepening, TimeManager, SearchHandle
+from Evaluate import eval, calculate, evaluateScore, calculateRapid, EvalCache
 from Utilities import Memo
+from Utilities.Profiler import profiler_for
 
 
 class Engine:
-    def __init__(self, board: chess.Board, white: bool):
+    def __init__(self, board: chess.Board, white: bool, backend: str = 'chess', search=None, profile: str = None):
         self.color = white
-        self.search = iterativedeepening
-        self.eval = calculateRapid
+        # Any callable with the signature of iterativedeepening, e.g. Search.MCTS(), including its stop and callback
+        self.search = search if search is not None else iterativedeepening
+        # Leaf scores are kept between searches like the memo, see Evaluate.cache
+        self.eval = EvalCache(calculateRapid)
         self.board = board
         self.memo = Memo()
+        self.backend = backend
+        # Samples every search into a collapsed stack file, see Utilities.Profiler. Defaults to CHESS_ENGINE_PROFILE.
+        self.profiler = profiler_for(profile)
 
     def opponent_move(self, uci: str):
         move = self.board.parse_uci(uci)
         self.board.push(move)
 
-    def make_move(self):
-        _, move = self.search(30, 5, self.board, self.eval, self.memo)
+    def start_search(self, limits: dict = None, on_update=None):
+        """
+        Starts searching the current position on a background thread and returns immediately
+        :param limits: Dict of the search limits, all optional: depth, movetime in seconds, infinite, and the clock
+        as wtime, btime, winc, binc in seconds and movestogo. Without a clock or movetime the search gets 5 seconds.
+        :param on_update: Called with the dict of every finished iteration, see iterativedeepening
+        :return: A Search.Background.SearchHandle, its result is the score and the best move
+        """
+        limits = limits or {}
+        board = self.board.copy()
+        depth = limits.get('depth') or 30
+        remaining = limits.get('wtime') if board.turn == chess.WHITE else limits.get('btime')
+        options = {'backend': self.backend}
+
+        if limits.get('infinite'):
+            timeout = float('inf')
+        elif remaining is not None:
+            increment = limits.get('winc', 0.0) if board.turn == chess.WHITE else limits.get('binc', 0.0)
+            manager = TimeManager(remaining, increment or 0.0, limits.get('movestogo'))
+            timeout = manager.hard
+            options['time_manager'] = manager
+        else:
+            timeout = limits.get('movetime') or 5
+
+        search = self.search
+        if self.profiler is not None:
+            def search(*args, **kwargs):
+                with self.profiler.sampling():
+                    return self.search(*args, **kwargs)
+
+        # The search works on a copy so the game board can be read while it runs, the memo is shared between moves
+        return SearchHandle(search, depth, timeout, board, self.eval, self.memo, on_update=on_update, **options)
+
+    def make_move(self, wtime: float = None, btime: float = None, winc: float = 0.0, binc: float = 0.0,
+                  movestogo: int = None):
+        # Clock times are in seconds. Without a clock for the side to move every move gets 5 seconds.
+        handle = self.start_search({'wtime': wtime, 'btime': btime, 'winc': winc, 'binc': binc,
+                                    'movestogo': movestogo})
+        _, move = handle.wait()
         self.board.push(move)
         return move.uci()
 
-
 if __name__ == '__main__':
     board = chess.Board()
     engine = Engine(board, False)
@@ -1,6 +1,24 @@
 import chess
 from Evaluate import evaluateScore, calculate, calculateRapid
+from .weights import WEIGHTS
 
 
-def eval(board: chess.Board, color):
-    return (0.5 * evaluateScore(board, color)) + (0.5 * calculateRapid(board, color))
\ No newline at end of file
+def eval(board: chess.Board, color, context=None, alpha=None, beta=None):
+    weights = WEIGHTS['eval']
+    positionVal = evaluateScore(board, color, context=context)
+
+    # Translate the window into one on calculateRapid so it can stop early as well
+    if weights[1] > 0:
+        if alpha is not None:
+            alpha = (alpha - (weights[0] * positionVal)) / weights[1]
+        if beta is not None:
+            beta = (beta - (weights[0] * positionVal)) / weights[1]
+    else:
+        alpha = beta = None
+
+    return (weights[0] * positionVal) + (weights[1] * calculateRapid(board, color, context, alpha, beta))
+
+
+# Reads the last move through evaluateScore and stops early through calculateRapid, see Evaluate.cache
+eval.history_key = evaluateScore.history_key
+eval.lazy_bounds = True
@@ -2,3 +2,21 @@ from .evaluation import evaluateScore
 from .evaluationjb import calculate
 from .evaluationjb2 import calculateRapid
 from .CombinedEvals import eval
+from .fused import fusedEval
+from .nnue import nnueEval
+from .cache import EvalCache, cached
+
+# Evaluators selectable by name from the command line tools
+EVALUATORS = {
+    'calculate': calculate,
+    'calculateRapid': calculateRapid,
+    'evaluateScore': evaluateScore,
+    'eval': eval,
+    'fusedEval': fusedEval,
+    'nnueEval': nnueEval,
+}
+
+# Evaluators that score a position on its own. The others read the last move through their history_key, see
+# Evaluate.cache, and need a board with the move that led to the position.
+POSITION_EVALUATORS = {name: evaluation for name, evaluation in EVALUATORS.items()
+                       if getattr(evaluation, 'history_key', None) is None}
@@ -0,0 +1,13 @@
+# Batched evaluation entry point. Evaluators that can score many positions at once expose a
+# batch(boards, colors, columns=None) attribute, every other evaluator is called once per board. Columns name the
+# slot of every board for evaluators that keep state between calls, like the accumulators of Evaluate.nnue: a caller
+# that evaluates the same line of play under the same column on every call gets incremental updates for it. Without
+# columns the boards take the columns 0 to len(boards) - 1.
+
+
+def evaluateBatch(evaluation, boards, colors, columns=None):
+    'Returns the scores of every board for the matching color'
+    batch = getattr(evaluation, 'batch', None)
+    if batch is not None:
+        return batch(boards, colors, columns)
+    return [evaluation(board, color) for board, color in zip(boards, colors)]
@@ -0,0 +1,205 @@
+from Utilities.Bitboard import BitBoard, evaluation_for
+from Utilities.SearchUtils import board_key
+
+# Evaluation cache. The searchers evaluate the same leaves again and again, in every iteration of iterative deepening,
+# through transpositions and on every path that ends at a table entry too shallow to use, and an evaluation like
+# calculateRapid costs far more than a lookup. EvalCache wraps an evaluator and keeps its scores for both colors of a
+# fixed number of positions, evicting with the clock algorithm: a position read since the hand last passed it gets a
+# second chance, so positions that keep being evaluated stay while leaves seen once make room for new ones.
+#
+# Positions are keyed like the memo table, see Utilities.SearchUtils.board_key, so the key of the NodeContext the
+# search passes in is reused instead of hashing the board again. Evaluators that read more than the position mark it:
+#   history_key: a function of the board returning what else the score depends on, it becomes part of the key
+#   lazy_bounds: the score past the alpha/beta window may be a bound instead of the score, it is kept as that bound
+#   and only answers later windows it is past as well
+# The weights are read when a position is evaluated, clear() the cache after changing them.
+
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+EVAL_CACHE_SIZE = 1 << 16
+
+
+class EvalCache:
+    """
+    An evaluator that remembers the scores of the evaluator it wraps, see the comment at the top of the module. It
+    is called like the wrapped evaluator, accepts chess.Board and BitBoard boards and has a batch attribute when the
+    wrapped evaluator has one.
+    """
+    bitboard_native = True
+
+    def __init__(self, evaluation, size: int = EVAL_CACHE_SIZE):
+        """
+        :param evaluation: The evaluation function to cache
+        :param size: The number of positions kept
+        """
+        if size < 1:
+            raise ValueError('The cache needs room for at least one position')
+        self.evaluation = evaluation
+        # BitBoards are converted only for evaluators that need a chess.Board, and only on a miss
+        self.bitboardEvaluation = evaluation_for(evaluation)
+        self.historyKey = getattr(evaluation, 'history_key', None)
+        self.lazyBounds = getattr(evaluation, 'lazy_bounds', False)
+        if getattr(evaluation, 'batch', None) is not None:
+            self.batch = self.evaluateBatch
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        'Forgets every position and resets the statistics'
+        self.slots = {}
+        self.keys = [None] * self.size
+        self.referenced = bytearray(self.size)
+        # Scores and bound types of every slot by color, None while the color has not been evaluated
+        self.scores = ([None] * self.size, [None] * self.size)
+        self.bounds = (bytearray(self.size), bytearray(self.size))
+        self.used = 0
+        self.hand = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, board, context=None):
+        'Cache key of a board, the key of its NodeContext when it has one'
+        position = context.key if context is not None and context.key is not None else board_key(board)
+        if self.historyKey is None:
+            return position
+        return position, self.historyKey(board)
+
+    def lookup(self, key, color, alpha=None, beta=None):
+        """
+        Looks up a score
+        :return: The score when the position was evaluated for color and the score answers the window, else None
+        """
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        score = self.scores[color][slot]
+        if score is None:
+            return None
+        bound = self.bounds[color][slot]
+        if bound == EXACT or (bound == LOWERBOUND and beta is not None and score >= beta) or \
+                (bound == UPPERBOUND and alpha is not None and score <= alpha):
+            self.referenced[slot] = 1
+            return score
+        return None
+
+    def store(self, key, color, score, bound=EXACT):
+        'Keeps the score of a position for color, replacing the oldest unreferenced position when the cache is full'
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.evict()
+            self.keys[slot] = key
+            self.slots[key] = slot
+            self.scores[not color][slot] = None
+        self.scores[color][slot] = score
+        self.bounds[color][slot] = bound
+
+    def evict(self):
+        'A free slot, the clock hand clears the referenced positions it passes and frees the first other one'
+        if self.used < self.size:
+            self.used += 1
+            return self.used - 1
+        referenced = self.referenced
+        hand = self.hand
+        while referenced[hand]:
+            referenced[hand] = 0
+            hand = (hand + 1) % self.size
+        del self.slots[self.keys[hand]]
+        self.evictions += 1
+        self.hand = (hand + 1) % self.size
+        return hand
+
+    def __call__(self, board, color, context=None, alpha=None, beta=None):
+        key = self.key(board, context)
+        score = self.lookup(key, color, alpha, beta)
+        if score is not None:
+            self.hits += 1
+            return score
+
+        self.misses += 1
+        evaluation = self.bitboardEvaluation if isinstance(board, BitBoard) else self.evaluation
+        score = evaluation(board, color, context=context, alpha=alpha, beta=beta)
+        bound = EXACT
+        if self.lazyBounds:
+            if alpha is not None and score <= alpha:
+                bound = UPPERBOUND
+            elif beta is not None and score >= beta:
+                bound = LOWERBOUND
+        self.store(key, color, score, bound)
+        return score
+
+    def evaluateBatch(self, boards, colors, columns=None):
+        """
+        The batch attribute, only the positions that are not cached are passed to the batch of the evaluator, each
+        under the column it has in this batch
+        """
+        keys = [self.key(board) for board in boards]
+        scores = [self.lookup(key, color) for key, color in zip(keys, colors)]
+        missing = [index for index, score in enumerate(scores) if score is None]
+        self.hits += len(boards) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            native = getattr(self.evaluation, 'bitboard_native', False)
+            missingBoards = [boards[index] for index in missing]
+            if not native:
+                missingBoards = [board.to_board() if isinstance(board, BitBoard) else board for board in missingBoards]
+            missingColumns = [columns[index] if columns is not None else index for index in missing]
+            evaluated = self.evaluation.batch(missingBoards, [colors[index] for index in missing], missingColumns)
+            for index, score in zip(missing, evaluated):
+                scores[index] = score
+                self.store(keys[index], colors[index], score)
+        return scores
+
+    def hitRate(self):
+        'The share of the evaluations answered from the cache'
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        'Dict of the hits, misses, evictions, hit rate, positions held and size'
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'hit_rate': self.hitRate(),
+                'entries': len(self.slots), 'size': self.size}
+
+
+def cached(evaluation, size: int = EVAL_CACHE_SIZE):
+    'A new EvalCache around an evaluation function or the name of one in Evaluate.EVALUATORS'
+    if isinstance(evaluation, str):
+        from Evaluate import EVALUATORS
+        evaluation = EVALUATORS[evaluation]
+    return EvalCache(evaluation, size)
+
+
+def benchmark(depth=4, evaluators=('calculateRapid', 'fusedEval', 'nnueEval'), backends=('chess', 'bitboard')):
+    'Searches a few positions with every evaluator with and without a cache, checks the scores and reports the speedup'
+    import time
+    import chess
+    from Evaluate import EVALUATORS
+    from Search import iterativedeepening
+    from Search.Framework import seed
+    from Utilities import Memo
+
+    fens = [chess.STARTING_FEN, 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+            'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10']
+    for name in evaluators:
+        for backend in backends:
+            times = []
+            results = []
+            cache = EvalCache(EVALUATORS[name])
+            for evaluation in (EVALUATORS[name], cache):
+                start = time.perf_counter()
+                scores = []
+                for fen in fens:
+                    seed(2022)
+                    scores.append(iterativedeepening(depth, float('inf'), chess.Board(fen), evaluation, Memo(),
+                                                     backend=backend)[0])
+                times.append(time.perf_counter() - start)
+                results.append(scores)
+            if results[0] != results[1]:
+                raise AssertionError(f'{name} scored {results[0]} without the cache and {results[1]} with it')
+            print(f'{name:>14} {backend:>8}: {times[0]:6.2f}s uncached, {times[1]:6.2f}s cached, '
+                  f'{times[0] / times[1]:.2f}x, hit rate {cache.hitRate():.1%}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,4 +1,5 @@
 import chess
+from .fused import lastCaptured
 
 # Source for evaluation criteria:
 # https://www.chessprogramming.org/Simplified_Evaluation_Function
@@ -216,7 +217,7 @@ def evalBlunder(board,moveToIndex,pieceType,turn):
         if board.attackers(chess.BLACK,moveToIndex) is not None:
             return -evalCapture(pieceType)
 
-def evaluateScore(board, color, index = chessToIndex):
+def evaluateScore(board, color, index = chessToIndex, context=None, alpha=None, beta=None):
     'Aggregates the total score from evalCapture and evalType'
     # Set "move" to the latest move
     move = board.move_stack[-1]
@@ -244,3 +245,10 @@ def evaluateScore(board, color, index = chessToIndex):
     score=evalCapture(capturedType)+evalType(pieceType,moveFromIndex,turn)+evalBlunder(board,moveToIndex,pieceType,turn)
     return score
 
+
+def lastMoveKey(board):
+    'What evaluateScore reads besides the position, the last move and the piece it captured, see Evaluate.cache'
+    return board.peek(), lastCaptured(board)
+
+
+evaluateScore.history_key = lastMoveKey
@@ -1,13 +1,24 @@
 # Date:         03/16/2022
-# Last Updated: 04/24/2022
-# Version:      1.1
+# Last Updated: 10/19/2026
+# Version:      1.2
 
 import chess
 from chess import *
+from .mobility import mobility
+from .weights import WEIGHTS
 
 # Initialize evaluation with current move. (Maybe just make this a method for a parent object?)
 # This algorithm assumes 'myColor' is the person whose turn it is.
-def calculate(board: chess.Board, color):
+def calculate(board: chess.Board, color, context=None, alpha=None, beta=None):
+    kingWt, queenWt, rookWt, minorWt, pawnWt, structureWt, mvmntWt = calculateTerms(board, color, context)
+    weights = WEIGHTS['calculate']
+
+    return (weights[0] * kingWt) + (weights[1] * queenWt) + (weights[2] * rookWt) + (weights[3] * minorWt)\
+           + (weights[4] * pawnWt) + (weights[5] * structureWt) + (weights[6] * mvmntWt)
+
+
+# Returns the unweighted terms of calculate, in the order of TERMS['calculate']
+def calculateTerms(board: chess.Board, color, context=None):
     myColor = color
     enemyColor = not color
 
@@ -49,30 +60,18 @@ def calculate(board: chess.Board, color):
     dblPawnWt = countDblPawns(myPawns) - countDblPawns(theirPawns)
     isoPawnWt = countIsoPawns(myPawns) - countIsoPawns(theirPawns)
 
-    if board.turn == myColor:
-        myMoves = list(board.legal_moves)
-        theirMoves = list()
-    else:
-        theirMoves = list(board.legal_moves)
-        myMoves = list()
+    # Mobility for both sides straight from the attack maps
+    myMobility, _, myBlocked = mobility(board, myColor, context)
+    theirMobility, _, theirBlocked = mobility(board, enemyColor, context)
 
-    if board.turn == myColor:
-        if len(myMoves) > 0:
-            board.push(myMoves[0])
-            theirMoves = list(board.legal_moves)
-            board.pop()
-    else:
-        if len(theirMoves) > 0:
-            board.push(theirMoves[0])
-            myMoves = list(board.legal_moves)
-            board.pop()
+    blkdPawnWt = myBlocked - theirBlocked
+    mvmntWt = myMobility - theirMobility
 
+    return [kingWt, queenWt, rookWt, kntWt + bishWt, pawnWt, dblPawnWt + blkdPawnWt + isoPawnWt, mvmntWt]
 
-    blkdPawnWt = countBlkdPawns(myPawns, myMoves) - countBlkdPawns(theirPawns, theirMoves)
-    mvmntWt = len(myMoves) - len(theirMoves)
 
-    return (200 * kingWt) + (9 * queenWt) + (5 * rookWt) + (3 * (kntWt + bishWt)) + pawnWt\
-           - (0.5 * (dblPawnWt + blkdPawnWt + isoPawnWt)) + (0.1 * mvmntWt)
+# Only uses the board API shared with Utilities.Bitboard.BitBoard
+calculate.bitboard_native = True
 
 
 # Counts doubled pawns from set. Doubled pawns are stacked in the same column
@@ -101,18 +100,6 @@ def countIsoPawns(pawns):
     return returnResult
 
 
-# Counts blocked pawns from set. Blocked pawns cannot make a legal move
-def countBlkdPawns(pawns, legalMoves):
-    returnResult = 0
-
-    for pawn in pawns:
-        if (move.from_square == pawn for move in legalMoves):
-            break
-        returnResult = returnResult + 1
-
-    return returnResult
-
-
 def countMoves(pieces, legalMoves):
     returnResult = 0
 
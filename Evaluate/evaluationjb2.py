@@ -2,6 +2,8 @@ import math
 
 import chess
 from chess import *
+from .mobility import mobility
+from .weights import WEIGHTS
 
 # Chess location to index dictionary.
 chessToIndex = {
@@ -15,19 +17,79 @@ chessToIndex = {
         'a1': 0, 'b1': 1, 'c1': 2, 'd1': 3, 'e1': 4, 'f1': 5, 'g1': 6, 'h1': 7
 }
 
+# Counts how many calls to calculateRapid returned early on the material and center control bound alone
+LAZY_STATS = {'evaluations': 0, 'lazyExits': 0}
+
+
+def lazyExitRate():
+    'Fraction of calculateRapid calls that skipped activity and king safety'
+    if LAZY_STATS['evaluations'] == 0:
+        return 0.0
+    return LAZY_STATS['lazyExits'] / LAZY_STATS['evaluations']
+
+
+def resetLazyStats():
+    LAZY_STATS['evaluations'] = 0
+    LAZY_STATS['lazyExits'] = 0
+
+
 # Initialize evaluation with current move. (Maybe just make this a method for a parent object?)
 # This algorithm assumes 'myColor' is the person whose turn it is.
 # Evaluates in 4 parts: Material, King Safety, Control of Center, and possible Activity
-def calculateRapid(board: chess.Board, color):
+# When the search passes its alpha/beta window the cheap terms are computed first. If activity and king safety,
+# which are bounded by their caps, cannot bring the score back inside the window they are skipped and a bound on the
+# score is returned instead.
+def calculateRapid(board: chess.Board, color, context=None, alpha=None, beta=None):
+    weights = WEIGHTS['calculateRapid']
+    activityCap, kingSafetyCap, kingSafetyFloor = WEIGHTS['calculateRapidCaps']
+    LAZY_STATS['evaluations'] += 1
+
+    pieces = rapidPieces(board, color)
+    kingWt, queenWt, rookWt, minorWt, pawnWt = rapidMaterial(pieces)
+    controlVal = rapidControl(pieces)
+
+    materialVal = (weights[0] * kingWt) + (weights[1] * queenWt) + (weights[2] * rookWt) + (weights[3] * minorWt)\
+                  + (weights[4] * pawnWt)
+
+    if alpha is not None or beta is not None:
+        cheapVal = materialVal + (weights[7] * controlVal)
+        margin = abs(weights[5]) * activityCap + abs(weights[6]) * max(kingSafetyCap, abs(kingSafetyFloor), 1)
+        # The full score lies within margin of the cheap score, so return the side of that range past the window
+        if alpha is not None and cheapVal + margin <= alpha:
+            LAZY_STATS['lazyExits'] += 1
+            return cheapVal + margin
+        if beta is not None and cheapVal - margin >= beta:
+            LAZY_STATS['lazyExits'] += 1
+            return cheapVal - margin
+
+    activityVal, kingSafetyVal = rapidPositional(board, color, context, pieces)
+
+    # Finalize weights, some weights have caps.
+    activityVal = capActivity(activityVal, activityCap)
+    kingSafetyVal = capKingSafety(kingSafetyVal, kingSafetyCap, kingSafetyFloor)
+
+    totalScore = materialVal + (weights[5] * activityVal) + (weights[6] * kingSafetyVal) + (weights[7] * controlVal)
+
+    return totalScore
+
+
+# Returns the unweighted, uncapped terms of calculateRapid, in the order of TERMS['calculateRapid']
+def calculateRapidTerms(board: chess.Board, color, context=None):
+    pieces = rapidPieces(board, color)
+    kingWt, queenWt, rookWt, minorWt, pawnWt = rapidMaterial(pieces)
+    activityVal, kingSafetyVal = rapidPositional(board, color, context, pieces)
+
+    return [kingWt, queenWt, rookWt, minorWt, pawnWt, activityVal, kingSafetyVal, rapidControl(pieces)]
+
+
+# Get all pieces on the board for each side. Create unions to group all into a general group.
+def rapidPieces(board: chess.Board, color):
     myColor = color
     enemyColor = not color
 
     allMyPieces = set()
     allTheirPieces = set()
 
-    # ------------------------------------------------------------------------------------------------------------------
-    # Get all pieces on the board for each side. Create unions to group all into a general group.
-
     # Kings
     myKings = board.pieces(KING, myColor)
     theirKings = board.pieces(KING, enemyColor)
@@ -70,8 +132,15 @@ def calculateRapid(board: chess.Board, color):
     allMyPieces = allMyPieces.union(myPawns)
     allTheirPieces = allTheirPieces.union(theirPawns)
 
-    # ------------------------------------------------------------------------------------------------------------------
-    # Gets the material score.
+    return myKings, theirKings, myQueens, theirQueens, myRooks, theirRooks, myBishops, theirBishops, myKnights, theirKnights, \
+           myPawns, theirPawns, allMyPieces, allTheirPieces
+
+
+# Gets the material score.
+def rapidMaterial(pieces):
+    myKings, theirKings, myQueens, theirQueens, myRooks, theirRooks, myBishops, theirBishops, myKnights, theirKnights, \
+        myPawns, theirPawns, allMyPieces, allTheirPieces = pieces
+
     kingWt = len(myKings) - len(theirKings)
     queenWt = len(myQueens) - len(theirQueens)
     rookWt = len(myRooks) - len(theirRooks)
@@ -79,41 +148,14 @@ def calculateRapid(board: chess.Board, color):
     kntWt = len(myKnights) - len(theirKnights)
     pawnWt = len(myPawns) - len(theirPawns)
 
-    materialVal = (200 * kingWt) + (9 * queenWt) + (5 * rookWt) + (3 * (kntWt + bishWt)) + pawnWt
 
-    # ------------------------------------------------------------------------------------------------------------------
-    # Gets the activity score. Here I'm comparing the average number of moves per piece.
-    if board.turn == myColor:
-        myMoves = list(board.legal_moves)
-        theirMoves = list()
-    else:
-        theirMoves = list(board.legal_moves)
-        myMoves = list()
-
-    if board.turn == myColor:
-        if len(myMoves) > 0:
-            board.push(myMoves[0])
-            theirMoves = list(board.legal_moves)
-            board.pop()
-    else:
-        if len(theirMoves) > 0:
-            board.push(theirMoves[0])
-            myMoves = list(board.legal_moves)
-            board.pop()
+    return [kingWt, queenWt, rookWt, kntWt + bishWt, pawnWt]
 
-    activityVal = 0
 
-    if (allMyPieces == 0 and allTheirPieces == 0):
-        activityVal = 0
-    elif (allMyPieces == 0):
-        activityVal = -1 * len(theirMoves) / len(allTheirPieces)
-    elif (allTheirPieces == 0):
-        activityVal = len(myMoves) / len(allMyPieces)
-    else:
-        activityVal = (len(myMoves) / len(allMyPieces)) - (len(theirMoves) / len(allTheirPieces))
+# Gets the center control. How many pawns are in a4 to h5.
+def rapidControl(pieces):
+    myPawns, theirPawns = pieces[10], pieces[11]
 
-    # ------------------------------------------------------------------------------------------------------------------
-    # Gets the center control. How many pawns are in a4 to h5.
     myControl = 0
     theirControl = 0
 
@@ -127,6 +169,33 @@ def calculateRapid(board: chess.Board, color):
 
     controlVal = myControl - theirControl
 
+    return controlVal
+
+
+# Gets the activity and the King safety, the expensive terms.
+def rapidPositional(board: chess.Board, color, context, pieces):
+    myColor = color
+    enemyColor = not color
+    myKings, theirKings, myQueens, theirQueens, myRooks, theirRooks, myBishops, theirBishops, myKnights, theirKnights, \
+        myPawns, theirPawns, allMyPieces, allTheirPieces = pieces
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Gets the activity score. Here I'm comparing the average number of moves per piece.
+    # Moves are counted from the attack maps of both sides, so the board is never mutated here.
+    myMoves, myEscape, _ = mobility(board, myColor, context)
+    theirMoves, theirEscape, _ = mobility(board, enemyColor, context)
+
+    activityVal = 0
+
+    if (allMyPieces == 0 and allTheirPieces == 0):
+        activityVal = 0
+    elif (allMyPieces == 0):
+        activityVal = -1 * theirMoves / len(allTheirPieces)
+    elif (allTheirPieces == 0):
+        activityVal = myMoves / len(allMyPieces)
+    else:
+        activityVal = (myMoves / len(allMyPieces)) - (theirMoves / len(allTheirPieces))
+
     # ------------------------------------------------------------------------------------------------------------------
     # Gets the King safety. How safe is my King to the enemy King?
     # This part is pretty big...
@@ -134,12 +203,11 @@ def calculateRapid(board: chess.Board, color):
     # To reduce time to process all these conditions - If I'm in check, my King is DEFINITELY not safe.
     kingSafetyVal = 0
 
-    if board.is_check():
+    inCheck = context.is_check() if context is not None else board.is_check()
+    if inCheck:
         kingSafetyVal = -2
     else:
         # Pt.1 How mobile is my King to the enemy King?
-        myEscape = countMoves(myKings, myMoves)
-        theirEscape = countMoves(theirKings, theirMoves)
         escapeVal = myEscape - theirEscape
 
         # Pt.2 How many pawns are nearby my King?
@@ -469,36 +537,33 @@ def calculateRapid(board: chess.Board, color):
 
         kingSafetyVal = protectionValue + attackerValue + defenderVal + pawnShieldVal + escapeVal
 
-    # Finalize weights, some weights have caps.
-    # Activity caps at +/- 1.5
-    if activityVal > 1.5:
-        activityVal = 1.5
-    elif activityVal < -1.5:
-        activityVal = -1.5
-
-    # King safety caps at +/- 1 or 2
-    if round(kingSafetyVal) > 2:
-        kingSafetyVal = 2
-    elif round(kingSafetyVal) < -2:
-        kingSafetyVal = -1
+    return activityVal, kingSafetyVal
+
+
+# Activity caps at +/- cap (1.5 by default)
+def capActivity(activityVal, cap):
+    if activityVal > cap:
+        return cap
+    elif activityVal < -cap:
+        return -cap
+    return activityVal
+
+
+# King safety caps at cap above and floor below (2 and -1 by default) and is never 0
+def capKingSafety(kingSafetyVal, cap, floor):
+    if round(kingSafetyVal) > cap:
+        return cap
+    elif round(kingSafetyVal) < -cap:
+        return floor
     elif round(kingSafetyVal) == 0:
         if kingSafetyVal > 0:
-            kingSafetyVal = 1
+            return 1
         else:
-            kingSafetyVal = -1
-    else:
-        kingSafetyVal = round(kingSafetyVal)
-
-    totalScore = materialVal + activityVal + kingSafetyVal + controlVal
-
-    return totalScore
+            return -1
+    return round(kingSafetyVal)
 
-# Count Moves
-def countMoves(pieces, legalMoves):
-    returnResult = 0
 
-    for piece in pieces:
-        for move in legalMoves:
-            if move.from_square == piece:
-                returnResult = returnResult + 1
-    return returnResult
+# Only uses the board API shared with Utilities.Bitboard.BitBoard
+calculateRapid.bitboard_native = True
+# Returns a bound past the window on a lazy exit, see Evaluate.cache
+calculateRapid.lazy_bounds = True
@@ -0,0 +1,205 @@
+import time
+
+import chess
+from chess import *
+from .evaluationjb2 import capActivity, capKingSafety
+from .mobility import pawnMobility
+from .weights import WEIGHTS
+from Utilities.Tables import TABLES, LANE_UPWARDS, rows
+
+# Single pass version of CombinedEvals.eval. Every term of evaluateScore and calculateRapid is computed from the piece
+# bitboards with square-indexed tables from Utilities.Tables, the attack maps of both sides are generated once and
+# shared by activity, king escape squares and the check test. The score is bit-for-bit the one of CombinedEvals.eval:
+# the king tables are built from the exact conditions of the calculateRapid king safety loops and the final sums
+# use the same operations in the same order.
+
+# evalCapture by piece type. evaluateScore reads the moved piece from the square it has already left, so evalType and
+# evalBlunder always add 0 and the score only depends on what stood on the target square.
+CAPTURE_VALUES = [0, 100, 320, 330, 500, 900, 20000]
+
+# Squares a3 to h4, the center control area of calculateRapid
+CONTROL_MASK = 0x0000_0000_FFFF_0000
+
+
+# King area masks and protection lanes of calculateRapid, built from its exact loop conditions by Utilities.Tables.
+# A lane mask of 0 means the first step already leaves the board, which counts as protected.
+PAWN_SHIELD = TABLES['pawnShield']
+KING_ZONE = TABLES['kingZone']
+LANE_MASKS = rows(TABLES['kingLanes'], 64)
+LANE_EDGES = [sum(1 for masks in LANE_MASKS if masks[king] == 0) for king in range(64)]
+LANES = [tuple((masks[king], upwards) for masks, upwards in zip(LANE_MASKS, LANE_UPWARDS) if masks[king])
+         for king in range(64)]
+
+
+def lastCaptured(board):
+    'Type of the piece that stood on the target square of the last move, 0 when it was empty'
+    if hasattr(board, 'peek_captured'):
+        return board.peek_captured()
+    # chess.Board only knows the position before the move after taking it back
+    move = board.pop()
+    pieceType = board.piece_type_at(move.to_square) or 0
+    board.push(move)
+    return pieceType
+
+
+def pawnAttacks(pawns, color):
+    if color == WHITE:
+        return (((pawns & ~BB_FILE_A) << 7) | ((pawns & ~BB_FILE_H) << 9)) & BB_ALL
+    return ((pawns & ~BB_FILE_A) >> 9) | ((pawns & ~BB_FILE_H) >> 7)
+
+
+def sideActivity(board, color, context):
+    'Pseudo-legal move count, king move count and the squares attacked by the non-king pieces of color'
+    notOwn = ~board.occupied_co[color]
+    moves, _ = pawnMobility(board, color)
+    kingMoves = 0
+    attacked = 0
+
+    if context is not None:
+        pieceAttacks = context.attacks(color)
+    else:
+        pieceAttacks = [(pieceType, square, board.attacks_mask(square))
+                        for pieceType in (KNIGHT, BISHOP, ROOK, QUEEN, KING)
+                        for square in scan_forward(board.pieces_mask(pieceType, color))]
+
+    for pieceType, square, attacks in pieceAttacks:
+        if pieceType == KING:
+            kingMoves += popcount(attacks & notOwn)
+        else:
+            moves += popcount(attacks & notOwn)
+            attacked |= attacks
+
+    return moves + kingMoves, kingMoves, attacked
+
+
+def kingProtection(kings, own, occupied):
+    protection = 0
+    for king in scan_forward(kings):
+        protection += LANE_EDGES[king]
+        for mask, upwards in LANES[king]:
+            blockers = mask & occupied
+            if blockers:
+                first = blockers & -blockers if upwards else BB_SQUARES[msb(blockers)]
+                if first & own:
+                    protection += 1
+    return protection
+
+
+def fusedEval(board: chess.Board, color, context=None, alpha=None, beta=None):
+    'CombinedEvals.eval in a single pass over the piece bitboards'
+    positionVal = CAPTURE_VALUES[lastCaptured(board)]
+
+    enemyColor = not color
+    allMyPieces = board.occupied_co[color]
+    allTheirPieces = board.occupied_co[enemyColor]
+    occupied = allMyPieces | allTheirPieces
+    myKings, theirKings = board.pieces_mask(KING, color), board.pieces_mask(KING, enemyColor)
+    myPawns, theirPawns = board.pieces_mask(PAWN, color), board.pieces_mask(PAWN, enemyColor)
+
+    # Material
+    kingWt = popcount(myKings) - popcount(theirKings)
+    queenWt = popcount(board.pieces_mask(QUEEN, color)) - popcount(board.pieces_mask(QUEEN, enemyColor))
+    rookWt = popcount(board.pieces_mask(ROOK, color)) - popcount(board.pieces_mask(ROOK, enemyColor))
+    minorWt = popcount(board.pieces_mask(KNIGHT, color)) - popcount(board.pieces_mask(KNIGHT, enemyColor)) \
+        + popcount(board.pieces_mask(BISHOP, color)) - popcount(board.pieces_mask(BISHOP, enemyColor))
+    pawnWt = popcount(myPawns) - popcount(theirPawns)
+
+    # Activity, both attack maps are reused by the check test below
+    myMoves, myEscape, myAttacks = sideActivity(board, color, context)
+    theirMoves, theirEscape, theirAttacks = sideActivity(board, enemyColor, context)
+    activityVal = (myMoves / popcount(allMyPieces)) - (theirMoves / popcount(allTheirPieces))
+
+    # Center control
+    controlVal = popcount(myPawns & CONTROL_MASK) - popcount(theirPawns & CONTROL_MASK)
+
+    # King safety
+    if board.turn == color:
+        inCheck = (theirAttacks | pawnAttacks(theirPawns, enemyColor)) & myKings
+    else:
+        inCheck = (myAttacks | pawnAttacks(myPawns, color)) & theirKings
+
+    if inCheck:
+        kingSafetyVal = -2
+    else:
+        escapeVal = myEscape - theirEscape
+        pawnShieldVal = 0
+        defenderVal = 0
+        attackerValue = 0
+        for king in scan_forward(myKings):
+            pawnShieldVal += popcount(PAWN_SHIELD[king] & myPawns)
+            defenderVal += popcount(KING_ZONE[king] & allMyPieces & ~myPawns)
+            attackerValue -= popcount(KING_ZONE[king] & allTheirPieces)
+        for king in scan_forward(theirKings):
+            pawnShieldVal -= popcount(PAWN_SHIELD[king] & theirPawns)
+            defenderVal -= popcount(KING_ZONE[king] & allTheirPieces & ~theirPawns)
+            attackerValue += popcount(KING_ZONE[king] & allMyPieces)
+        protectionValue = kingProtection(myKings, allMyPieces, occupied) \
+            - kingProtection(theirKings, allTheirPieces, occupied)
+
+        kingSafetyVal = protectionValue + attackerValue + defenderVal + pawnShieldVal + escapeVal
+
+    # Same operations in the same order as calculateRapid and CombinedEvals.eval
+    weights = WEIGHTS['calculateRapid']
+    activityCap, kingSafetyCap, kingSafetyFloor = WEIGHTS['calculateRapidCaps']
+    materialVal = (weights[0] * kingWt) + (weights[1] * queenWt) + (weights[2] * rookWt) + (weights[3] * minorWt)\
+                  + (weights[4] * pawnWt)
+    activityVal = capActivity(activityVal, activityCap)
+    kingSafetyVal = capKingSafety(kingSafetyVal, kingSafetyCap, kingSafetyFloor)
+    rapidVal = materialVal + (weights[5] * activityVal) + (weights[6] * kingSafetyVal) + (weights[7] * controlVal)
+
+    blend = WEIGHTS['eval']
+    return (blend[0] * positionVal) + (blend[1] * rapidVal)
+
+
+# Only uses the board API shared with Utilities.Bitboard.BitBoard
+fusedEval.bitboard_native = True
+# The capture term reads the piece the last move took, see Evaluate.cache
+fusedEval.history_key = lastCaptured
+
+
+def randomPositions(games=20, plies=80, seed=2022):
+    'Every position of random games for both colors, as (board, color) tuples'
+    import random
+
+    rand = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        board = chess.Board()
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rand.choice(moves))
+            for color in (WHITE, BLACK):
+                positions.append((board.copy(), color))
+    return positions
+
+
+def verifyFused(positions):
+    'Raises an AssertionError on the first position fusedEval scores differently from CombinedEvals.eval'
+    from .CombinedEvals import eval
+
+    for board, color in positions:
+        if fusedEval(board, color) != eval(board, color):
+            raise AssertionError(f'fusedEval differs from eval on {board.fen()} for {color}')
+
+
+def benchmark(games=20, plies=80, seed=2022):
+    'Checks fusedEval against CombinedEvals.eval on random games and reports the speedup'
+    from .CombinedEvals import eval
+
+    positions = randomPositions(games, plies, seed)
+    verifyFused(positions)
+
+    timings = {}
+    for name, evaluation in (('eval', eval), ('fusedEval', fusedEval)):
+        start = time.perf_counter()
+        for board, color in positions:
+            evaluation(board, color)
+        timings[name] = time.perf_counter() - start
+        print(f'{name:>10}: {len(positions) / timings[name]:.0f} evaluations/sec')
+    print(f'{len(positions)} positions identical, speedup {timings["eval"] / timings["fusedEval"]:.1f}x')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,55 @@
+import chess
+from chess import *
+
+# Mobility from attack maps. Works on chess.Board and Utilities.Bitboard.BitBoard alike and never
+# pushes or pops a move, so both colours can be measured without generating the opponent's moves.
+
+
+def pawnMobility(board, color):
+    'Returns the number of pawn pushes and captures for color and how many of its pawns cannot move at all'
+    pawns = board.pieces_mask(PAWN, color)
+    empty = ~board.occupied & BB_ALL
+    enemy = board.occupied_co[not color]
+
+    if color == WHITE:
+        single = (pawns << 8) & empty
+        double = ((single & BB_RANK_3) << 8) & empty
+        left = ((pawns & ~BB_FILE_A) << 7) & enemy
+        right = ((pawns & ~BB_FILE_H) << 9) & enemy
+        movers = (single >> 8) | (left >> 7) | (right >> 9)
+    else:
+        single = (pawns >> 8) & empty
+        double = ((single & BB_RANK_6) >> 8) & empty
+        left = ((pawns & ~BB_FILE_A) >> 9) & enemy
+        right = ((pawns & ~BB_FILE_H) >> 7) & enemy
+        movers = (single << 8) | (left << 9) | (right << 7)
+
+    moves = popcount(single) + popcount(double) + popcount(left) + popcount(right)
+    blocked = popcount(pawns & ~movers)
+    return moves, blocked
+
+
+def mobility(board, color, context=None):
+    'Returns the pseudo-legal move count of color, how many of those are king moves, and its blocked pawn count'
+    notOwn = ~board.occupied_co[color]
+    moves, blocked = pawnMobility(board, color)
+
+    # Reuse the attack maps of the search node when there is one
+    if context is not None:
+        kingMoves = 0
+        for pieceType, square, attacks in context.attacks(color):
+            if pieceType == KING:
+                kingMoves += popcount(attacks & notOwn)
+            else:
+                moves += popcount(attacks & notOwn)
+        return moves + kingMoves, kingMoves, blocked
+
+    for pieceType in (KNIGHT, BISHOP, ROOK, QUEEN):
+        for square in scan_forward(board.pieces_mask(pieceType, color)):
+            moves += popcount(board.attacks_mask(square) & notOwn)
+
+    kingMoves = 0
+    for square in scan_forward(board.pieces_mask(KING, color)):
+        kingMoves += popcount(board.attacks_mask(square) & notOwn)
+
+    return moves + kingMoves, kingMoves, blocked
@@ -0,0 +1,310 @@
+import os
+import threading
+import time
+
+import chess
+import numpy as np
+from chess import *
+
+# Efficiently updatable neural network evaluation, see https://www.chessprogramming.org/NNUE. The first layer is a
+# HalfKP feature transformer: one feature per (own king square, non-king piece, square) seen from each side, whose
+# int16 accumulators are kept from the previously evaluated position and only updated with the features of the pieces
+# that changed since, usually a few vector adds in a depth-first search. The clipped accumulators of the side to move
+# and of the other side feed two small quantised dense layers and the output neuron.
+#
+# Quantisation: accumulator and hidden activations are clipped to 0..127 where 127 stands for 1.0, the dense weights
+# are int8 with 64 standing for 1.0 and int32 biases in the scale of their outputs. The output is converted to pawns
+# with the scale stored next to the weights.
+
+NNUE_VERSION = 1
+NNUE_PATH = os.environ.get('CHESS_ENGINE_NNUE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nnue.npz')
+
+PIECE_FEATURES = 10 * 64
+FEATURES = 64 * PIECE_FEATURES
+ACTIVATION_MAX = 127
+WEIGHT_SHIFT = 6
+OUTPUT_UNIT = ACTIVATION_MAX << WEIGHT_SHIFT
+
+
+def featureIndex(perspective, kingSquare, pieceType, pieceColor, square):
+    'Index of a piece in the feature transformer, squares are mirrored vertically for black'
+    if perspective == BLACK:
+        kingSquare ^= 56
+        square ^= 56
+    return kingSquare * PIECE_FEATURES + ((pieceType - 1) * 2 + (pieceColor != perspective)) * 64 + square
+
+
+def activate(values):
+    'Clipped ReLU in place, np.clip is several times slower on arrays this small'
+    np.maximum(values, 0, out=values)
+    return np.minimum(values, ACTIVATION_MAX, out=values)
+
+
+def boardPieces(board):
+    'Piece bitboards by color and type, the only board state the network reads'
+    return tuple(board.pieces_mask(pieceType, pieceColor) for pieceColor in (WHITE, BLACK)
+                 for pieceType in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING))
+
+
+def kingSquare(pieces, color):
+    kings = pieces[(0 if color == WHITE else 6) + 5]
+    return msb(kings) if kings else 0
+
+
+class Network:
+    """
+    Quantised weights and the accumulator state of the position evaluated last. The weights are shared, the
+    accumulators are kept per thread, so searches running on different threads, like those of
+    Search.Background.SearchHandle, can use one network. Within a thread the accumulators follow whatever board the
+    network is called with.
+    """
+    def __init__(self, ftWeight, ftBias, l1Weight, l1Bias, l2Weight, l2Bias, outWeight, outBias, scale):
+        self.ftWeight = np.ascontiguousarray(ftWeight, dtype=np.int16)
+        self.ftBias = np.asarray(ftBias, dtype=np.int16)
+        # Dense weights are small, keeping them as int32 avoids overflow in the products
+        self.l1Weight = np.asarray(l1Weight, dtype=np.int32)
+        self.l1Bias = np.asarray(l1Bias, dtype=np.int32)
+        self.l2Weight = np.asarray(l2Weight, dtype=np.int32)
+        self.l2Bias = np.asarray(l2Bias, dtype=np.int32)
+        self.outWeight = np.asarray(outWeight, dtype=np.int32)
+        self.outBias = int(outBias)
+        self.scale = float(scale)
+
+        hidden = self.ftBias.shape[0]
+        if self.ftWeight.shape != (FEATURES, hidden) or self.l1Weight.shape[1] != 2 * hidden \
+                or self.l2Weight.shape[1] != self.l1Weight.shape[0] \
+                or self.outWeight.shape != (self.l2Weight.shape[0],):
+            raise ValueError('Inconsistent network layer sizes')
+
+        self._local = threading.local()
+
+    def _state(self):
+        'The accumulator state of the calling thread'
+        state = self._local
+        if not hasattr(state, 'pieces'):
+            state.pieces = None
+            state.accumulators = [None, None]
+            # Pieces and accumulators of the position last evaluated in every column of evaluateBatch
+            state.columns = []
+        return state
+
+    @property
+    def pieces(self):
+        return self._state().pieces
+
+    @pieces.setter
+    def pieces(self, pieces):
+        self._state().pieces = pieces
+
+    @property
+    def accumulators(self):
+        return self._state().accumulators
+
+    @accumulators.setter
+    def accumulators(self, accumulators):
+        self._state().accumulators = accumulators
+
+    @property
+    def columns(self):
+        return self._state().columns
+
+    def refresh(self, pieces, perspective):
+        'Accumulator of one side built from scratch'
+        king = kingSquare(pieces, perspective)
+        indices = [featureIndex(perspective, king, pieceType, pieceColor, square)
+                   for pieceColor in (WHITE, BLACK) for pieceType in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN)
+                   for square in scan_forward(pieces[(0 if pieceColor == WHITE else 6) + pieceType - 1])]
+        accumulator = self.ftBias.copy()
+        if indices:
+            accumulator += self.ftWeight[indices].sum(axis=0, dtype=np.int16)
+        return accumulator
+
+    def update(self, board):
+        'Brings the accumulators from the last position to the one of board'
+        state = self._state()
+        pieces = boardPieces(board)
+        state.accumulators = self.advance(state.pieces, state.accumulators, pieces)
+        state.pieces = pieces
+        return state.accumulators
+
+    def advance(self, previous, previousAccumulators, pieces):
+        'Accumulators of pieces, computed from the accumulators of the previous pieces where that is cheaper'
+        if previous == pieces:
+            return previousAccumulators
+        if previous is None:
+            return [self.refresh(pieces, BLACK), self.refresh(pieces, WHITE)]
+
+        # Accumulators are indexed by color. A side whose king moved sees every feature change and starts over.
+        kings = (kingSquare(pieces, BLACK), kingSquare(pieces, WHITE))
+        moved = (kings[BLACK] != kingSquare(previous, BLACK), kings[WHITE] != kingSquare(previous, WHITE))
+        accumulators = [self.refresh(pieces, perspective) if moved[perspective]
+                        else previousAccumulators[perspective].copy() for perspective in (BLACK, WHITE)]
+
+        for pieceColor in (WHITE, BLACK):
+            offset = 0 if pieceColor == WHITE else 6
+            for pieceType in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN):
+                old, new = previous[offset + pieceType - 1], pieces[offset + pieceType - 1]
+                if old == new:
+                    continue
+                for perspective in (WHITE, BLACK):
+                    if moved[perspective]:
+                        continue
+                    king = kings[perspective]
+                    accumulator = accumulators[perspective]
+                    for square in scan_forward(old & ~new):
+                        accumulator -= self.ftWeight[featureIndex(perspective, king, pieceType, pieceColor, square)]
+                    for square in scan_forward(new & ~old):
+                        accumulator += self.ftWeight[featureIndex(perspective, king, pieceType, pieceColor, square)]
+        return accumulators
+
+    def forward(self, inputs):
+        'Dense layers on clipped accumulators, one position per column'
+        hidden = activate(inputs.astype(np.int32))
+        hidden = activate((self.l1Weight @ hidden + self.l1Bias[:, None]) >> WEIGHT_SHIFT)
+        hidden = activate((self.l2Weight @ hidden + self.l2Bias[:, None]) >> WEIGHT_SHIFT)
+        return (self.outWeight @ hidden + self.outBias) * (self.scale / OUTPUT_UNIT)
+
+    def evaluate(self, board, color):
+        'Score in pawns from the point of view of color'
+        accumulators = self.update(board)
+        turn = board.turn
+        score = float(self.forward(np.concatenate((accumulators[turn], accumulators[not turn]))[:, None])[0])
+        return score if color == turn else -score
+
+    def evaluateBatch(self, boards, colors, columns=None):
+        """
+        Scores of many boards with one pass through the dense layers. Every column keeps its own accumulators, so
+        callers that put the same line of play in the same column on every call, like Search.Lockstep, get
+        incremental updates for each of them.
+        :param columns: The column of every board, 0 to len(boards) - 1 by default
+        """
+        state = self._state().columns
+        inputs = []
+        for column, board in zip(columns if columns is not None else range(len(boards)), boards):
+            if column >= len(state):
+                state.extend([(None, None)] * (column + 1 - len(state)))
+            previous, previousAccumulators = state[column]
+            pieces = boardPieces(board)
+            accumulators = self.advance(previous, previousAccumulators, pieces)
+            state[column] = (pieces, accumulators)
+            inputs.append(np.concatenate((accumulators[board.turn], accumulators[not board.turn])))
+        if not inputs:
+            return []
+        scores = self.forward(np.stack(inputs, axis=1))
+        return [float(score) if color == board.turn else -float(score)
+                for score, board, color in zip(scores, boards, colors)]
+
+
+def saveNetwork(network, path=NNUE_PATH):
+    np.savez(path, version=NNUE_VERSION, ftWeight=network.ftWeight, ftBias=network.ftBias,
+             l1Weight=network.l1Weight.astype(np.int8), l1Bias=network.l1Bias,
+             l2Weight=network.l2Weight.astype(np.int8), l2Bias=network.l2Bias,
+             outWeight=network.outWeight.astype(np.int8), outBias=network.outBias, scale=network.scale)
+
+
+def loadNetwork(path=NNUE_PATH):
+    'Reads a network written by saveNetwork'
+    with np.load(path) as data:
+        if int(data['version']) != NNUE_VERSION:
+            raise ValueError(f'{path} is not a version {NNUE_VERSION} network')
+        return Network(data['ftWeight'], data['ftBias'], data['l1Weight'], data['l1Bias'], data['l2Weight'],
+                       data['l2Bias'], data['outWeight'], data['outBias'], data['scale'])
+
+
+def materialNetwork(hidden=32, l1=32, l2=32):
+    """
+    Network that scores material only, the starting point for training and the fallback without a weights file.
+    Lane 0 of an accumulator sums the own pieces and lane 1 the enemy pieces at 3/127 per pawn, the first dense layer
+    splits the difference into its positive and negative part and the output subtracts them again.
+    """
+    values = {PAWN: 3, KNIGHT: 9, BISHOP: 9, ROOK: 15, QUEEN: 27}
+    ftWeight = np.zeros((FEATURES, hidden), dtype=np.int16)
+    for perspective in (WHITE, BLACK):
+        for king in SQUARES:
+            for pieceType, value in values.items():
+                for pieceColor in (WHITE, BLACK):
+                    for square in SQUARES:
+                        index = featureIndex(perspective, king, pieceType, pieceColor, square)
+                        ftWeight[index, 0 if pieceColor == perspective else 1] = value
+
+    unit = 1 << WEIGHT_SHIFT
+    l1Weight = np.zeros((l1, 2 * hidden), dtype=np.int8)
+    l1Weight[0, 0], l1Weight[0, 1] = unit, -unit
+    l1Weight[1, 0], l1Weight[1, 1] = -unit, unit
+    l2Weight = np.zeros((l2, l1), dtype=np.int8)
+    l2Weight[0, 0], l2Weight[1, 1] = unit, unit
+    outWeight = np.zeros(l2, dtype=np.int8)
+    outWeight[0], outWeight[1] = unit, -unit
+    return Network(ftWeight, np.zeros(hidden, dtype=np.int16), l1Weight, np.zeros(l1, dtype=np.int32), l2Weight,
+                   np.zeros(l2, dtype=np.int32), outWeight, 0, OUTPUT_UNIT / (unit * values[PAWN]))
+
+
+_network = None
+_networkLock = threading.Lock()
+
+
+def defaultNetwork():
+    'The network of NNUE_PATH, or the material network when there is no weights file'
+    global _network
+    if _network is None:
+        with _networkLock:
+            if _network is None:
+                _network = loadNetwork(NNUE_PATH) if os.path.exists(NNUE_PATH) else materialNetwork()
+    return _network
+
+
+def nnueEval(board: chess.Board, color, context=None, alpha=None, beta=None):
+    'Score of the default network, the window is ignored'
+    return defaultNetwork().evaluate(board, color)
+
+
+def nnueBatch(boards, colors, columns=None):
+    return defaultNetwork().evaluateBatch(boards, colors, columns)
+
+
+# Only reads pieces_mask and turn, which Utilities.Bitboard.BitBoard shares
+nnueEval.bitboard_native = True
+nnueEval.batch = nnueBatch
+
+
+def benchmark(games=20, plies=80, seed=2022):
+    'Checks the incremental accumulators against a refresh on random games and reports the speed of both'
+    import random
+
+    network = defaultNetwork()
+    rand = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        board = chess.Board()
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rand.choice(moves))
+            positions.append(board.copy(stack=False))
+
+    for board in positions:
+        incremental = network.evaluate(board, WHITE)
+        pieces = boardPieces(board)
+        accumulators = [network.refresh(pieces, BLACK), network.refresh(pieces, WHITE)]
+        if not all(np.array_equal(a, b) for a, b in zip(accumulators, network.accumulators)):
+            raise AssertionError(f'Incremental accumulators differ from a refresh on {board.fen()}')
+        network.pieces = None
+        if network.evaluate(board, WHITE) != incremental:
+            raise AssertionError(f'Incremental score differs from a refresh on {board.fen()}')
+
+    start = time.perf_counter()
+    for board in positions:
+        network.evaluate(board, WHITE)
+    incremental = time.perf_counter() - start
+    start = time.perf_counter()
+    for board in positions:
+        network.pieces = None
+        network.evaluate(board, WHITE)
+    refresh = time.perf_counter() - start
+    print(f'incremental: {len(positions) / incremental:.0f} evaluations/sec')
+    print(f'    refresh: {len(positions) / refresh:.0f} evaluations/sec')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,64 @@
+import json
+import os
+
+# Weights used by the evaluators. Every evaluator multiplies its terms, in the order given by TERMS, with the
+# matching list in WEIGHTS. The lists are updated in place by loadWeights so the evaluators always read the current
+# values. Set CHESS_ENGINE_WEIGHTS to a weight file written by Tuning.py to load it at import.
+
+WEIGHTS_VERSION = 1
+
+TERMS = {
+    'calculate': ('king', 'queen', 'rook', 'minor', 'pawn', 'pawnStructure', 'mobility'),
+    'calculateRapid': ('king', 'queen', 'rook', 'minor', 'pawn', 'activity', 'kingSafety', 'control'),
+    'calculateRapidCaps': ('activity', 'kingSafety', 'kingSafetyFloor'),
+    'eval': ('evaluateScore', 'calculateRapid'),
+}
+
+DEFAULTS = {
+    'calculate': {'king': 200, 'queen': 9, 'rook': 5, 'minor': 3, 'pawn': 1, 'pawnStructure': -0.5, 'mobility': 0.1},
+    'calculateRapid': {'king': 200, 'queen': 9, 'rook': 5, 'minor': 3, 'pawn': 1, 'activity': 1, 'kingSafety': 1,
+                       'control': 1},
+    'calculateRapidCaps': {'activity': 1.5, 'kingSafety': 2, 'kingSafetyFloor': -1},
+    'eval': {'evaluateScore': 0.5, 'calculateRapid': 0.5},
+}
+
+WEIGHTS = {name: [DEFAULTS[name][term] for term in terms] for name, terms in TERMS.items()}
+
+
+def resetWeights():
+    'Restores the hand-picked default weights'
+    for name, terms in TERMS.items():
+        WEIGHTS[name][:] = [DEFAULTS[name][term] for term in terms]
+
+
+def loadWeights(path):
+    'Loads a weight file. Sections or terms missing from the file keep their current values'
+    with open(path) as handle:
+        data = json.load(handle)
+
+    if data.get('version') != WEIGHTS_VERSION:
+        raise ValueError(f'Unsupported weight file version {data.get("version")} in {path}')
+
+    for name, terms in TERMS.items():
+        section = data.get(name, {})
+        for index, term in enumerate(terms):
+            if term in section:
+                WEIGHTS[name][index] = section[term]
+
+
+def saveWeights(path, weights=None):
+    'Writes weights, by default the ones currently in use, to a weight file'
+    if weights is None:
+        weights = WEIGHTS
+
+    data = {'version': WEIGHTS_VERSION}
+    for name, terms in TERMS.items():
+        if name in weights:
+            data[name] = {term: float(value) for term, value in zip(terms, weights[name])}
+
+    with open(path, 'w') as handle:
+        json.dump(data, handle, indent=4)
+
+
+if os.environ.get('CHESS_ENGINE_WEIGHTS'):
+    loadWeights(os.environ['CHESS_ENGINE_WEIGHTS'])
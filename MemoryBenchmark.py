@@ -0,0 +1,148 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import resource
+import sys
+import time
+import tracemalloc
+import chess
+from Engine import Engine
+from Evaluate import EVALUATORS
+from Search import iterativedeepening
+from Search.Search import seed as seedSearch
+
+# Memory footprint of a long running engine. Moves are played through Engine for both sides with a single Memo, the
+# way a long game or a session of games grows it. After every move the resident set size, the memory traced by
+# tracemalloc and the accounting of Memo.memory_usage() and the board's undo stack are sampled, at the end the growth
+# per move, the bytes per table entry and the allocated blocks kept per searched node are reported. Nodes are
+# counted by Memo.nodes.
+
+
+def currentRss():
+    'Resident set size of the process in bytes, the peak on systems without /proc'
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return peakRss()
+
+
+def peakRss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def boardMemory(board: chess.Board):
+    'Bytes held by the move stack and the undo states of a chess.Board'
+    total = sys.getsizeof(board.move_stack) + sys.getsizeof(board._stack)
+    for move in board.move_stack:
+        total += sys.getsizeof(move) + sys.getsizeof(move.__dict__)
+    for state in board._stack:
+        total += sys.getsizeof(state) + sys.getsizeof(state.__dict__)
+    return total
+
+
+def memoryBenchmark(moves=40, depth=3, moveTime=1.0, evaluator='calculateRapid', backend='chess', trace=True,
+                    seed=2022):
+    """
+    Plays moves through Engine and samples the memory use after every move
+    :param moves: The number of moves to play, both sides are played by the engine
+    :param depth: The maximum search depth per move
+    :param moveTime: The time in seconds allowed per move
+    :param evaluator: The name of the evaluator in Evaluate.EVALUATORS
+    :param backend: The search backend passed to iterativedeepening
+    :param trace: Whether to trace allocations with tracemalloc, which slows the search down several times
+    :param seed: Seed of the random tie-breaks of the search
+    :return: The list of per move samples and the summary dict
+    """
+    seedSearch(seed)
+    board = chess.Board()
+    engine = Engine(board, chess.WHITE, backend=backend,
+                    search=lambda _, timeout, *args, **kwargs: iterativedeepening(depth, min(timeout, moveTime), *args,
+                                                                                  **kwargs))
+    engine.eval = EVALUATORS[evaluator]
+
+    if trace:
+        tracemalloc.start()
+    startRss = currentRss()
+    samples = []
+    for ply in range(moves):
+        if board.outcome() is not None:
+            break
+        nodes = engine.memo.nodes
+        blocks = sys.getallocatedblocks()
+        start = time.time()
+        if trace:
+            tracemalloc.reset_peak()
+        uci = engine.make_move()
+
+        sample = {'ply': ply + 1, 'move': uci, 'time': time.time() - start, 'nodes': engine.memo.nodes - nodes,
+                  'blocks': sys.getallocatedblocks() - blocks, 'rss': currentRss(),
+                  'memo': engine.memo.memory_usage()['total'], 'board': boardMemory(board)}
+        if trace:
+            current, peak = tracemalloc.get_traced_memory()
+            sample['traced'] = current
+            # Memory allocated during the search and released before it returned, mostly evaluator temporaries
+            sample['transient'] = peak - current
+        samples.append(sample)
+
+    usage = engine.memo.memory_usage()
+    played = max(len(samples), 1)
+    nodes = sum(sample['nodes'] for sample in samples)
+    summary = {'moves': len(samples), 'nodes': nodes, 'entries': usage['entries'],
+               'bytes_per_entry': usage['bytes_per_entry'], 'memo': usage['total'],
+               'board': samples[-1]['board'] if samples else 0, 'peak_rss': peakRss(),
+               'rss_growth_per_move': (samples[-1]['rss'] - startRss) / played if samples else 0.0,
+               'blocks_per_node': sum(sample['blocks'] for sample in samples) / nodes if nodes else 0.0}
+    if trace:
+        summary['traced'] = samples[-1]['traced'] if samples else 0
+        summary['traced_growth_per_move'] = summary['traced'] / played
+        summary['peak_transient'] = max((sample['transient'] for sample in samples), default=0)
+        tracemalloc.stop()
+    return samples, summary
+
+
+def report(samples, summary, trace=True):
+    header = f'{"ply":>4} {"move":>6} {"time":>6} {"nodes":>8} {"blocks":>8} {"rss MB":>8} {"memo KB":>9} ' \
+             f'{"board KB":>9}'
+    if trace:
+        header += f' {"traced KB":>10} {"temp KB":>8}'
+    print(header)
+    for sample in samples:
+        line = f'{sample["ply"]:>4} {sample["move"]:>6} {sample["time"]:>6.2f} {sample["nodes"]:>8} ' \
+               f'{sample["blocks"]:>8} {sample["rss"] / 2**20:>8.1f} {sample["memo"] / 2**10:>9.1f} ' \
+               f'{sample["board"] / 2**10:>9.1f}'
+        if trace:
+            line += f' {sample["traced"] / 2**10:>10.1f} {sample["transient"] / 2**10:>8.1f}'
+        print(line)
+
+    print()
+    print(f'Moves played:            {summary["moves"]} ({summary["nodes"]} nodes)')
+    print(f'Table entries:           {summary["entries"]} ({summary["bytes_per_entry"]:.0f} bytes per entry, '
+          f'{summary["memo"] / 2**20:.2f} MB)')
+    print(f'Board undo stack:        {summary["board"] / 2**10:.1f} KB')
+    print(f'Peak RSS:                {summary["peak_rss"] / 2**20:.1f} MB')
+    print(f'RSS growth per move:     {summary["rss_growth_per_move"] / 2**10:.1f} KB')
+    print(f'Blocks kept per node:    {summary["blocks_per_node"]:.2f}')
+    if trace:
+        print(f'Traced growth per move:  {summary["traced_growth_per_move"] / 2**10:.1f} KB')
+        print(f'Peak search temporaries: {summary["peak_transient"] / 2**10:.1f} KB')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the memory growth of the engine over a game')
+    parser.add_argument('--moves', type=int, default=40)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--move-time', type=float, default=1.0)
+    parser.add_argument('--evaluator', choices=sorted(EVALUATORS), default='calculateRapid')
+    parser.add_argument('--backend', choices=('chess', 'bitboard'), default='chess')
+    parser.add_argument('--no-trace', action='store_true', help='Only sample RSS, without the tracemalloc overhead')
+    parser.add_argument('--seed', type=int, default=2022)
+    args = parser.parse_args()
+
+    samples, summary = memoryBenchmark(args.moves, args.depth, args.move_time, args.evaluator, args.backend,
+                                       not args.no_trace, args.seed)
+    report(samples, summary, not args.no_trace)
@@ -0,0 +1,121 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SearchHandle:
+    """
+    A search running on a background thread. The search function is called with a stop event and a progress
+    callback, like iterativedeepening or MCTS, and every update it reports (depth, score, pv, nodes, nps, time) is
+    kept and streamed to the consumers: the on_update callback, a blocking iterator and an async iterator for event
+    loops. cancel() ends the search after the current iteration is abandoned and the result is the best move of the
+    last finished iteration.
+
+    Example in an event loop:
+        handle = engine.start_search({'movetime': 10})
+        async for update in handle:
+            send(update)
+        score, move = await handle.result()
+    """
+    def __init__(self, search, *args, on_update=None, **kwargs):
+        """
+        :param search: The search function, called as search(*args, stop=event, callback=function, **kwargs)
+        :param on_update: Called on the search thread with every update
+        """
+        self.future = Future()
+        self.updates = []
+        self.on_update = on_update
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+        self._queues = []
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, args=(search, args, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, search, args, kwargs):
+        try:
+            result = search(*args, stop=self._stop, callback=self._publish, **kwargs)
+        except BaseException as error:
+            self._close()
+            self.future.set_exception(error)
+        else:
+            self._close()
+            self.future.set_result(result)
+
+    def _publish(self, update):
+        with self._condition:
+            self.updates.append(update)
+            self._condition.notify_all()
+            for loop, queue in self._queues:
+                loop.call_soon_threadsafe(queue.put_nowait, update)
+        if self.on_update is not None:
+            self.on_update(update)
+
+    def _close(self):
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+            for loop, queue in self._queues:
+                # The loop may be gone when nobody is listening anymore
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(queue.put_nowait, None)
+            self._queues = []
+
+    def cancel(self):
+        'Stops the search, the result is still delivered'
+        self._stop.set()
+
+    def cancelled(self):
+        return self._stop.is_set()
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout: float = None):
+        """
+        Blocks until the search has finished
+        :param timeout: The time in seconds to wait, None to wait for as long as the search takes
+        :return: The result of the search function, usually the score and the best move
+        """
+        return self.future.result(timeout)
+
+    async def result(self):
+        'wait() for event loops'
+        return await asyncio.wrap_future(self.future)
+
+    def __iter__(self):
+        'Yields the updates from the first one, blocking until the next one or the end of the search'
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.updates) and not self._finished:
+                    self._condition.wait()
+                if index >= len(self.updates):
+                    return
+                update = self.updates[index]
+            index += 1
+            yield update
+
+    def __aiter__(self):
+        return self._stream()
+
+    async def _stream(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        with self._condition:
+            for update in self.updates:
+                queue.put_nowait(update)
+            if self._finished:
+                queue.put_nowait(None)
+            else:
+                self._queues.append((loop, queue))
+
+        while True:
+            update = await queue.get()
+            if update is None:
+                return
+            yield update
@@ -0,0 +1,357 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import gc
+import random
+import time
+import tracemalloc
+import chess
+from Search.Search import SearchTimeout, tabular
+from Utilities.Bitboard import BitBoard, evaluation_for, move_to_chess, PAWN, WHITE_CODE
+from Utilities.SearchUtils import Memo
+
+INFINITY = float('inf')
+
+# More than the most legal moves of any chess position
+MAX_MOVES = 256
+
+# Table entry types
+EXACT, LOWERBOUND, UPPERBOUND = range(3)
+
+# Ordering scores, all within the small integers Python caches so writing them allocates nothing. Captures are
+# ordered most valuable victim first, least valuable attacker second.
+HASH_SCORE = 255
+KILLER_SCORE = 32
+CAPTURE_SCORE = 64
+VICTIM_VALUES = (0, 1, 3, 3, 5, 9, 0)
+
+# The search checks its deadline every this many nodes plus one
+CHECK_INTERVAL = 1023
+
+# Positions of the allocation check
+ALLOCATION_SUITE = [
+    chess.STARTING_FEN,
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+]
+
+
+class SearchCore:
+    """
+    Negamax with alpha-beta pruning and a transposition table over a Utilities.Bitboard.BitBoard that keeps all of its
+    working state in buffers allocated once by the constructor. Every ply owns a move list, an array of ordering
+    scores, a killer slot and a row of the triangular principal variation array, see
+    https://www.chessprogramming.org/Triangular_PV-Table, and the table is a set of parallel lists indexed by the low
+    bits of the Zobrist key. The recursion returns bare scores, the best move and the line are read from the PV
+    array, and ties are broken by one seeded random number generator. What is left to allocate per node is the move
+    integers of the generator and the scores of the evaluation, see verify_allocations.
+
+    Scores match tabular with the same evaluation and depth: the evaluation is called with the color of the side to
+    move at the root and the window of the node, the node without legal moves returns the evaluation and the draws by
+    rule are the ones of Utilities.SearchUtils.NodeContext.draw_outcome.
+    """
+    def __init__(self, evaluation, max_ply: int = 64, table_bits: int = 18, seed: int = None):
+        """
+        :param evaluation: The evaluation function, wrapped with Utilities.Bitboard.evaluation_for
+        :param max_ply: The deepest ply the buffers are allocated for, nodes at this ply are evaluated
+        :param table_bits: The table holds 2 ** table_bits entries
+        :param seed: Seed of the random tie-breaks, None to seed from the system
+        """
+        self.evaluation = evaluation_for(evaluation)
+        self.max_ply = max_ply
+        self.rng = random.Random(seed)
+
+        self.moves = [[] for _ in range(max_ply)]
+        self.scores = [[0] * MAX_MOVES for _ in range(max_ply)]
+        self.killers = [0] * max_ply
+        self.pv = [[0] * max_ply for _ in range(max_ply)]
+        self.pv_length = [0] * max_ply
+
+        self.mask = (1 << table_bits) - 1
+        self.table_key = [0] * (1 << table_bits)
+        self.table_move = [0] * (1 << table_bits)
+        self.table_depth = [-1] * (1 << table_bits)
+        self.table_score = [0] * (1 << table_bits)
+        self.table_type = [EXACT] * (1 << table_bits)
+
+        self.board = None
+        self.color = chess.WHITE
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None
+
+    def clear(self):
+        'Empties the table and the killer moves'
+        for index in range(self.mask + 1):
+            self.table_key[index] = 0
+            self.table_depth[index] = -1
+        for ply in range(self.max_ply):
+            self.killers[ply] = 0
+
+    def search(self, board, depth: int, deadline=None, stop=None):
+        """
+        Searches the position to a fixed depth. The table is kept between calls, so calling with increasing depths
+        is iterative deepening.
+        :param board: A BitBoard, searched in place and restored before returning, or a chess.Board searched as a copy
+        :param depth: The depth to search, at most max_ply - 1
+        :param deadline: The time.time() value after which the search raises SearchTimeout, None to never stop
+        :param stop: A threading.Event, the search raises SearchTimeout once it is set
+        :return: The score of the position for the side to move
+        """
+        if isinstance(board, chess.Board):
+            board = BitBoard.from_board(board)
+        if depth >= self.max_ply:
+            raise ValueError(f'Depth {depth} exceeds the {self.max_ply} plies the buffers are allocated for')
+        self.board = board
+        self.color = board.turn
+        self.nodes = 0
+        self.deadline = deadline
+        self.stop = stop
+        self.pv_length[0] = 0
+
+        plies = board.ply
+        try:
+            return self.negamax(depth, -INFINITY, INFINITY, 0)
+        except SearchTimeout:
+            while board.ply > plies:
+                board.pop()
+            raise
+
+    def best_move(self):
+        'The best move of the last search as a chess.Move, None when the root had no legal move'
+        return move_to_chess(self.pv[0][0]) if self.pv_length[0] else None
+
+    def line(self):
+        'The principal variation of the last search as a list of chess.Move'
+        return [move_to_chess(self.pv[0][ply]) for ply in range(self.pv_length[0])]
+
+    def negamax(self, depth: int, alpha, beta, ply: int):
+        """
+        Searches the node at ply of the current line
+        :param depth: The remaining depth
+        :param alpha: The lower bound of the window
+        :param beta: The upper bound of the window
+        :param ply: The distance from the root, selects the buffers of the node
+        :return: The score of the node
+        """
+        board = self.board
+        self.nodes += 1
+        if not self.nodes & CHECK_INTERVAL:
+            if (self.deadline is not None and time.time() > self.deadline) or (self.stop is not None and
+                                                                                self.stop.is_set()):
+                raise SearchTimeout()
+        pv_length = self.pv_length
+        pv_length[ply] = ply
+
+        new_alpha = alpha
+        new_beta = beta
+        key = board.key
+        index = key & self.mask
+        hash_move = 0
+        if self.table_key[index] == key:
+            hash_move = self.table_move[index]
+            if self.table_depth[index] >= depth:
+                score = self.table_score[index]
+                entry_type = self.table_type[index]
+                if entry_type == EXACT:
+                    self.pv[ply][ply] = hash_move
+                    pv_length[ply] = ply + 1
+                    return score
+                elif entry_type == LOWERBOUND:
+                    new_alpha = max(new_alpha, score)
+                else:
+                    new_beta = min(new_beta, score)
+                if new_alpha >= new_beta:
+                    self.pv[ply][ply] = hash_move
+                    pv_length[ply] = ply + 1
+                    return score
+
+        if depth == 0 or ply == self.max_ply - 1:
+            return self.evaluation(board, self.color, alpha=new_alpha, beta=new_beta)
+        if board.is_insufficient_material() or board.halfmove_clock >= 150 or board.is_repetition(5):
+            return self.evaluation(board, self.color, alpha=new_alpha, beta=new_beta)
+
+        moves = self.moves[ply]
+        moves.clear()
+        board.generate_pseudo_legal(moves)
+        count = len(moves)
+        scores = self.scores[ply]
+        mailbox = board.mailbox
+        killer = self.killers[ply]
+        for i in range(count):
+            move = moves[i]
+            if move == hash_move:
+                scores[i] = HASH_SCORE
+                continue
+            victim = mailbox[(move >> 6) & 63] & 7
+            if victim or move >> 12:
+                scores[i] = CAPTURE_SCORE + VICTIM_VALUES[victim or PAWN] * 8 - (mailbox[move & 63] & 7)
+            elif move == killer:
+                scores[i] = KILLER_SCORE
+            else:
+                scores[i] = 0
+
+        in_check = board.is_check()
+        pinned = 0 if in_check else board.pinned_mask(board.turn)
+        row = self.pv[ply]
+        child_row = self.pv[ply + 1]
+        maximum = -INFINITY
+        selected = 0
+        for i in range(count):
+            # Selection sort one move at a time, a cutoff leaves the rest unsorted
+            best = i
+            for j in range(i + 1, count):
+                if scores[j] > scores[best]:
+                    best = j
+            if best != i:
+                moves[i], moves[best] = moves[best], moves[i]
+                scores[i], scores[best] = scores[best], scores[i]
+            move = moves[i]
+            if not board.is_legal(move, in_check, pinned):
+                continue
+
+            board.push(move)
+            score = -self.negamax(depth - 1, -new_beta, -new_alpha, ply + 1)
+            board.pop()
+
+            if score > maximum or (score == maximum and self.rng.random() > 0.75):
+                maximum = score
+                selected = move
+                row[ply] = move
+                for k in range(ply + 1, pv_length[ply + 1]):
+                    row[k] = child_row[k]
+                pv_length[ply] = pv_length[ply + 1]
+
+            if maximum > new_alpha:
+                new_alpha = maximum
+            if new_alpha >= beta:
+                if not mailbox[(move >> 6) & 63] and not move >> 12:
+                    self.killers[ply] = move
+                break
+
+        # No legal moves, the evaluation scores the checkmate or stalemate
+        if not selected:
+            pv_length[ply] = ply
+            return self.evaluation(board, self.color, alpha=new_alpha, beta=new_beta)
+
+        self.table_key[index] = key
+        self.table_move[index] = selected
+        self.table_depth[index] = depth
+        self.table_score[index] = maximum
+        if maximum <= alpha:
+            self.table_type[index] = UPPERBOUND
+        elif maximum >= new_beta:
+            self.table_type[index] = LOWERBOUND
+        else:
+            self.table_type[index] = EXACT
+        return maximum
+
+
+def material(board, color, context=None, alpha=None, beta=None):
+    'Piece count evaluation that allocates nothing, used so the allocation check measures the search alone'
+    bb = board.bb
+    score = (bb[PAWN | WHITE_CODE].bit_count() - bb[PAWN].bit_count()
+             + 3 * (bb[2 | WHITE_CODE].bit_count() - bb[2].bit_count() + bb[3 | WHITE_CODE].bit_count()
+                    - bb[3].bit_count())
+             + 5 * (bb[4 | WHITE_CODE].bit_count() - bb[4].bit_count())
+             + 9 * (bb[5 | WHITE_CODE].bit_count() - bb[5].bit_count()))
+    return score if color else -score
+
+
+material.bitboard_native = True
+
+
+def _blocks(snapshot):
+    'Number of memory blocks of a tracemalloc snapshot, without those of tracemalloc itself'
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return sum(stat.count for stat in snapshot.statistics('filename'))
+
+
+def measure(search, board):
+    """
+    Runs search under tracemalloc
+    :param search: Function of no arguments running the search
+    :param board: The board searched, compared before and after
+    :return: Tuple of the bytes still allocated after the search, the highest number of bytes allocated during it and
+    the number of allocations still held after it
+    """
+    fen = board.fen()
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        search()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    assert board.fen() == fen, 'board was not restored after the search'
+    return current - start, peak - start, _blocks(after) - _blocks(before)
+
+
+def verify_allocations(depth: int = 4, allocations_per_node: float = 1.5, retained_per_node: float = 64.0,
+                       transient_per_ply: int = 1024):
+    """
+    Searches the allocation suite with SearchCore under tracemalloc and raises an AssertionError when the memory it
+    allocates is not bounded. The allocations still held after a search, counted by the blocks of tracemalloc
+    snapshots, and their bytes may only come from the table, which keeps at most a key and a move per node.
+    tracemalloc only sees the blocks that are alive, so the allocations freed during the search are not counted one by
+    one but bounded by the peak of the bytes allocated on top of the held ones, which may only grow with the depth of
+    the line, not with the number of nodes. tabular is measured the same way for comparison.
+    :param depth: The depth searched
+    :param allocations_per_node: The most allocations per node that may remain after a search
+    :param retained_per_node: The most bytes per node that may remain allocated after a search
+    :param transient_per_ply: The most bytes per ply of depth that may be allocated at once during a search
+    """
+    print(f'{"position":<10} {"nodes":>8} {"core allocs/node":>17} {"core B/node":>12} {"core peak B":>12} '
+          f'{"tabular allocs/node":>20} {"tabular B/node":>15} {"tabular peak B":>15}')
+    for number, fen in enumerate(ALLOCATION_SUITE, start=1):
+        board = BitBoard(fen)
+        core = SearchCore(material, seed=2022)
+        # The first search warms up the buffers, the code paths and the caches of the interpreter
+        core.search(board, depth)
+        core.clear()
+        retained, transient, allocations = measure(lambda: core.search(board, depth), board)
+        nodes = core.nodes
+
+        memo = Memo()
+        tabular(depth, -INFINITY, INFINITY, board, board.turn, material, Memo())
+        tabular_retained, tabular_transient, tabular_allocations = measure(
+            lambda: tabular(depth, -INFINITY, INFINITY, board, board.turn, material, memo), board)
+
+        print(f'{number:<10} {nodes:>8} {allocations / nodes:>17.2f} {retained / nodes:>12.1f} '
+              f'{transient - retained:>12} {tabular_allocations / memo.nodes:>20.2f} '
+              f'{tabular_retained / memo.nodes:>15.1f} {tabular_transient - tabular_retained:>15}')
+        assert allocations <= allocations_per_node * nodes, \
+            f'search of {fen} kept {allocations / nodes:.2f} allocations per node, expected at most ' \
+            f'{allocations_per_node}'
+        assert retained <= retained_per_node * nodes, \
+            f'search of {fen} kept {retained / nodes:.1f} bytes per node, expected at most {retained_per_node}'
+        assert transient - retained <= transient_per_ply * depth, \
+            f'search of {fen} held {transient - retained} bytes at once besides the table, expected at most ' \
+            f'{transient_per_ply * depth}'
+
+
+def verify_scores(depth: int = 3):
+    'Raises an AssertionError when SearchCore and tabular score a position of the allocation suite differently'
+    for fen in ALLOCATION_SUITE:
+        board = BitBoard(fen)
+        core = SearchCore(material, seed=2022)
+        for iteration in range(1, depth + 1):
+            score = core.search(board, iteration)
+            expected, _ = tabular(iteration, -INFINITY, INFINITY, board, board.turn, material, Memo())
+            assert score == expected, f'depth {iteration} of {fen} scored {score}, tabular scored {expected}'
+            assert core.best_move() in chess.Board(fen).legal_moves, f'illegal best move at depth {iteration} of {fen}'
+
+
+if __name__ == '__main__':
+    verify_scores()
+    print('scores verified')
+    verify_allocations()
+    print('allocations verified')
@@ -0,0 +1,460 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+import chess
+from Evaluate import EVALUATORS
+from Search.Search import tabular, principal_variation, SearchTimeout
+from Utilities.SearchUtils import Memo
+from Utilities.Bitboard import BitBoard, evaluation_for, move_to_chess, move_from_chess
+
+# Root splitting iterative deepening over TCP. A Coordinator listens for workers, which connect from other hosts or
+# run as local processes, and hands out one root move per job. Jobs of an iteration are searched with the best score
+# found so far as their bound, the results come back with the table entries along their principal variation and
+# those entries are broadcast to every worker so a move searched on one host orders the search of the others.
+#
+# Protocol: one JSON object per line in both directions.
+#   worker -> coordinator: hello {name}, heartbeat, result {job, score, pv, nodes, hints}, cancelled {job}
+#   coordinator -> worker: job {job, fen, history, move, depth, alpha, evaluator, backend}, cancel {job},
+#                          hints {backend, entries}, stop
+# A worker that closes its connection or misses heartbeats for timeout seconds is dropped and its job is given to
+# the next idle worker. Without any worker the coordinator searches the jobs itself.
+
+
+def send_message(connection, lock, message):
+    data = (json.dumps(message) + '\n').encode('utf-8')
+    with lock:
+        connection.sendall(data)
+
+
+def read_messages(connection):
+    'Yields the messages of a connection until it is closed'
+    try:
+        with connection.makefile('r', encoding='utf-8') as stream:
+            for line in stream:
+                yield json.loads(line)
+    except (OSError, ValueError):
+        return
+
+
+def evaluator_name(evaluation):
+    for name, function in EVALUATORS.items():
+        if function is evaluation:
+            return name
+    raise ValueError('Only evaluators registered in Evaluate.EVALUATORS can be sent to workers')
+
+
+def hint_move(uci: str, backend: str):
+    move = chess.Move.from_uci(uci)
+    return move_from_chess(move) if backend == 'bitboard' else move
+
+
+def store_hints(memo, entries, backend: str):
+    'Stores table entries received from another process'
+    for key, uci, depth, score, node_type, age in entries:
+        memo.store_key(key, hint_move(uci, backend), depth, score, node_type, age)
+
+
+def search_root_move(job, memo, stop=None, evaluation=None, deadline=None):
+    """
+    Searches one root move of a job message
+    :param job: The job message
+    :param memo: The table of the process, kept between jobs
+    :param stop: A threading.Event that aborts the search with SearchTimeout
+    :param evaluation: The evaluation function, looked up by the name in the job when None
+    :param deadline: The time.time() value after which the search raises SearchTimeout
+    :return: The score of the move for the side to move at the root, its principal variation as UCI strings, the
+    table entries along the variation and the nodes searched
+    """
+    board = chess.Board(job['fen'])
+    for uci in job['history']:
+        board.push_uci(uci)
+    evaluation = evaluation if evaluation is not None else EVALUATORS[job['evaluator']]
+    move = chess.Move.from_uci(job['move'])
+    if job['backend'] == 'bitboard':
+        board = BitBoard.from_board(board)
+        evaluation = evaluation_for(evaluation)
+        move = move_from_chess(move)
+
+    nodes = memo.nodes
+    color = board.turn
+    plies = len(board.move_stack)
+    board.push(move)
+    try:
+        score, _ = tabular(job['depth'] - 1, float('-inf'), -job['alpha'], board, color, evaluation, memo, deadline,
+                           stop)
+    finally:
+        while len(board.move_stack) > plies:
+            board.pop()
+
+    pv = principal_variation(board, memo, move, job['depth'])
+    hints = []
+    for pv_move in pv:
+        board.push(pv_move)
+        node = memo.lookup_key(memo.key(board))
+        if node is not None and node.move is not None:
+            uci = move_to_chess(node.move).uci() if isinstance(node.move, int) else node.move.uci()
+            hints.append((memo.key(board), uci, node.depth, node.score, node.node_type, node.age))
+    for _ in pv:
+        board.pop()
+
+    pv = [move_to_chess(pv_move).uci() if isinstance(pv_move, int) else pv_move.uci() for pv_move in pv]
+    return -score, pv, hints, memo.nodes - nodes
+
+
+def work(host: str, port: int, heartbeat: float = 1.0):
+    """
+    Worker process, searches the jobs of a coordinator until it disconnects or sends stop
+    :param host: The host of the coordinator
+    :param port: The port of the coordinator
+    :param heartbeat: Seconds between heartbeats, the search keeps running while they are sent
+    """
+    connection = socket.create_connection((host, port))
+    lock = threading.Lock()
+    jobs = queue.Queue()
+    # Keys, moves and killers differ between the backends, each gets its own table
+    memos = {'chess': Memo(), 'bitboard': Memo()}
+    closed = threading.Event()
+    cancelled = set()
+    current = {'job': None, 'stop': threading.Event()}
+
+    def beat():
+        while not closed.wait(heartbeat):
+            try:
+                send_message(connection, lock, {'type': 'heartbeat'})
+            except OSError:
+                closed.set()
+
+    def listen():
+        for message in read_messages(connection):
+            kind = message['type']
+            if kind == 'job':
+                jobs.put(message)
+            elif kind == 'cancel':
+                cancelled.add(message['job'])
+                if current['job'] == message['job']:
+                    current['stop'].set()
+            elif kind == 'hints':
+                store_hints(memos[message['backend']], message['entries'], message['backend'])
+            elif kind == 'stop':
+                break
+        closed.set()
+        current['stop'].set()
+        jobs.put(None)
+
+    threading.Thread(target=beat, daemon=True).start()
+    threading.Thread(target=listen, daemon=True).start()
+    send_message(connection, lock, {'type': 'hello', 'name': f'{socket.gethostname()}:{os.getpid()}'})
+
+    try:
+        while True:
+            job = jobs.get()
+            if job is None or closed.is_set():
+                break
+            current['stop'] = threading.Event()
+            current['job'] = job['job']
+            if job['job'] in cancelled:
+                current['stop'].set()
+            try:
+                score, pv, hints, nodes = search_root_move(job, memos[job['backend']], current['stop'])
+            except SearchTimeout:
+                send_message(connection, lock, {'type': 'cancelled', 'job': job['job']})
+                continue
+            send_message(connection, lock, {'type': 'result', 'job': job['job'], 'score': score, 'pv': pv,
+                                            'nodes': nodes, 'hints': hints})
+    except OSError:
+        pass
+    finally:
+        closed.set()
+        connection.close()
+
+
+class WorkerConnection:
+    __slots__ = ('connection', 'lock', 'name', 'last_seen', 'job')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+        self.name = None
+        self.last_seen = time.time()
+        self.job = None
+
+    def send(self, message):
+        try:
+            send_message(self.connection, self.lock, message)
+            return True
+        except OSError:
+            return False
+
+
+class Coordinator:
+    """
+    Distributes the root moves of every iteration of iterative deepening to the connected workers. Called like
+    iterativedeepening, so it can be the search of an Engine, and returns the same score and chess.Move. The
+    evaluation must be registered in Evaluate.EVALUATORS since workers look it up by name.
+
+    Example with local worker processes:
+        with Coordinator() as coordinator:
+            coordinator.spawn(4)
+            score, move = coordinator(6, 60, board, calculateRapid)
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, heartbeat: float = 1.0, timeout: float = 5.0,
+                 exchange: float = 1.0):
+        """
+        :param host: The interface to listen on, 0.0.0.0 for workers on other hosts
+        :param port: The port to listen on, 0 picks a free one, see address
+        :param heartbeat: Seconds between worker heartbeats
+        :param timeout: Seconds without a message after which a worker counts as failed
+        :param exchange: Seconds between broadcasts of the table entries returned by the workers
+        """
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+        self.exchange = exchange
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+        self.events = queue.Queue()
+        self.workers = []
+        self.processes = []
+        self.job_ids = itertools.count()
+        self.without_workers = time.time()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            worker = WorkerConnection(connection)
+            threading.Thread(target=self._listen, args=(worker,), daemon=True).start()
+
+    def _listen(self, worker):
+        for message in read_messages(worker.connection):
+            self.events.put((worker, message))
+        self.events.put((worker, {'type': 'closed'}))
+
+    def spawn(self, count: int):
+        'Starts count worker processes on this host'
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        host, port = self.address
+        for _ in range(count):
+            self.processes.append(subprocess.Popen([sys.executable, '-m', 'Search.Distributed', 'worker', '--connect',
+                                                    f'{host}:{port}', '--heartbeat', str(self.heartbeat)], cwd=root))
+
+    def wait_for_workers(self, count: int, timeout: float = 30.0):
+        'Handles connection events until count workers are ready, returns the number of ready workers'
+        end = time.time() + timeout
+        while len(self.workers) < count and time.time() < end:
+            self._poll(None, min(self.heartbeat, max(end - time.time(), 0.0)))
+        return len(self.workers)
+
+    def close(self):
+        for worker in self.workers:
+            worker.send({'type': 'stop'})
+            worker.connection.close()
+        self.workers = []
+        self.server.close()
+        for process in self.processes:
+            try:
+                process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _drop(self, worker, iteration):
+        if worker in self.workers:
+            self.workers.remove(worker)
+            if not self.workers:
+                self.without_workers = time.time()
+        worker.connection.close()
+        # Work lost with the worker goes back to the front of the queue
+        if iteration is not None and worker.job in iteration['running']:
+            iteration['pending'].appendleft(iteration['running'].pop(worker.job))
+        worker.job = None
+
+    def _poll(self, iteration, wait: float):
+        'Handles the next event, then drops the workers that missed their heartbeats'
+        try:
+            worker, message = self.events.get(timeout=wait)
+        except queue.Empty:
+            worker, message = None, None
+
+        if worker is not None:
+            worker.last_seen = time.time()
+            kind = message['type']
+            if kind == 'hello':
+                worker.name = message['name']
+                self.workers.append(worker)
+            elif kind == 'closed':
+                self._drop(worker, iteration)
+            elif kind in ('result', 'cancelled'):
+                move = iteration['running'].pop(message['job'], None) if iteration is not None else None
+                worker.job = None
+                if kind == 'result' and move is not None:
+                    iteration['scores'][move] = message['score']
+                    iteration['pvs'][move] = message['pv']
+                    iteration['nodes'] += message['nodes']
+                    iteration['hints'].extend(message['hints'])
+
+        now = time.time()
+        for worker in list(self.workers):
+            if now - worker.last_seen > self.timeout:
+                self._drop(worker, iteration)
+
+    def _iteration(self, depth, moves, base, memo, evaluation, deadline, stop):
+        """
+        Searches every root move to depth on the workers
+        :return: The iteration state with the scores by move, None when the deadline passed or stop was set
+        """
+        iteration = {'pending': deque(moves), 'running': {}, 'scores': {}, 'pvs': {}, 'nodes': 0, 'hints': []}
+        last_exchange = time.time()
+        while len(iteration['scores']) < len(moves):
+            if (deadline is not None and time.time() > deadline) or (stop is not None and stop.is_set()):
+                for worker in self.workers:
+                    if worker.job in iteration['running']:
+                        worker.send({'type': 'cancel', 'job': worker.job})
+                return None
+
+            best = max(iteration['scores'].values(), default=float('-inf'))
+            for worker in self.workers:
+                if worker.job is None and iteration['pending']:
+                    move = iteration['pending'].popleft()
+                    job = dict(base, type='job', job=next(self.job_ids), move=move.uci(), depth=depth, alpha=best)
+                    iteration['running'][job['job']] = move
+                    worker.job = job['job']
+                    if not worker.send(job):
+                        self._drop(worker, iteration)
+
+            if not self.workers and iteration['pending'] and time.time() - self.without_workers > self.timeout:
+                # Nobody to hand the work to, search it here
+                move = iteration['pending'].popleft()
+                job = dict(base, move=move.uci(), depth=depth, alpha=best)
+                score, pv, hints, nodes = search_root_move(job, memo, stop, evaluation, deadline)
+                iteration['scores'][move] = score
+                iteration['pvs'][move] = pv
+                iteration['nodes'] += nodes
+                continue
+
+            self._poll(iteration, self.heartbeat)
+
+            if iteration['hints'] and time.time() - last_exchange >= self.exchange:
+                store_hints(memo, iteration['hints'], base['backend'])
+                for worker in self.workers:
+                    worker.send({'type': 'hints', 'backend': base['backend'], 'entries': iteration['hints']})
+                iteration['hints'] = []
+                last_exchange = time.time()
+
+        store_hints(memo, iteration['hints'], base['backend'])
+        return iteration
+
+    def __call__(self, depth: int, timeout: float, board: chess.Board, evaluation, memo=None, backend='chess',
+                 multipv_count: int = 1, time_manager=None, stop=None, callback=None):
+        """
+        Same parameters and result as iterativedeepening, multipv_count must be 1
+        :return: The score for the best move and the best move
+        """
+        if multipv_count != 1:
+            raise ValueError('The distributed search only finds the best move')
+        if backend not in ('chess', 'bitboard'):
+            raise ValueError(f'Unknown search backend: {backend}')
+        if memo is None:
+            memo = Memo()
+
+        base = {'fen': board.root().fen(), 'history': [move.uci() for move in board.move_stack],
+                'evaluator': evaluator_name(evaluation), 'backend': backend}
+        moves = list(board.legal_moves)
+        if not moves:
+            return evaluation(board, board.turn), None
+
+        start = time.time()
+        return_value = None
+        for i in range(1, depth + 1):
+            iteration_start = time.time()
+            # Like iterativedeepening the first iteration always finishes
+            if i == 1:
+                deadline = None
+            elif time_manager is not None:
+                deadline = time_manager.start + time_manager.hard
+            else:
+                deadline = start + timeout
+            try:
+                iteration = self._iteration(i, moves, base, memo, evaluation, deadline, stop if i > 1 else None)
+            except SearchTimeout:
+                iteration = None
+            if iteration is None:
+                break
+
+            scores = iteration['scores']
+            moves.sort(key=lambda move: scores[move], reverse=True)
+            return_value = scores[moves[0]], moves[0]
+
+            if callback is not None:
+                elapsed = time.time() - start
+                callback({'depth': i, 'score': return_value[0],
+                          'pv': [chess.Move.from_uci(uci) for uci in iteration['pvs'][moves[0]]],
+                          'nodes': iteration['nodes'], 'nps': iteration['nodes'] / elapsed if elapsed > 0 else 0.0,
+                          'time': elapsed})
+
+            if stop is not None and stop.is_set():
+                break
+            if time_manager is not None:
+                time_manager.update(return_value[0], return_value[1], time.time() - iteration_start)
+                if time_manager.should_stop():
+                    break
+                continue
+            current = time.time()
+            if current - start >= timeout or current + (current - start) - start >= timeout:
+                break
+
+        return return_value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Distributed root splitting search')
+    commands = parser.add_subparsers(dest='command', required=True)
+    worker_parser = commands.add_parser('worker', help='Search the jobs of a coordinator')
+    worker_parser.add_argument('--connect', required=True, help='host:port of the coordinator')
+    worker_parser.add_argument('--heartbeat', type=float, default=1.0)
+    analyse_parser = commands.add_parser('analyse', help='Search a position with connected and local workers')
+    analyse_parser.add_argument('--fen', default=chess.STARTING_FEN)
+    analyse_parser.add_argument('--depth', type=int, default=5)
+    analyse_parser.add_argument('--timeout', type=float, default=60.0)
+    analyse_parser.add_argument('--evaluator', choices=sorted(EVALUATORS), default='calculateRapid')
+    analyse_parser.add_argument('--backend', choices=('chess', 'bitboard'), default='chess')
+    analyse_parser.add_argument('--host', default='127.0.0.1')
+    analyse_parser.add_argument('--port', type=int, default=0)
+    analyse_parser.add_argument('--local-workers', type=int, default=os.cpu_count())
+    analyse_parser.add_argument('--wait', type=int, default=None, help='Workers to wait for before searching')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        host, port = args.connect.rsplit(':', 1)
+        work(host, int(port), args.heartbeat)
+    else:
+        with Coordinator(args.host, args.port) as coordinator:
+            print(f'Listening on {coordinator.address[0]}:{coordinator.address[1]}', file=sys.stderr)
+            coordinator.spawn(args.local_workers)
+            coordinator.wait_for_workers(args.wait if args.wait is not None else args.local_workers)
+            score, move = coordinator(args.depth, args.timeout, chess.Board(args.fen), EVALUATORS[args.evaluator],
+                                      backend=args.backend, callback=lambda update: print(
+                                          f'depth {update["depth"]} score {update["score"]:.3f} nodes '
+                                          f'{update["nodes"]} nps {update["nps"]:.0f} pv '
+                                          f'{" ".join(move.uci() for move in update["pv"])}'))
+            print(f'bestmove {move.uci()} score {score:.3f}')
@@ -0,0 +1,301 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import random
+import time
+import chess
+from Search.MovePicker import MovePicker, capture_score, is_quiet
+from Utilities.SearchUtils import Memo, NodeContext
+
+# Breaks ties between equally scored moves so the engine does not always play the same game. One generator is shared
+# by all searchers, seed() makes the choices repeatable.
+RNG = random.Random()
+
+# Late move reductions: quiet moves searched after this many moves, at this remaining depth or more, are searched
+# this many plies shallower first
+REDUCTION_MOVES = 3
+REDUCTION_DEPTH = 3
+REDUCTION = 1
+
+
+def seed(value):
+    'Seeds the tie-breaking random number generator of the searchers'
+    RNG.seed(value)
+
+
+class SearchTimeout(Exception):
+    'Raised inside the search when its deadline has passed or it was stopped, the board keeps the current line'
+
+
+class Features:
+    """
+    The switches of FeatureSearch. Every feature can be turned on and off independently of the others:
+
+    alpha_beta: cut off a node once a move scores past the window, see https://www.chessprogramming.org/Alpha-Beta
+    table: look up and store nodes in the memo table, see https://www.chessprogramming.org/Transposition_Table
+    ordering: play the hash move, winning captures, killers and history ordered quiets first, see Search.MovePicker.
+    Without it moves are searched in generation order.
+    quiescence: extend the leaves with captures until the position is quiet, see
+    https://www.chessprogramming.org/Quiescence_Search
+    reductions: search late quiet moves shallower and only search them again at full depth when they raise alpha, see
+    https://www.chessprogramming.org/Late_Move_Reductions
+    iterative_deepening: let iterativedeepening search every depth up to the target instead of only the target
+    """
+    NAMES = ('alpha_beta', 'table', 'ordering', 'quiescence', 'reductions', 'iterative_deepening')
+    __slots__ = NAMES
+
+    def __init__(self, alpha_beta=True, table=True, ordering=True, quiescence=False, reductions=False,
+                 iterative_deepening=True):
+        self.alpha_beta = alpha_beta
+        self.table = table
+        self.ordering = ordering
+        self.quiescence = quiescence
+        self.reductions = reductions
+        self.iterative_deepening = iterative_deepening
+
+    def replace(self, **changes):
+        'A copy with the given features switched'
+        values = {name: getattr(self, name) for name in self.NAMES}
+        for name in changes:
+            if name not in values:
+                raise ValueError(f'Unknown search feature {name}, expected one of {", ".join(self.NAMES)}')
+        values.update(changes)
+        return Features(**values)
+
+    def enabled(self):
+        'The names of the features that are switched on'
+        return [name for name in self.NAMES if getattr(self, name)]
+
+    def __eq__(self, other):
+        return isinstance(other, Features) and self.enabled() == other.enabled()
+
+    def __hash__(self):
+        return hash(tuple(self.enabled()))
+
+    def __repr__(self):
+        return f'Features({", ".join(f"{name}={getattr(self, name)}" for name in self.NAMES)})'
+
+
+# The feature sets of the searchers in Search.Search
+NEGAMAX = Features(alpha_beta=False, table=False, ordering=False, iterative_deepening=False)
+ALPHA_BETA = Features(table=False, ordering=False, iterative_deepening=False)
+TABULAR = Features(iterative_deepening=False)
+ITERATIVE = Features()
+ALL = Features(quiescence=True, reductions=True)
+
+
+def capture_moves(board):
+    'The legal captures and promotions of the position, most valuable victim first'
+    if isinstance(board, chess.Board):
+        moves = [move for move in board.generate_legal_moves() if move.promotion or board.is_capture(move)]
+    else:
+        in_check = board.is_check()
+        pinned = 0 if in_check else board.pinned_mask(board.turn)
+        moves = [move for move in board.generate_pseudo_legal([], captures=True, quiets=False)
+                 if board.is_legal(move, in_check, pinned)]
+    moves.sort(key=lambda move: capture_score(board, move), reverse=True)
+    return moves
+
+
+class FeatureSearch:
+    """
+    Negamax search with every enhancement behind a switch, see Features. negamax, alphaBeta and tabular of
+    Search.Search are this search with a fixed feature set and iterativedeepening drives it over the depths, so the
+    contribution of a single feature can be measured by switching it off and leaving everything else as it is, see
+    Ablation.py.
+
+    The evaluation is called as evaluation(board, color, context=context, alpha=alpha, beta=beta) with the color of
+    the side to move at the root, the Utilities.SearchUtils.NodeContext of the node and the window of the node. Nodes
+    are counted by memo.nodes, the table, killer and history tables of the memo are only used by the features that
+    need them.
+
+    The search itself is the generator node, which yields a (board, color, context, alpha, beta) request for every
+    evaluation and expects the score to be sent back. negamax answers the requests with the evaluation as they come,
+    Search.Lockstep collects the requests of many searches and answers them with one batch.
+    """
+    def __init__(self, features: Features, evaluation, memo=None, deadline=None, stop=None):
+        """
+        :param features: The features to use
+        :param evaluation: The evaluation function to execute on the board
+        :param memo: The table object, Defaults to None to automatically generate an empty table
+        :param deadline: The time.time() value after which the search raises SearchTimeout, None to never stop
+        :param stop: A threading.Event, the search raises SearchTimeout once it is set
+        """
+        self.features = features
+        self.evaluation = evaluation
+        self.memo = memo if memo is not None else Memo()
+        self.deadline = deadline
+        self.stop = stop
+
+    def enter(self):
+        'Counts a node and raises SearchTimeout when the search has to end'
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
+        self.memo.nodes += 1
+
+    def negamax(self, depth: int, alpha: float, beta: float, board, color):
+        """
+        Searches a node, see node for the parameters
+        :return: The score of the best move and the best move
+        """
+        return self.run(self.node(depth, alpha, beta, board, color))
+
+    def quiesce(self, alpha: float, beta: float, board, color, context):
+        'Searches the captures of a leaf, see quiesce_node for the parameters, returns the score of the leaf'
+        return self.run(self.quiesce_node(alpha, beta, board, color, context))
+
+    def run(self, search):
+        'Drives a node or quiesce_node generator, answering every request with the evaluation'
+        evaluation = self.evaluation
+        try:
+            board, color, context, alpha, beta = next(search)
+            while True:
+                board, color, context, alpha, beta = search.send(
+                    evaluation(board, color, context=context, alpha=alpha, beta=beta))
+        except StopIteration as done:
+            return done.value
+
+    def node(self, depth: int, alpha: float, beta: float, board, color):
+        """
+        Searches a node, a generator that yields the evaluation requests of the search
+        :param depth: The remaining depth
+        :param alpha: The maximum score of the maximizing player
+        :param beta: The minimum score of the minimizing player
+        :param board: The board object used to make and unmake moves, either a chess.Board or a
+        Utilities.Bitboard.BitBoard
+        :param color: The color of the moving player at the root
+        :return: The score of the best move and the best move
+        """
+        features = self.features
+        memo = self.memo
+        self.enter()
+
+        selected_move = None
+        maximum = float('-inf')
+        new_alpha = alpha
+        new_beta = beta
+
+        # Everything this node computes about the position is done once and shared with the evaluation
+        node = None
+        if features.table:
+            context = NodeContext(board, memo.key(board))
+            node = memo.lookup_key(context.key)
+            if node is not None and node.depth >= depth:
+                if node.node_type == 'EXACT':
+                    return node.score, node.move
+                elif node.node_type == 'LOWERBOUND':
+                    new_alpha = max(new_alpha, node.score)
+                elif node.node_type == 'UPPERBOUND':
+                    new_beta = min(new_beta, node.score)
+
+                if new_alpha >= new_beta:
+                    return node.score, node.move
+        else:
+            context = NodeContext(board, None)
+
+        # When depth limit is reached or terminal node is reached return evaluation of node
+        if depth == 0:
+            if features.quiescence:
+                return (yield from self.quiesce_node(new_alpha, new_beta, board, color, context)), None
+            return (yield board, color, context, new_alpha, new_beta), None
+
+        if context.draw_outcome() is not None:
+            return (yield board, color, context, new_alpha, new_beta), None
+
+        if features.ordering:
+            # Moves are generated in stages, hash move first, so a cutoff on an early move skips generating the rest
+            killers = memo.killers.get(depth, ())
+            picker = MovePicker(board, node.move if node is not None else None, killers, memo.history)
+            moves = picker
+        else:
+            picker = None
+            moves = board.legal_moves
+
+        searched = 0
+        for move in moves:
+            quiet = picker.quiet if picker is not None else is_quiet(board, move)
+            board.push(move)
+            if features.reductions and searched >= REDUCTION_MOVES and depth >= REDUCTION_DEPTH and quiet \
+                    and not context.is_check() and not board.is_check():
+                score, _ = yield from self.node(depth - 1 - REDUCTION, -new_beta, -new_alpha, board, color)
+                score = -score
+                # A reduced move that looks better than the best so far is searched again at full depth
+                if score > new_alpha:
+                    score, _ = yield from self.node(depth - 1, -new_beta, -new_alpha, board, color)
+                    score = -score
+            else:
+                score, _ = yield from self.node(depth - 1, -new_beta, -new_alpha, board, color)
+                score = -score
+            board.pop()
+            searched += 1
+
+            if score > maximum:
+                maximum = score
+                selected_move = move
+            elif score == maximum:
+                if RNG.random() > 0.75:
+                    maximum = score
+                    selected_move = move
+
+            if not features.alpha_beta:
+                continue
+            new_alpha = max(new_alpha, maximum)
+
+            if new_alpha >= beta:
+                # Quiet moves that refute a position are tried early in its siblings and wherever they show up again
+                if picker is not None and quiet:
+                    if move not in killers:
+                        memo.killers[depth] = (move,) + tuple(killers[:1])
+                    memo.history[move] = memo.history.get(move, 0) + depth * depth
+                break
+
+        # No legal moves, the evaluation scores the checkmate or stalemate
+        if selected_move is None:
+            return (yield board, color, context, new_alpha, new_beta), None
+
+        if features.table:
+            # Store best move in the memo table
+            if maximum <= alpha:
+                node_type = 'UPPERBOUND'
+            elif maximum >= new_beta:
+                node_type = 'LOWERBOUND'
+            else:
+                node_type = 'EXACT'
+            memo.store_key(context.key, selected_move, depth, maximum, node_type, board.halfmove_clock)
+
+        return maximum, selected_move
+
+    def quiesce_node(self, alpha: float, beta: float, board, color, context):
+        """
+        Searches the captures of a leaf until none are left. The side to move may stand pat on the evaluation
+        instead of capturing, checks are not extended. Standing pat is a cutoff in itself, so the captures are searched
+        with alpha-beta whether or not alpha_beta is switched on, without it the capture trees grow exponentially. The
+        leaf is evaluated for color like every other leaf and the color alternates below it, so the stand pat scores
+        of the capture sequence are all seen from the same side as the score of the leaf.
+        :param alpha: The maximum score of the maximizing player
+        :param beta: The minimum score of the minimizing player
+        :param board: The board of the leaf
+        :param color: The color the leaf is evaluated for
+        :param context: The NodeContext of the leaf
+        :return: The score of the leaf
+        """
+        maximum = yield board, color, context, alpha, beta
+        new_alpha = max(alpha, maximum)
+        if new_alpha >= beta:
+            return maximum
+
+        for move in capture_moves(board):
+            self.enter()
+            board.push(move)
+            score = -(yield from self.quiesce_node(-beta, -new_alpha, board, not color, NodeContext(board, None)))
+            board.pop()
+
+            if score > maximum:
+                maximum = score
+                new_alpha = max(new_alpha, maximum)
+                if new_alpha >= beta:
+                    break
+        return maximum
@@ -0,0 +1,161 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import random
+import time
+import chess
+from Evaluate.batch import evaluateBatch
+from Search.Framework import FeatureSearch, Features, ITERATIVE
+from Search.Search import iterativedeepening
+from Utilities.Bitboard import BitBoard, evaluation_for, move_to_chess
+from Utilities.SearchUtils import Memo
+
+
+class Lockstep:
+    """
+    Searches many independent positions at once, for a service playing many games on one core. Every search is the
+    generator Search.Framework.FeatureSearch.node, which suspends at each evaluation and yields the position. The
+    scheduler advances all searches in lockstep until each has yielded one, scores them with a single call of
+    Evaluate.batch.evaluateBatch and sends every search its score. An evaluator with a batch attribute, like the
+    network of Evaluate.nnue, then runs its NumPy code once per batch instead of once per leaf. Every game is
+    evaluated under its own fixed column of the batch while it runs, finished games leave their column unused, so the
+    network can update the accumulators of each game incrementally.
+
+    A search is iterativedeepening with its own memo, the same features, move ordering and tie-breaks. Positions are
+    evaluated without the node context and the window, so scores equal iterativedeepening for evaluators that ignore
+    both.
+    """
+    def __init__(self, evaluation, backend: str = 'bitboard', features: Features = ITERATIVE):
+        """
+        :param evaluation: The evaluation function, its batch attribute is used when it has one
+        :param backend: The board searched, 'chess' for chess.Board copies and 'bitboard' for BitBoard copies
+        :param features: The Search.Framework.Features of every search
+        """
+        if backend not in ('chess', 'bitboard'):
+            raise ValueError(f'Unknown search backend: {backend}')
+        self.evaluation = evaluation_for(evaluation) if backend == 'bitboard' else evaluation
+        self.backend = backend
+        self.features = features
+        self.nodes = 0
+        self.leaves = 0
+        self.batches = 0
+
+    def __call__(self, boards, depth: int, deadline=None, stop=None):
+        """
+        Searches every board to depth
+        :param boards: The chess.Board positions, left unchanged
+        :param depth: The maximum depth of every search
+        :param deadline: The time.time() value after which the remaining searches are abandoned, None to never stop
+        :param stop: A threading.Event, the remaining searches are abandoned once it is set
+        :return: A (score, chess.Move) tuple per board, from the deepest finished iteration of its search. A search
+        abandoned before finishing its first iteration returns (None, None).
+        """
+        self.nodes = self.leaves = self.batches = 0
+        results = [(None, None)] * len(boards)
+        memos = [Memo() for _ in boards]
+        searches = {}
+        pending = {}
+        for index, board in enumerate(boards):
+            search_board = BitBoard.from_board(board) if self.backend == 'bitboard' else board.copy()
+            searches[index] = self.game(index, search_board, board.turn, depth, memos[index], results)
+            self.advance(index, searches, pending, None)
+
+        try:
+            while pending:
+                if (deadline is not None and time.time() > deadline) or (stop is not None and stop.is_set()):
+                    break
+                # The index of a game is its column, so it keeps it when games before it finish
+                columns = sorted(pending)
+                requests = [pending[index] for index in columns]
+                scores = evaluateBatch(self.evaluation, [request[0] for request in requests],
+                                       [request[1] for request in requests], columns)
+                self.batches += 1
+                self.leaves += len(columns)
+                for index, score in zip(columns, scores):
+                    self.advance(index, searches, pending, score)
+        finally:
+            for search in searches.values():
+                search.close()
+            self.nodes = sum(memo.nodes for memo in memos)
+        return results
+
+    @staticmethod
+    def advance(index, searches, pending, score):
+        'Resumes a search with the score of its request until it yields the next request or finishes'
+        try:
+            pending[index] = searches[index].send(score)
+        except StopIteration:
+            pending.pop(index, None)
+            del searches[index]
+
+    def game(self, index: int, board, color, depth: int, memo, results):
+        'Iterative deepening of one position, each finished iteration is written to results[index]'
+        first = 1 if self.features.iterative_deepening else depth
+        for iteration in range(first, depth + 1):
+            search = FeatureSearch(self.features, None, memo)
+            score, move = yield from search.node(iteration, float('-inf'), float('inf'), board, color)
+            results[index] = (score, move_to_chess(move) if isinstance(move, int) else move)
+
+
+def random_positions(count: int, plies: int = 16, seed: int = 2022):
+    'Positions of count random games after plies moves, as the games of a service would be spread out'
+    rand = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rand.choice(moves))
+        if board.outcome() is None:
+            boards.append(board)
+    return boards
+
+
+def benchmark(games: int = 32, depth: int = 3, evaluation=None, backend: str = 'bitboard'):
+    """
+    Searches the positions of games random games one after the other with iterativedeepening and all at once with
+    Lockstep, checks that both find the same scores and reports the positions per second of both
+    :param games: The number of games searched at once
+    :param depth: The depth of every search
+    :param evaluation: The evaluation function, nnueEval by default
+    :param backend: The search backend of both
+    """
+    if evaluation is None:
+        from Evaluate import nnueEval as evaluation
+    boards = random_positions(games)
+
+    nodes = 0
+    start = time.perf_counter()
+    expected = []
+    for board in boards:
+        memo = Memo()
+        expected.append(iterativedeepening(depth, float('inf'), board, evaluation, memo, backend=backend)[0])
+        nodes += memo.nodes
+    sequential = time.perf_counter() - start
+
+    lockstep = Lockstep(evaluation, backend)
+    start = time.perf_counter()
+    results = lockstep(boards, depth)
+    batched = time.perf_counter() - start
+
+    for board, (score, _), reference in zip(boards, results, expected):
+        if score != reference:
+            raise AssertionError(f'Lockstep scored {board.fen()} {score}, iterativedeepening {reference}')
+    print(f'{games} games at depth {depth}, {lockstep.leaves} leaves in {lockstep.batches} batches '
+          f'({lockstep.leaves / lockstep.batches:.1f} per batch)')
+    print(f'  one at a time: {nodes / sequential:>8.0f} nodes/sec ({sequential:.2f}s)')
+    print(f'       lockstep: {lockstep.nodes / batched:>8.0f} nodes/sec ({batched:.2f}s)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare searching many games at once with searching them in turn')
+    parser.add_argument('--games', type=int, default=32)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--backend', choices=('chess', 'bitboard'), default='bitboard')
+    args = parser.parse_args()
+
+    benchmark(args.games, args.depth, backend=args.backend)
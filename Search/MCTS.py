@@ -0,0 +1,165 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import math
+import time
+import chess
+from Evaluate.batch import evaluateBatch
+from Utilities.Node import Node
+
+
+class MCTS:
+    """
+    Monte Carlo tree search with the PUCT selection rule, see https://www.chessprogramming.org/UCT and
+    https://www.chessprogramming.org/Christopher_D._Rosin#PUCT. Instead of random playouts the leaves are scored by
+    the regular evaluation functions, mapped onto [-1, 1] with tanh. Each iteration selects a batch of leaves, using
+    virtual loss to spread the selections over different branches, and evaluates them together through
+    Evaluate.batch.evaluateBatch. The tree is kept between calls and the subtree of the new position is reused when
+    the board continues the game that was searched before.
+
+    Instances are called like iterativedeepening so they can be used as Engine.search.
+    """
+    def __init__(self, batch_size: int = 8, exploration: float = 1.5, scale: float = 4.0):
+        """
+        :param batch_size: The number of leaves selected before they are evaluated together
+        :param exploration: The PUCT exploration constant
+        :param scale: The evaluation score that maps to a value of tanh(1)
+        """
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.scale = scale
+        self.root = None
+        self.root_stack = []
+        self.start_fen = None
+        self.playouts = 0
+
+    def __call__(self, depth: int, timeout: float, board: chess.Board, evaluation, memo=None, backend='chess',
+                 time_manager=None, stop=None, callback=None):
+        """
+        :param depth: The maximum depth of the tree below the root
+        :param timeout: The time in seconds to search
+        :param board: The board to search, restored before returning
+        :param evaluation: The evaluation function scoring the leaves
+        :param memo: Unused, accepted for compatibility with iterativedeepening
+        :param backend: Only 'chess' is supported
+        :param time_manager: A Search.TimeManager.TimeManager, its soft limit replaces timeout when given
+        :param stop: A threading.Event that ends the search early, the root is always expanded first
+        :param callback: Called once at the end with the same dict as the iterativedeepening callback, the depth is
+        the one of the principal variation and the nodes are the playouts
+        :return: The score of the most visited move and the move
+        """
+        if backend != 'chess':
+            raise ValueError('MCTS only searches chess.Board positions')
+
+        if time_manager is not None:
+            timeout = time_manager.soft_limit()
+
+        root = self.reuse(board)
+        start = time.time()
+        self.playouts = 0
+        while (time.time() - start < timeout and not (stop is not None and stop.is_set())) or not root.children:
+            if not self.playout_batch(root, board, evaluation, depth):
+                break
+
+        if not root.children:
+            return evaluation(board, board.turn), None
+
+        best = max(root.children, key=lambda child: child.visits)
+        value = min(max(best.value(), -0.999), 0.999)
+        score = self.scale * math.atanh(value)
+
+        if callback is not None:
+            pv = []
+            node = best
+            while node is not None and node.visits > 0:
+                pv.append(node.move)
+                node = max(node.children, key=lambda child: child.visits) if node.children else None
+            elapsed = time.time() - start
+            callback({'depth': len(pv), 'score': score, 'pv': pv, 'nodes': self.playouts,
+                      'nps': self.playouts / elapsed if elapsed > 0 else 0.0, 'time': elapsed})
+
+        return score, best.move
+
+    def reuse(self, board: chess.Board):
+        'Returns the tree node of the board position, reusing the previous tree when the game continued from it'
+        stack = board.move_stack
+        start_fen = board.root().fen()
+        if self.root is not None and start_fen == self.start_fen and stack[:len(self.root_stack)] == self.root_stack:
+            node = self.root
+            for move in stack[len(self.root_stack):]:
+                node = node.child(move)
+                if node is None:
+                    break
+            if node is not None:
+                node.parent = None
+                self.root = node
+                self.root_stack = list(stack)
+                return node
+
+        self.root = Node(None, 0.0)
+        self.root_stack = list(stack)
+        self.start_fen = start_fen
+        return self.root
+
+    def select(self, node: Node):
+        'PUCT child selection, values are from the point of view of the side to move at node'
+        sqrt_total = math.sqrt(node.visits + node.virtual_loss + 1)
+        best = None
+        best_score = float('-inf')
+        for child in node.children:
+            score = child.value() + self.exploration * child.prior * sqrt_total / (1 + child.visits + child.virtual_loss)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def playout_batch(self, root: Node, board: chess.Board, evaluation, max_depth: int):
+        """
+        Selects up to batch_size leaves, expands them, evaluates them in one batch and backs the values up
+        :return: False when the tree cannot grow any further
+        """
+        pending = []
+        boards = []
+        for _ in range(self.batch_size):
+            node = root
+            pushed = 0
+            while node.children and pushed < max_depth:
+                node = self.select(node)
+                node.virtual_loss += 1
+                board.push(node.move)
+                pushed += 1
+
+            # Values are from the point of view of the player who made the move leading to the node
+            outcome = board.outcome()
+            if outcome is not None:
+                pending.append((node, 0.0 if outcome.winner is None else 1.0))
+            else:
+                if pushed < max_depth and not node.children:
+                    moves = list(board.legal_moves)
+                    prior = 1.0 / len(moves)
+                    node.children = [Node(move, 0.0, prior, node) for move in moves]
+                pending.append((node, None))
+                boards.append(board.copy(stack=1))
+
+            for _ in range(pushed):
+                board.pop()
+
+        scores = iter(evaluateBatch(evaluation, boards, [leaf.turn for leaf in boards]))
+        grew = False
+        for node, value in pending:
+            if value is None:
+                value = -math.tanh(next(scores) / self.scale)
+                grew = True
+            self.backup(node, value)
+        self.playouts += len(pending)
+        return grew or root.visits < 2
+
+    def backup(self, node: Node, value: float):
+        while node is not None:
+            if node.parent is not None:
+                node.virtual_loss -= 1
+            node.visits += 1
+            node.score += value
+            value = -value
+            node = node.parent
@@ -0,0 +1,156 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import chess
+
+# Piece values used to order captures, indexed by piece type
+PIECE_VALUES = (0, 1, 3, 3, 5, 9, 100)
+
+# Stages of the picker in the order they are played
+HASH, GOOD_CAPTURES, KILLERS, QUIETS, BAD_CAPTURES, DONE = range(6)
+
+
+def capture_score(board, move):
+    'Most valuable victim first, least valuable attacker second. En passant and promotions count as pawn takes'
+    to_square = move.to_square if isinstance(move, chess.Move) else (move >> 6) & 63
+    from_square = move.from_square if isinstance(move, chess.Move) else move & 63
+    victim = board.piece_type_at(to_square) or chess.PAWN
+    attacker = board.piece_type_at(from_square)
+    return PIECE_VALUES[victim] * 8 - PIECE_VALUES[attacker]
+
+
+def is_quiet(board, move):
+    'True when move neither captures nor promotes, for chess.Board and BitBoard'
+    if isinstance(move, chess.Move):
+        return not move.promotion and not board.is_capture(move)
+    return not move >> 12 and not board.piece_type_at((move >> 6) & 63) and \
+        not ((move >> 6) & 63 == board.ep_square and board.piece_type_at(move & 63) == chess.PAWN)
+
+
+class MovePicker:
+    """
+    Staged move generation for one node of the search, see https://www.chessprogramming.org/Move_Generation. The hash
+    move is played before anything is generated, then captures that win material or hit an undefended piece in most
+    valuable victim / least valuable attacker order, then the killer moves, then the quiet moves ordered by the
+    history table and finally the losing captures. A stage is only generated once the previous one is exhausted and
+    legality is checked one move at a time, so a node that cuts off on an early move generates almost nothing.
+
+    Works with chess.Board and Utilities.Bitboard.BitBoard. After a move has been yielded, quiet tells whether it was
+    a quiet move, which is what the killer and history tables are updated with.
+    """
+    __slots__ = ('board', 'hash_move', 'killers', 'history', 'stage', 'quiet', '_played', '_deferred', '_in_check',
+                 '_pinned')
+
+    def __init__(self, board, hash_move=None, killers=(), history=None):
+        """
+        :param board: The board of the node
+        :param hash_move: The best move stored in the memo table for the position, if any
+        :param killers: Quiet moves that caused a cutoff at the same depth in sibling nodes
+        :param history: Dict of quiet move to cutoff score, see Utilities.SearchUtils.Memo
+        """
+        self.board = board
+        self.hash_move = hash_move
+        self.killers = killers
+        self.history = history if history is not None else {}
+        self.stage = HASH
+        self.quiet = False
+        self._played = set()
+        self._deferred = []
+        self._in_check = None
+        self._pinned = None
+
+    def _legal(self, move):
+        board = self.board
+        if isinstance(board, chess.Board):
+            return board.is_legal(move)
+        if self._in_check is None:
+            self._in_check = board.is_check()
+            self._pinned = 0 if self._in_check else board.pinned_mask(board.turn)
+        return board.is_legal(move, self._in_check, self._pinned)
+
+    def _captures(self):
+        board = self.board
+        if isinstance(board, chess.Board):
+            moves = list(board.generate_pseudo_legal_captures())
+            # Promotions are generated with the captures like in BitBoard.generate_pseudo_legal
+            promoting = board.pawns & board.occupied_co[board.turn] & \
+                (chess.BB_RANK_7 if board.turn else chess.BB_RANK_2)
+            if promoting:
+                empty = (chess.BB_RANK_8 if board.turn else chess.BB_RANK_1) & ~board.occupied
+                moves.extend(board.generate_pseudo_legal_moves(promoting, empty))
+            return moves
+        return board.generate_pseudo_legal([], captures=True, quiets=False)
+
+    def _quiets(self):
+        board = self.board
+        if isinstance(board, chess.Board):
+            return [move for move in board.generate_pseudo_legal_moves()
+                    if not move.promotion and not board.is_capture(move)]
+        return board.generate_pseudo_legal([], captures=False, quiets=True)
+
+    def _capture_score(self, move):
+        return capture_score(self.board, move)
+
+    def _winning(self, move):
+        board = self.board
+        to_square = move.to_square if isinstance(move, chess.Move) else (move >> 6) & 63
+        from_square = move.from_square if isinstance(move, chess.Move) else move & 63
+        victim = board.piece_type_at(to_square) or chess.PAWN
+        if PIECE_VALUES[victim] >= PIECE_VALUES[board.piece_type_at(from_square)]:
+            return True
+        return not board.is_attacked_by(not board.turn, to_square)
+
+    def __iter__(self):
+        board = self.board
+        played = self._played
+
+        # Hash move, checked against the position because the table is only keyed by a hash
+        self.stage = HASH
+        move = self.hash_move
+        if move is not None and board.is_pseudo_legal(move) and self._legal(move):
+            played.add(move)
+            self.quiet = is_quiet(board, move)
+            yield move
+
+        self.stage = GOOD_CAPTURES
+        self.quiet = False
+        for move in sorted(self._captures(), key=self._capture_score, reverse=True):
+            if move in played:
+                continue
+            if not self._winning(move):
+                self._deferred.append(move)
+                continue
+            if self._legal(move):
+                played.add(move)
+                yield move
+
+        # Killers are quiet in the sibling they came from but may be captures or illegal here
+        self.stage = KILLERS
+        self.quiet = True
+        for move in self.killers:
+            if move is None or move in played or not board.is_pseudo_legal(move):
+                continue
+            if board.piece_type_at(move.to_square if isinstance(move, chess.Move) else (move >> 6) & 63):
+                continue
+            if self._legal(move):
+                played.add(move)
+                yield move
+
+        self.stage = QUIETS
+        history = self.history
+        for move in sorted(self._quiets(), key=lambda quiet: history.get(quiet, 0), reverse=True):
+            if move in played:
+                continue
+            if self._legal(move):
+                played.add(move)
+                yield move
+
+        self.stage = BAD_CAPTURES
+        self.quiet = False
+        for move in self._deferred:
+            if self._legal(move):
+                played.add(move)
+                yield move
+
+        self.stage = DONE
@@ -0,0 +1,281 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import time
+import chess
+from Search.Search import SearchTimeout, iterativedeepening
+from Utilities.SearchUtils import Memo
+
+# Larger than any proof or disproof number the search can reach
+INFINITY = 1 << 40
+
+# Mate puzzles for the benchmark as (FEN, moves to mate), each checked against an exhaustive search
+MATE_SUITE = [
+    ('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1', 1),
+    ('r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4', 1),
+    ('6rk/6pp/8/6N1/8/8/8/1Q4K1 w - - 0 1', 1),
+    ('kbK5/pp6/1P6/8/8/8/8/R7 w - - 0 1', 2),
+    ('6k1/8/6K1/8/8/8/8/7R w - - 0 1', 2),
+    ('r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 10', 2),
+    ('r1b2k1r/ppp1bppp/8/1B1Q4/5q2/2P5/PPP2PPP/R3R1K1 w - - 1 1', 2),
+    ('r5rk/5p1p/5R2/4B3/8/8/7P/7K w - - 0 1', 3),
+]
+
+
+class ProofEntry:
+    __slots__ = ('phi', 'delta', 'work')
+
+    def __init__(self, phi, delta, work):
+        self.phi = phi
+        self.delta = delta
+        self.work = work
+
+
+class ProofNumberSearch:
+    """
+    Depth-first proof-number search (df-pn) for forced mates, see https://www.chessprogramming.org/Proof-Number_Search
+    and Nagai's thesis. Every node holds the cost of proving a win for the side to move (phi) and the cost of
+    disproving it (delta), the search always descends into the child that is cheapest to prove and only returns when
+    the thresholds of its parent are exceeded. Nothing is evaluated, so the effort goes to the forcing lines instead
+    of the full width of alpha-beta.
+
+    The attacker is the side to move at the root. A win for the attacker is a mate within the bound, anything else,
+    running out of moves included, is a win for the defender. Entries are keyed by the position and the plies left
+    and the table is bounded, the entries with the least work behind them are evicted first when it fills up.
+    """
+    def __init__(self, table_size: int = 1_000_000, max_nodes: int = None):
+        """
+        :param table_size: The maximum number of table entries
+        :param max_nodes: The maximum number of nodes per call, None for no limit
+        """
+        self.table_size = table_size
+        self.max_nodes = max_nodes
+        self.table = dict()
+        self.keys = Memo()
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None
+
+    def __call__(self, board: chess.Board, moves: int, deadline=None, stop=None):
+        """
+        Finds the shortest forced mate of at most moves moves for the side to move
+        :param board: The position, restored before returning
+        :param moves: The mate bound in moves of the attacker
+        :param deadline: The time.time() value after which the search raises SearchTimeout, None to never stop
+        :param stop: A threading.Event, the search raises SearchTimeout once it is set
+        :return: The mating line as a list of moves, None when there is no mate within moves
+        """
+        self.nodes = 0
+        self.deadline = deadline
+        self.stop = stop
+        plies = len(board.move_stack)
+        try:
+            for bound in range(1, moves + 1):
+                if self.prove(board, 2 * bound - 1):
+                    return self.line(board, 2 * bound - 1)
+        except SearchTimeout:
+            while len(board.move_stack) > plies:
+                board.pop()
+            raise
+        return None
+
+    def prove(self, board, depth: int):
+        'Runs df-pn until the root is solved, True when the side to move mates within depth plies'
+        entry = self.solve(board, depth, INFINITY, INFINITY)
+        return entry.phi == 0
+
+    def lookup(self, board, depth: int):
+        return self.table.get((self.keys.key(board), depth))
+
+    def store(self, board, depth: int, phi: int, delta: int, work: int):
+        if len(self.table) >= self.table_size:
+            self.evict()
+        entry = ProofEntry(phi, delta, work)
+        self.table[(self.keys.key(board), depth)] = entry
+        return entry
+
+    def evict(self):
+        'Drops the half of the table with the least work, solved entries are kept over unsolved ones of equal work'
+        ranked = sorted(self.table.items(), key=lambda item: (item[1].work, item[1].phi == 0 or item[1].delta == 0))
+        for key, _ in ranked[:len(ranked) // 2]:
+            del self.table[key]
+
+    def terminal(self, board, depth: int):
+        """
+        Proof and disproof numbers of nodes that are decided without search
+        :return: A (phi, delta) tuple or None when the node has to be searched
+        """
+        attacker = depth % 2 == 1
+        if not any(board.generate_legal_moves()):
+            if board.is_check():
+                # The side to move is mated
+                return INFINITY, 0
+            return (INFINITY, 0) if attacker else (0, INFINITY)
+        if depth == 0 or board.is_insufficient_material() or board.halfmove_clock >= 150:
+            return (INFINITY, 0) if attacker else (0, INFINITY)
+        return None
+
+    def solve(self, board, depth: int, threshold_phi: int, threshold_delta: int):
+        """
+        Multiple iterative deepening step of df-pn
+        :param board: The position of the node
+        :param depth: The plies left, odd when the attacker is to move
+        :param threshold_phi: The phi at which the parent wants the node back
+        :param threshold_delta: The delta at which the parent wants the node back
+        :return: The table entry of the node
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout()
+        if (self.deadline is not None and time.time() > self.deadline) or (self.stop is not None and
+                                                                            self.stop.is_set()):
+            raise SearchTimeout()
+
+        entry = self.lookup(board, depth)
+        if entry is not None and (entry.phi >= threshold_phi or entry.delta >= threshold_delta):
+            return entry
+
+        decided = self.terminal(board, depth)
+        if decided is not None:
+            return self.store(board, depth, decided[0], decided[1], 1)
+
+        moves = list(board.legal_moves)
+        work = 0
+        while True:
+            # phi of the node is the smallest delta of its children, delta the sum of their phis
+            delta = 0
+            best = None
+            best_delta = second_delta = INFINITY
+            best_phi = 0
+            for move in moves:
+                board.push(move)
+                child = self.lookup(board, depth - 1)
+                board.pop()
+                child_phi, child_delta = (child.phi, child.delta) if child is not None else (1, 1)
+                delta = min(delta + child_phi, INFINITY)
+                if child_delta < best_delta:
+                    second_delta = best_delta
+                    best, best_delta, best_phi = move, child_delta, child_phi
+                elif child_delta < second_delta:
+                    second_delta = child_delta
+            phi = best_delta
+
+            if phi >= threshold_phi or delta >= threshold_delta:
+                return self.store(board, depth, phi, delta, work + 1)
+
+            nodes = self.nodes
+            board.push(best)
+            self.solve(board, depth - 1, threshold_delta + best_phi - delta, min(threshold_phi, second_delta + 1))
+            board.pop()
+            work += self.nodes - nodes
+
+    def line(self, board, depth: int):
+        """
+        Follows a proven node to the mate, the attacker plays a proven move and the defender the one that takes the
+        longest to mate. Entries evicted from the table are searched again.
+        :return: The list of moves
+        """
+        line = []
+        while depth > 0 and any(board.generate_legal_moves()):
+            chosen = None
+            for move in board.legal_moves:
+                board.push(move)
+                child = self.lookup(board, depth - 1)
+                if child is None:
+                    child = self.solve(board, depth - 1, INFINITY, INFINITY)
+                board.pop()
+                if depth % 2 == 1 and child.delta == 0:
+                    chosen = move
+                    break
+                if depth % 2 == 0 and child.phi == 0:
+                    longest = self.mate_length(board, move, depth - 1)
+                    if chosen is None or longest > chosen[1]:
+                        chosen = (move, longest)
+            move = chosen if depth % 2 == 1 else chosen[0]
+            line.append(move)
+            board.push(move)
+            depth -= 1
+
+        for _ in line:
+            board.pop()
+        return line
+
+    def is_mating_move(self, board, move, moves: int):
+        'True when move forces mate within moves moves, including itself'
+        board.push(move)
+        entry = self.solve(board, 2 * moves - 2, INFINITY, INFINITY)
+        board.pop()
+        return entry.delta == 0
+
+    def mate_length(self, board, move, depth: int):
+        'The fewest plies the attacker needs to mate after the defender plays move'
+        board.push(move)
+        length = depth
+        for plies in range(1, depth + 1, 2):
+            if self.solve(board, plies, INFINITY, INFINITY).phi == 0:
+                length = plies
+                break
+        board.pop()
+        return length
+
+
+def read_suite(path: str):
+    'Mate puzzles of an EPD file with dm (direct mate) operations'
+    suite = []
+    with open(path) as handle:
+        for line in handle:
+            if line.strip():
+                board, operations = chess.Board.from_epd(line)
+                suite.append((board.fen(), int(operations['dm'])))
+    return suite
+
+
+def benchmark(suite=None, timeout: float = 30.0, evaluation=None):
+    """
+    Solves every puzzle with the proof-number search and with iterativedeepening to the mate depth, reporting the time
+    of both and whether the move of iterativedeepening forces the mate
+    :param suite: A list of (FEN, moves to mate), MATE_SUITE by default
+    :param timeout: The time in seconds iterativedeepening gets per puzzle
+    :param evaluation: The evaluation function of iterativedeepening, calculateRapid by default
+    """
+    if evaluation is None:
+        from Evaluate import calculateRapid as evaluation
+    suite = suite or MATE_SUITE
+
+    search = ProofNumberSearch()
+    totals = {'pns': 0.0, 'tabular': 0.0}
+    solved = {'pns': 0, 'tabular': 0}
+    print(f'{"moves":>5} {"pns s":>8} {"nodes":>8} {"tabular s":>10}  line / tabular move')
+    for fen, moves in suite:
+        board = chess.Board(fen)
+        start = time.perf_counter()
+        line = search(board, moves)
+        pns_time = time.perf_counter() - start
+        nodes = search.nodes
+        solved['pns'] += line is not None
+
+        start = time.perf_counter()
+        _, move = iterativedeepening(2 * moves - 1, timeout, board, evaluation)
+        tabular_time = time.perf_counter() - start
+        found = move is not None and search.is_mating_move(board, move, moves)
+        solved['tabular'] += found
+
+        totals['pns'] += pns_time
+        totals['tabular'] += tabular_time
+        print(f'{moves:>5} {pns_time:>8.2f} {nodes:>8} {tabular_time:>10.2f}  '
+              f'{" ".join(move.uci() for move in line) if line else "no mate"} / '
+              f'{move.uci() if move else "-"}{"" if found else " (misses the mate)"}')
+
+    print(f'proof-number: {solved["pns"]}/{len(suite)} solved in {totals["pns"]:.2f}s')
+    print(f'     tabular: {solved["tabular"]}/{len(suite)} solved in {totals["tabular"]:.2f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the proof-number search against tabular on mate puzzles')
+    parser.add_argument('--suite', help='EPD file with dm operations, the built-in puzzles by default')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    benchmark(read_suite(args.suite) if args.suite else None, args.timeout)
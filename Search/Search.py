@@ -1,9 +1,11 @@
 # Last Updated: 04/24/2022
 # Version:      1.2
-import random
 import time
 import chess
 from Utilities.SearchUtils import Memo, searchMax, searchMin, maxAB, minAB
+from Utilities.Bitboard import BitBoard, evaluation_for, move_to_chess
+from Search.Framework import FeatureSearch, Features, SearchTimeout, seed, NEGAMAX, ALPHA_BETA, TABULAR, \
+    ITERATIVE
 
 
 def negamax(depth: int, board: chess.Board, color, evaluation):
@@ -11,34 +13,15 @@ def negamax(depth: int, board: chess.Board, color, evaluation):
     Zero-sum game tree search algorithm that behaves like the minimax algorithm but on the premise that the
     minimizing player can be represented as negation of the maximizing function, max(a,b) = -min(-a,-b). Implementation
     is based on the pseudocode found at https://www.chessprogramming.org/Negamax and https://en.wikipedia.org/wiki/Negamax
-    with adjustments made to include the root call of the negamax function in a single function definition.
+    with adjustments made to include the root call of the negamax function in a single function definition. Runs
+    Search.Framework.FeatureSearch with every feature switched off.
     :param depth: The maximum depth to traverse
     :param board: The board object used to make and unmake moves and track position
     :param color: The color of the moving player
     :param evaluation: The evaluation function to execute on the board
     :return: The maximum score of the best move and the best move
     """
-    # When depth limit is reached or terminal node is reached return evaluation of node
-    if depth == 0 or board.outcome() is not None:
-        return evaluation(board, color), None
-
-    maximum = float('-inf')
-    selected_move = None
-    for move in board.legal_moves:
-        board.push(move)
-        score, _ = negamax(depth-1, board, color, evaluation)
-        score = -score
-        board.pop()
-        if score > maximum:
-            maximum = score
-            selected_move = move
-        if score == maximum:  # Used to generate some randomness of moves played
-            rand = random.Random()
-            if rand.random() > .75:
-                maximum = score
-                selected_move = move
-
-    return maximum, selected_move
+    return FeatureSearch(NEGAMAX, evaluation).negamax(depth, float('-inf'), float('inf'), board, color)
 
 
 def alphaBeta(depth: int, alpha: float, beta: float, board: chess.Board, color, evaluation):
@@ -47,7 +30,7 @@ def alphaBeta(depth: int, alpha: float, beta: float, board: chess.Board, color,
     alpha-beta pruning to cut branches from the game tree in which the score is already worst than the
     current upper and lower bounds of scores. It reduces to overall tree size resulting in faster computation.
     Implementation based on the pseudocode from https://www.chessprogramming.org/Alpha-Beta and
-    https://en.wikipedia.org/wiki/Negamax
+    https://en.wikipedia.org/wiki/Negamax. Runs Search.Framework.FeatureSearch with only alpha_beta switched on.
     :param depth: The maximum depth to traverse
     :param alpha: The maximum score for the maximizing player
     :param beta: The minimum score for the minimizing player
@@ -56,131 +39,124 @@ def alphaBeta(depth: int, alpha: float, beta: float, board: chess.Board, color,
     :param evaluation: The evaluation function to execute on the board
     :return: The maximum score of the best move and the best move
     """
+    return FeatureSearch(ALPHA_BETA, evaluation).negamax(depth, alpha, beta, board, color)
 
-    # When depth limit is reached or terminal node is reached return evaluation of node
-    if depth == 0 or board.outcome() is not None:
-        return evaluation(board, color), None
-
-    maximum = float('-inf')
-    selected_move = None
-    new_alpha = alpha
-
-    for move in board.legal_moves:
-        board.push(move)
-        score, _ = alphaBeta(depth - 1, -beta, -new_alpha, board, color, evaluation)
-        score = -score
-        board.pop()
-
-        if score > maximum:
-            maximum = score
-            selected_move = move
-        if score == maximum:
-            rand = random.Random()
-            if rand.random() > .75:
-                maximum = score
-                selected_move = move
-
-        new_alpha = max(new_alpha, maximum)
 
-        if new_alpha >= beta:
-            break
-
-    return maximum, selected_move
-
-
-def tabular(depth: int, alpha: float, beta: float, board: chess.Board, color, evaluation, memo=None):
+def tabular(depth: int, alpha: float, beta: float, board: chess.Board, color, evaluation, memo=None, deadline=None,
+            stop=None):
     """
     Enhancement of the negamax and alpha-beta search algorithms that adds memoization to avoid computation
     of previously visited board positions by storing the score and other relevant data in a table. Implementation
     based on the pseudocode from https://en.wikipedia.org/wiki/Negamax with adjustments made to include move ordering
-    before searching the child nodes.
+    before searching the child nodes. Moves come from a Search.MovePicker.MovePicker that plays the move stored in the
+    table first and orders the rest with the killer and history tables of the memo. Runs
+    Search.Framework.FeatureSearch with alpha_beta, table and ordering switched on.
     :param depth: The maximum depth to traverse
     :param alpha: The maximum score of the maximizing player
     :param beta: The minimum score of the minimizing player
-    :param board: The board object used to make and unmake moves and track posiiton
+    :param board: The board object used to make and unmake moves and track posiiton, either a chess.Board or a
+    Utilities.Bitboard.BitBoard
     :param color: The color of the moving player
-    :param evaluation: The evaluation function to execute on the board
+    :param evaluation: The evaluation function to execute on the board, called as
+    evaluation(board, color, context=context, alpha=alpha, beta=beta) with the Utilities.SearchUtils.NodeContext of the
+    node and the window of the node. Evaluators may return a bound past the window instead of the exact score.
     :param memo: The table object used to hold calculation, Defaults to None to automatically generate an empty table
+    :param deadline: The time.time() value after which the search raises SearchTimeout, None to never stop
+    :param stop: A threading.Event, the search raises SearchTimeout once it is set
     :return: The score of the best move and the best move
     """
+    return FeatureSearch(TABULAR, evaluation, memo, deadline, stop).negamax(depth, alpha, beta, board, color)
 
-    def move_sort(move):
-        board.push(move)
-        position = memo.lookup(board.fen())
+
+def principal_variation(board, memo, move, length: int):
+    """
+    Rebuilds the principal variation starting with move by following the best moves stored in the memo table
+    :param board: The board the move is played on, restored before returning
+    :param memo: The table filled by the search
+    :param move: The first move of the variation
+    :param length: The maximum length of the variation
+    :return: The list of moves of the variation
+    """
+    pv = [move]
+    board.push(move)
+    while len(pv) < length:
+        node = memo.lookup_key(memo.key(board))
+        if node is None or node.move is None or node.move not in board.legal_moves:
+            break
+        pv.append(node.move)
+        board.push(node.move)
+    for _ in pv:
         board.pop()
-        if position is None:
-            return float('-inf')
-        else:
-            if position.node_type == 'EXACT':
-                return position.score
-            else:
-                return float('-inf')
+    return pv
 
+
+def multipv(depth: int, board: chess.Board, color, evaluation, memo=None, count: int = 3, order=None,
+            deadline=None, stop=None, features: Features = None):
+    """
+    Root search that finds the best count moves instead of only the best one. Every root move is searched with the
+    score of the count-th best move found so far as its lower bound, so moves that cannot enter the list are refuted
+    as cheaply as in a normal alpha-beta search and the children share the memo table of the iteration.
+    :param depth: The maximum depth to traverse
+    :param board: The board object used to make and unmake moves and track position
+    :param color: The color of the moving player
+    :param evaluation: The evaluation function to execute on the board
+    :param memo: The computation table, by default is None to generate an empty table
+    :param count: The number of principal variations to return
+    :param order: Root moves to search first, usually the ranking of the previous iteration
+    :param deadline: The time.time() value after which the search raises SearchTimeout, None to never stop
+    :param stop: A threading.Event, the search raises SearchTimeout once it is set
+    :param features: The Search.Framework.Features the root moves are searched with, those of tabular by default
+    :return: Up to count (score, pv) tuples ordered from best to worst
+    """
     if memo is None:
         memo = Memo()
+    search = FeatureSearch(features or TABULAR, evaluation, memo, deadline, stop)
 
-    selected_move = None
-    maximum = float('-inf')
-    new_alpha = alpha
-    new_beta = beta
-
-    # Check if position is in the memo table
-    node = memo.lookup(board.fen())
-    if node is not None and node.depth >= depth:
-        if node.node_type == 'EXACT':
-            return node.score, node.move
-        elif node.node_type == 'LOWERBOUND':
-            new_alpha = max(new_alpha, node.score)
-        elif node.node_type == 'UPPERBOUND':
-            new_beta = min(new_beta, node.score)
-
-        if new_alpha >= new_beta:
-            return node.score, node.move
-
-    # When depth limit is reached or terminal node is reached return evaluation of node
-    if depth == 0 or board.outcome() is not None:
-        return evaluation(board, color), None
-
-    # Order moves by best score first to attempt to maximize cutoffs
     moves = list(board.legal_moves)
-    moves.sort(key=lambda x: move_sort(x))
-    moves.reverse()
+    if order:
+        rank = {move: index for index, move in enumerate(order)}
+        moves.sort(key=lambda move: rank.get(move, len(rank)))
 
-    # Evaluate every move in all possible moves
-    for move in board.legal_moves:
+    ranked = []
+    for move in moves:
+        bound = ranked[count - 1][0] if len(ranked) >= count else float('-inf')
         board.push(move)
-        score, _ = tabular(depth - 1, -new_beta, -new_alpha, board, color, evaluation, memo)
+        score, _ = search.negamax(depth - 1, float('-inf'), -bound, board, color)
         score = -score
         board.pop()
 
-        if score > maximum:
-            maximum = score
-            selected_move = move
-        elif score == maximum:
-            rand = random.Random()
-            if rand.random() > 0.75:
-                maximum = score
-                selected_move = move
-
-        new_alpha = max(new_alpha, maximum)
+        # A score at or below the bound is only an upper bound and cannot enter the list
+        if len(ranked) < count or score > bound:
+            ranked.append((score, move))
+            ranked.sort(key=lambda entry: entry[0], reverse=True)
+            del ranked[count:]
 
-        if new_alpha >= beta:
-            break
+    return [(score, principal_variation(board, memo, move, depth)) for score, move in ranked]
 
-    # Store best move in the memo table
-    node_type = ''
-    if maximum <= alpha:
-        node_type = "UPPERBOUND"
-    elif maximum >= new_beta:
-        node_type = 'LOWERBOUND'
-    else:
-        node_type = 'EXACT'
-    memo.store(board.fen(), selected_move, depth, maximum, node_type, board.halfmove_clock)
 
-    return maximum, selected_move
+def best_variation(ranked, depth: int, board, color, evaluation, memo=None, features: Features = None):
+    """
+    The best variation of a multipv ranking
+    :param ranked: The (score, pv) tuples returned by multipv
+    :param depth: The depth ranked was searched to
+    :param board: The board ranked was searched on
+    :param color: The color of the moving player
+    :param evaluation: The evaluation function of the search
+    :param memo: The computation table of the search
+    :param features: The Search.Framework.Features of the search
+    :return: The score and the principal variation of the best move. A checkmated or stalemated root has no moves to
+    rank, its variation is empty and its score the one the search gives the root.
+    """
+    if ranked:
+        return ranked[0]
+    score, _ = FeatureSearch(features or TABULAR, evaluation, memo).negamax(depth, float('-inf'), float('inf'),
+                                                                           board, color)
+    return score, []
 
 
-def iterativedeepening(depth: int, timeout: int, board: chess.Board, evaluation, memo=None):
+def iterativedeepening(depth: int, timeout: int, board: chess.Board, evaluation, memo=None, backend='chess',
+                       multipv_count: int = 1, time_manager=None, stop=None, callback=None,
+                       features: Features = None):
     """
     Enhancement of the negamax with alpha-beta and memoization that leverages the use of the computation
     table to speed up execution by solving smaller subproblems first. The algorithm searches the tree at a depth
@@ -194,25 +170,98 @@ def iterativedeepening(depth: int, timeout: int, board: chess.Board, evaluation,
     :param board: The board object to make and unmake moves and track position
     :param evaluation: The evaluation function to perform on the board
     :param memo: The computation table, by default is None to generate an empty table for the execution
-    :return: The score for the best move and the best move
+    :param backend: The board used for the search, 'chess' searches the given chess.Board and 'bitboard' searches a
+    Utilities.Bitboard.BitBoard copy of it
+    :param multipv_count: The number of principal variations to search for, see multipv
+    :param time_manager: A Search.TimeManager.TimeManager deciding after every iteration whether to continue, replaces
+    the timeout check when given
+    :param stop: A threading.Event that ends the search early, like the timeout the first iteration always finishes
+    :param callback: Called after every finished iteration with a dict of the depth, the score, the principal
+    variation as chess.Move objects, the nodes searched, the nodes per second and the elapsed time
+    :param features: The Search.Framework.Features of the search, all but quiescence and reductions by default. Without
+    iterative_deepening only the final depth is searched.
+    :return: The score for the best move and the best move, or when multipv_count is above one a list of
+    (score, pv) tuples ordered from best to worst
     """
     if memo is None:
         memo = Memo()
+    features = features or ITERATIVE
+
+    if backend == 'bitboard':
+        search_board = BitBoard.from_board(board)
+        evaluation = evaluation_for(evaluation)
+    elif backend == 'chess':
+        search_board = board
+    else:
+        raise ValueError(f'Unknown search backend: {backend}')
 
     start = time.time()
+    start_nodes = memo.nodes
     return_value = None
+    plies = len(search_board.move_stack)
+    first = 1 if features.iterative_deepening else depth
+
+    for i in range(first, depth+1):
+        iteration_start = time.time()
+        # The hard limit of the time manager aborts an iteration that overruns it, the first iteration always finishes
+        deadline = time_manager.start + time_manager.hard if time_manager is not None and i > first else None
+        iteration_stop = stop if i > first else None
+        try:
+            if multipv_count > 1:
+                order = [pv[0] for _, pv in return_value] if return_value else None
+                return_value = multipv(i, search_board, board.turn, evaluation, memo, multipv_count, order, deadline,
+                                       iteration_stop, features)
+            else:
+                search = FeatureSearch(features, evaluation, memo, deadline, iteration_stop)
+                return_value = search.negamax(i, float('-inf'), float('inf'), search_board, board.turn)
+        except SearchTimeout:
+            # Unwind the line the search was in and keep the result of the last finished iteration
+            while len(search_board.move_stack) > plies:
+                search_board.pop()
+            break
 
-    for i in range(1, depth+1):
-        return_value = tabular(i, float('-inf'), float('inf'), board, board.turn, evaluation, memo)
+        if callback is not None:
+            if multipv_count > 1:
+                score, pv = best_variation(return_value, i, search_board, board.turn, evaluation, memo, features)
+            else:
+                score, move = return_value
+                pv = principal_variation(search_board, memo, move, i) if move is not None else []
+            pv = [move_to_chess(move) if isinstance(move, int) else move for move in pv]
+            elapsed = time.time() - start
+            nodes = memo.nodes - start_nodes
+            callback({'depth': i, 'score': score, 'pv': pv, 'nodes': nodes,
+                      'nps': nodes / elapsed if elapsed > 0 else 0.0, 'time': elapsed})
+
+        if stop is not None and stop.is_set():
+            break
+
+        if time_manager is not None:
+            if multipv_count > 1:
+                score, pv = best_variation(return_value, i, search_board, board.turn, evaluation, memo, features)
+                move = pv[0] if pv else None
+            else:
+                score, move = return_value
+            time_manager.update(score, move, time.time() - iteration_start)
+            if time_manager.should_stop():
+                break
+            continue
 
         current = time.time()
         if current - start >= timeout:
-            return return_value
+            break
         delta = current - start
         if current + delta - start >= timeout:
             break
 
-    return return_value
+    if multipv_count > 1:
+        if backend == 'bitboard':
+            return_value = [(score, [move_to_chess(move) for move in pv]) for score, pv in return_value]
+        return return_value
+
+    score, move = return_value
+    if isinstance(move, int):
+        move = move_to_chess(move)
+    return score, move
 
 
 def minimax(board: chess.Board, depth: int, evaluation):
@@ -0,0 +1,95 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import time
+
+
+class TimeManager:
+    """
+    Splits the remaining clock over the moves still to play, see https://www.chessprogramming.org/Time_Management.
+    Every move gets a soft limit, the time normally spent, and a hard limit that is never exceeded. Between
+    iterations of the search the soft limit is stretched while the best move keeps changing or the score drops and
+    shrunk once the best move has been stable for several depths. An iteration is only started when the growth of
+    the previous ones predicts it can finish before the hard limit.
+    """
+    def __init__(self, remaining: float, increment: float = 0.0, moves_to_go: int = None, overhead: float = 0.05,
+                 horizon: int = 30, score_drop: float = 0.5, stable_depths: int = 4):
+        """
+        :param remaining: The time in seconds left on the clock of the side to move
+        :param increment: The time in seconds added to the clock after every move
+        :param moves_to_go: The moves left until the next time control, None for sudden death
+        :param overhead: The time in seconds reserved per move for communication and bookkeeping
+        :param horizon: The number of moves the remaining time is spread over in sudden death
+        :param score_drop: The score loss between iterations that counts as the position getting worse
+        :param stable_depths: The number of iterations with the same best move after which the search stops early
+        """
+        self.score_drop = score_drop
+        self.stable_depths = stable_depths
+
+        usable = max(remaining - overhead, 0.0)
+        moves = max(moves_to_go, 1) if moves_to_go else horizon
+        self.soft = min(usable / moves + increment * 0.8, usable * 0.5)
+        # Never use more than a fifth of the clock on one move unless it is the last move before the time control
+        self.hard = min(self.soft * 4, usable * (0.9 if moves == 1 else 0.2) + increment * 0.8, usable)
+        self.soft = min(self.soft, self.hard)
+
+        self.start = time.time()
+        self.factor = 1.0
+        self.best_move = None
+        self.best_score = None
+        self.stable = 0
+        self.iteration_times = []
+
+    def elapsed(self):
+        return time.time() - self.start
+
+    def update(self, score, move, iteration_time: float):
+        """
+        Records a finished iteration and adjusts the soft limit
+        :param score: The score of the iteration
+        :param move: The best move of the iteration
+        :param iteration_time: The time in seconds the iteration took
+        """
+        self.iteration_times.append(iteration_time)
+
+        if self.best_move is None:
+            self.factor = 1.0
+        elif move != self.best_move:
+            # An unstable root needs more time to settle
+            self.stable = 0
+            self.factor = min(self.factor * 1.5, 3.0)
+        else:
+            self.stable += 1
+            self.factor = max(self.factor * 0.9, 0.5)
+
+        if self.best_score is not None and score < self.best_score - self.score_drop:
+            self.stable = 0
+            self.factor = min(max(self.factor, 1.0) * 1.5, 3.0)
+
+        self.best_move = move
+        self.best_score = score
+
+    def soft_limit(self):
+        return min(self.soft * self.factor, self.hard)
+
+    def next_iteration_estimate(self):
+        'Expected time of the next iteration from the growth of the last two'
+        if not self.iteration_times:
+            return 0.0
+        last = self.iteration_times[-1]
+        if len(self.iteration_times) < 2 or self.iteration_times[-2] <= 0:
+            return last * 4
+        return last * min(max(last / self.iteration_times[-2], 1.5), 10.0)
+
+    def should_stop(self):
+        """
+        Decides between iterations whether to return the current best move
+        :return: True when the search should not start another iteration
+        """
+        elapsed = self.elapsed()
+        if elapsed >= self.soft_limit():
+            return True
+        if self.stable >= self.stable_depths and elapsed >= self.soft * 0.3:
+            return True
+        return elapsed + self.next_iteration_estimate() > self.hard
@@ -1 +1,10 @@
-from Search.Search import minimax, minimaxAB, negamax, alphaBeta, tabular, iterativedeepening
+from Search.Search import minimax, minimaxAB, negamax, alphaBeta, tabular, iterativedeepening, multipv
+from Search.MovePicker import MovePicker
+from Search.MCTS import MCTS
+from Search.TimeManager import TimeManager
+from Search.Background import SearchHandle
+from Search.Distributed import Coordinator
+from Search.ProofNumber import ProofNumberSearch
+from Search.Core import SearchCore
+from Search.Framework import FeatureSearch, Features
+from Search.Lockstep import Lockstep
@@ -2,12 +2,16 @@
 # Last Updated: 04/24/2022
 # Version:      1.0
 
+import argparse
 import chess
 import time
+from contextlib import nullcontext
 from collections import defaultdict
 from Evaluate import calculate, evaluateScore, calculateRapid, eval
-from Search import minimax, minimaxAB, negamax, alphaBeta, tabular, iterativedeepening
+from Evaluate.evaluationjb2 import lazyExitRate, resetLazyStats
+from Search import minimax, minimaxAB, negamax, alphaBeta, tabular, iterativedeepening, MCTS
 from Utilities import Memo
+from Utilities.Profiler import profiler_for
 import matplotlib.pyplot as plt
 
 board = chess.Board()
@@ -308,6 +312,66 @@ def evaltest(evaluation, maxdepth, evalname):
     print('Finished evaluation runtime test.')
     
 
+def mctstest(timecontrols, games=2):
+    print('Starting MCTS versus alpha-beta test...')
+    calls = defaultdict(lambda: 0)
+
+    def counted(name):
+        def evaluation(board, color, context=None, alpha=None, beta=None):
+            calls[name] += 1
+            return calculateRapid(board, color, context, alpha, beta)
+        return evaluation
+
+    for timeout in timecontrols:
+        searched = defaultdict(lambda: 0.0)
+        for game in range(games):
+            # Alternate colors so neither search always has the first move
+            mcts = MCTS()
+            searches = {chess.WHITE: 'mcts', chess.BLACK: 'alphabeta'} if game % 2 == 0 else \
+                       {chess.WHITE: 'alphabeta', chess.BLACK: 'mcts'}
+            memo = Memo()
+            while board.outcome() is None and board.fullmove_number <= 60:
+                name = searches[board.turn]
+                start = time.time()
+                if name == 'mcts':
+                    _, move = mcts(30, timeout, board, counted(name))
+                else:
+                    _, move = iterativedeepening(30, timeout, board, counted(name), memo)
+                searched[name] += time.time() - start
+                board.push(move)
+
+            outcome = board.outcome()
+            if outcome is None or outcome.winner is None:
+                winloss[f'{timeout}s draw'] += 1
+            else:
+                winloss[f'{timeout}s {searches[outcome.winner]}'] += 1
+            board.reset()
+
+        for name in ('mcts', 'alphabeta'):
+            print(f'{timeout}s per move, {name}: {calls[name] / max(searched[name], 1e-9):.0f} evaluations/sec')
+            calls[name] = 0
+        print(f'{timeout}s per move results: {dict(winloss)}')
+
+    print('Finished MCTS versus alpha-beta test.')
+
+
+def lazytest(maxdepth):
+    print('Starting lazy evaluation test...')
+    for i in range(1, maxdepth+1):
+        resetLazyStats()
+        memo = Memo()
+        start = time.time()
+        while board.outcome() is None and board.fullmove_number <= 40:
+            _, move = tabular(i, float('-inf'), float('inf'), board, board.turn, calculateRapid, memo)
+            board.push(move)
+        stop = time.time()
+
+        board.reset()
+        print(f'Depth {i}: {lazyExitRate():.1%} of evaluations exited early, {stop - start:.2f}s')
+
+    print('Finished lazy evaluation test.')
+
+
 def displaystats():
     print('Visualizing runtimes...')
     figure, axs = plt.subplots(2)
@@ -373,17 +437,32 @@ def displaystats():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the searchers and evaluators and plot the results')
+    parser.add_argument('--profile', help='Sample the tests into this collapsed stack file, see Utilities.Profiler. '
+                                          'Defaults to CHESS_ENGINE_PROFILE.')
+    parser.add_argument('--mcts', action='store_true', help='Also play MCTS against alpha-beta, takes minutes')
+    parser.add_argument('--lazy', action='store_true', help='Also measure the lazy evaluation exit rate')
+    args = parser.parse_args()
+    profiler = profiler_for(args.profile)
+
     print('Starting tests...')
-    minitest(3)
-    miniABtest(3)
-    negatest(3)
-    alphatest(3)
-    tabulartest(3)
-    idtest(3)
-    evaltest(calculate, 3, 'material')
-    evaltest(calculateRapid, 3, 'rapid')
-    evaltest(evaluateScore, 3, 'position')
-    evaltest(eval, 3, 'combined')
+    with profiler.sampling() if profiler is not None else nullcontext():
+        minitest(3)
+        miniABtest(3)
+        negatest(3)
+        alphatest(3)
+        tabulartest(3)
+        idtest(3)
+        evaltest(calculate, 3, 'material')
+        evaltest(calculateRapid, 3, 'rapid')
+        evaltest(evaluateScore, 3, 'position')
+        evaltest(eval, 3, 'combined')
+        if args.mcts:
+            mctstest([0.5, 2])
+        if args.lazy:
+            lazytest(3)
     print('Finished testing.')
+    if profiler is not None:
+        profiler.report()
     print('Visualizing data...')
     displaystats()
@@ -0,0 +1,201 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import sys
+import threading
+import time
+import chess
+from Evaluate import EVALUATORS
+from Search import iterativedeepening
+from Utilities import Memo
+from Utilities.Parallel import bounded_imap
+from Utilities.Streams import read_lines
+
+# Runs tactical test suites of EPD records with bm (best move) or am (avoid move) operations. Positions are searched
+# in parallel with a time or node limit each, every finished iteration is checked against the operations and a
+# position counts as solved at the first iteration from which the best move stays correct until the end. The results
+# are written as JSON lines labelled with the build that produced them, so two builds can be compared with --diff.
+
+# Upper bounds in seconds of the time-to-solution histogram
+TIME_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+
+def isCorrect(move, bestMoves, avoidMoves):
+    if move is None:
+        return False
+    if bestMoves and move not in bestMoves:
+        return False
+    return move not in avoidMoves
+
+
+def solvePosition(task):
+    """
+    Worker entry point, searches one EPD record
+    :param task: Tuple of (line number, EPD line, time limit, node limit, maximum depth, evaluator name, backend)
+    :return: The result dict of the position
+    """
+    number, line, timeLimit, nodeLimit, depth, evaluator, backend = task
+    try:
+        board, operations = chess.Board.from_epd(line)
+    except ValueError as error:
+        return {'id': str(number), 'line': number, 'error': str(error)}
+    bestMoves = operations.get('bm', [])
+    avoidMoves = operations.get('am', [])
+    result = {'id': str(operations.get('id', number)), 'line': number, 'bm': [board.san(move) for move in bestMoves],
+              'am': [board.san(move) for move in avoidMoves]}
+
+    memo = Memo()
+    stop = threading.Event()
+    updates = []
+    start = time.time()
+
+    def watch():
+        # Ends the search inside an iteration once a limit is reached
+        while not stop.wait(0.005):
+            if (timeLimit and time.time() - start >= timeLimit) or (nodeLimit and memo.nodes >= nodeLimit):
+                stop.set()
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        _, move = iterativedeepening(depth, float('inf'), board, EVALUATORS[evaluator], memo, backend=backend,
+                                     stop=stop, callback=updates.append)
+    finally:
+        stop.set()
+        watcher.join()
+
+    # The solution is the first iteration after which every iteration found a correct move
+    solution = None
+    for update in reversed(updates):
+        if not update['pv'] or not isCorrect(update['pv'][0], bestMoves, avoidMoves):
+            break
+        solution = update
+
+    result.update({'move': board.san(move) if move is not None else None, 'depth': updates[-1]['depth'],
+                   'nodes': memo.nodes, 'time': time.time() - start,
+                   'solved': solution is not None and isCorrect(move, bestMoves, avoidMoves)})
+    if result['solved']:
+        result.update({'solvedDepth': solution['depth'], 'solvedTime': solution['time'],
+                       'solvedNodes': solution['nodes']})
+    return result
+
+
+def runSuite(paths, output: str, timeLimit=5.0, nodeLimit=None, depth=30, evaluator='calculateRapid',
+             backend='chess', processes=None, label=None):
+    """
+    Searches every position of the EPD files and writes one JSON line per position
+    :param paths: EPD files with bm or am operations
+    :param output: The file the results are written to
+    :param timeLimit: The time in seconds per position, None for no limit
+    :param nodeLimit: The number of nodes per position, None for no limit
+    :param depth: The maximum search depth
+    :param evaluator: The name of the evaluator in Evaluate.EVALUATORS
+    :param backend: The search backend passed to iterativedeepening
+    :param processes: The number of worker processes, defaults to the number of cores
+    :param label: The name of the build in the results, defaults to the evaluator and backend
+    :return: The list of results in input order
+    """
+    if evaluator not in EVALUATORS:
+        raise ValueError(f'Unknown evaluator {evaluator}, expected one of {", ".join(EVALUATORS)}')
+    if not timeLimit and not nodeLimit:
+        raise ValueError('A time or node limit is required')
+    processes = processes or multiprocessing.cpu_count()
+    label = label or f'{evaluator}/{backend}'
+
+    lines = (line for path in paths for line in read_lines(path))
+    tasks = ((number, line, timeLimit, nodeLimit, depth, evaluator, backend) for number, line in enumerate(lines, 1))
+
+    results = []
+    with open(output, 'w') as handle, multiprocessing.Pool(processes) as pool:
+        handle.write(json.dumps({'label': label, 'timeLimit': timeLimit, 'nodeLimit': nodeLimit, 'depth': depth,
+                                 'evaluator': evaluator, 'backend': backend}) + '\n')
+        for result in bounded_imap(pool, solvePosition, tasks, processes * 2):
+            handle.write(json.dumps(result) + '\n')
+            results.append(result)
+            status = 'error' if 'error' in result else ('solved' if result['solved'] else 'failed')
+            print(f'{result["id"]}: {status} {result.get("move") or ""}', file=sys.stderr)
+    return results
+
+
+def readResults(path: str):
+    'Loads the header and the results of a results file'
+    with open(path) as handle:
+        header = json.loads(handle.readline())
+        return header, [json.loads(line) for line in handle if line.strip()]
+
+
+def summarize(results, label=''):
+    'Prints the solved count and the time-to-solution distribution'
+    valid = [result for result in results if 'error' not in result]
+    solved = [result for result in valid if result['solved']]
+    print(f'{label}: {len(solved)}/{len(valid)} solved' + (f', {len(results) - len(valid)} unreadable'
+                                                            if len(valid) < len(results) else ''))
+    if not solved:
+        return
+
+    times = sorted(result['solvedTime'] for result in solved)
+    depths = [result['solvedDepth'] for result in solved]
+    quantiles = statistics.quantiles(times, n=10, method='inclusive') if len(times) > 1 else times * 9
+    print(f'  time to solution: min {times[0]:.2f}s, median {statistics.median(times):.2f}s, '
+          f'p90 {quantiles[8]:.2f}s, max {times[-1]:.2f}s, mean depth {statistics.mean(depths):.1f}')
+    for bucket in TIME_BUCKETS:
+        count = sum(1 for solvedTime in times if solvedTime <= bucket)
+        print(f'  <= {bucket:>5}s {count:>5} {"#" * round(40 * count / len(valid))}')
+
+
+def diffResults(basePath: str, otherPath: str):
+    'Compares the results of two builds position by position'
+    baseHeader, baseResults = readResults(basePath)
+    otherHeader, otherResults = readResults(otherPath)
+    summarize(baseResults, baseHeader['label'])
+    summarize(otherResults, otherHeader['label'])
+
+    base = {result['id']: result for result in baseResults if 'error' not in result}
+    other = {result['id']: result for result in otherResults if 'error' not in result}
+    gained = [key for key in other if other[key]['solved'] and key in base and not base[key]['solved']]
+    lost = [key for key in other if not other[key]['solved'] and key in base and base[key]['solved']]
+    both = [key for key in other if other[key]['solved'] and key in base and base[key]['solved']]
+
+    print(f'\nSolved only by {otherHeader["label"]}: {len(gained)}')
+    for key in gained:
+        print(f'  {key}: {other[key]["move"]} at depth {other[key]["solvedDepth"]}, {other[key]["solvedTime"]:.2f}s')
+    print(f'Solved only by {baseHeader["label"]}: {len(lost)}')
+    for key in lost:
+        print(f'  {key}: now plays {other[key]["move"]}, was {base[key]["move"]} at {base[key]["solvedTime"]:.2f}s')
+    if both:
+        ratios = [other[key]['solvedTime'] / base[key]['solvedTime'] for key in both if base[key]['solvedTime'] > 0]
+        if ratios:
+            print(f'Solved by both: {len(both)}, median time ratio {statistics.median(ratios):.2f} '
+                  f'({otherHeader["label"]} / {baseHeader["label"]})')
+    missing = len(set(base) ^ set(other))
+    if missing:
+        print(f'{missing} positions appear in only one of the files')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run EPD test suites or compare the results of two builds')
+    parser.add_argument('paths', nargs='*', help='EPD files with bm or am operations')
+    parser.add_argument('--output', help='The results file, JSON lines')
+    parser.add_argument('--time', type=float, default=5.0, help='Seconds per position, 0 for no limit')
+    parser.add_argument('--nodes', type=int, default=None, help='Nodes per position')
+    parser.add_argument('--depth', type=int, default=30)
+    parser.add_argument('--evaluator', choices=sorted(EVALUATORS), default='calculateRapid')
+    parser.add_argument('--backend', choices=('chess', 'bitboard'), default='chess')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--label', default=None, help='Name of the build in the results')
+    parser.add_argument('--diff', nargs=2, metavar=('BASE', 'OTHER'), help='Compare two results files')
+    args = parser.parse_args()
+
+    if args.diff:
+        diffResults(*args.diff)
+    else:
+        if not args.paths or not args.output:
+            parser.error('EPD files and --output are required unless --diff is given')
+        results = runSuite(args.paths, args.output, args.time or None, args.nodes, args.depth, args.evaluator,
+                           args.backend, args.processes, args.label)
+        summarize(results, args.label or f'{args.evaluator}/{args.backend}')
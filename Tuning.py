@@ -0,0 +1,240 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import argparse
+import io
+import itertools
+import multiprocessing
+import time
+import chess
+import chess.pgn
+import numpy as np
+from Evaluate import evaluateScore, calculateRapid
+from Evaluate.evaluationjb import calculateTerms
+from Evaluate.evaluationjb2 import calculateRapidTerms
+from Evaluate.weights import TERMS, WEIGHTS, saveWeights
+from Utilities.Parallel import bounded_imap
+from Utilities.Streams import read_lines, read_pgn_games
+
+# Texel-style tuning of the evaluation weights, see https://www.chessprogramming.org/Texel%27s_Tuning_Method
+# Labelled positions are streamed from EPD or PGN files, the unweighted terms of an evaluator are extracted into a
+# NumPy feature matrix by a process pool and the weights are fitted with mini-batch gradient descent on the logistic
+# loss between sigmoid(K * score) and the game result.
+
+RESULTS = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5}
+TUNABLE = ('calculate', 'calculateRapid', 'eval')
+
+
+def readUnits(path: str):
+    """
+    Streams the raw text of a position file without parsing it. EPD files yield one line per position and PGN files
+    yield the text of one game at a time so the expensive parsing happens in the workers.
+    :param path: The EPD or PGN file
+    :return: A generator of (kind, text) tuples
+    """
+    if path.lower().endswith('.pgn'):
+        for game in read_pgn_games(path):
+            yield 'pgn', game
+    else:
+        for line in read_lines(path):
+            yield 'epd', line
+
+
+def epdLabel(operations):
+    'Game result stored in the c9 or result operation of an EPD record, None when unlabelled'
+    for opcode in ('c9', 'result'):
+        if opcode in operations:
+            return RESULTS.get(str(operations[opcode]).strip())
+    return None
+
+
+def extractTerms(evaluator: str, board: chess.Board):
+    'Unweighted terms of an evaluator from white\'s point of view'
+    if evaluator == 'calculate':
+        return calculateTerms(board, chess.WHITE)
+    elif evaluator == 'calculateRapid':
+        return calculateRapidTerms(board, chess.WHITE)
+    return [evaluateScore(board, chess.WHITE), calculateRapid(board, chess.WHITE)]
+
+
+def extractChunk(task):
+    """
+    Worker entry point. Parses a chunk of raw records and extracts the evaluator terms of every labelled position.
+    :param task: Tuple of (evaluator name, plies to skip at the start of PGN games, list of (kind, text) records)
+    :return: The feature matrix and the label vector of the chunk
+    """
+    evaluator, skipPlies, units = task
+    features = []
+    labels = []
+
+    for kind, text in units:
+        if kind == 'epd':
+            # evaluateScore needs the last move, which an EPD record does not carry
+            if evaluator == 'eval':
+                continue
+            try:
+                board, operations = chess.Board.from_epd(text)
+            except ValueError:
+                continue
+            label = epdLabel(operations)
+            if label is None:
+                continue
+            features.append(extractTerms(evaluator, board))
+            labels.append(label)
+        else:
+            game = chess.pgn.read_game(io.StringIO(text))
+            if game is None:
+                continue
+            label = RESULTS.get(game.headers.get('Result', '*'))
+            if label is None:
+                continue
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves(), start=1):
+                board.push(move)
+                if ply > skipPlies and board.outcome() is None:
+                    features.append(extractTerms(evaluator, board))
+                    labels.append(label)
+
+    width = len(TERMS[evaluator])
+    return np.asarray(features, dtype=np.float64).reshape(-1, width), np.asarray(labels, dtype=np.float64)
+
+
+def buildDataset(paths, evaluator: str, processes: int, chunkSize: int = 2000, skipPlies: int = 8):
+    """
+    Extracts the feature matrix of every position in the files. Only processes * 2 chunks are in flight at a time so
+    memory stays bounded by the size of the resulting matrix, not by the size of the input.
+    :return: The feature matrix and the label vector
+    """
+    units = itertools.chain.from_iterable(readUnits(path) for path in paths)
+    chunks = iter(lambda: list(itertools.islice(units, chunkSize)), [])
+    tasks = ((evaluator, skipPlies, chunk) for chunk in chunks)
+    featureParts, labelParts = [], []
+
+    with multiprocessing.Pool(processes) as pool:
+        for features, labels in bounded_imap(pool, extractChunk, tasks, processes * 2):
+            featureParts.append(features)
+            labelParts.append(labels)
+
+    width = len(TERMS[evaluator])
+    if not featureParts:
+        return np.empty((0, width)), np.empty(0)
+    return np.concatenate(featureParts), np.concatenate(labelParts)
+
+
+def applyCaps(features, caps):
+    'Vectorised capActivity and capKingSafety over the raw calculateRapid terms'
+    activityCap, kingSafetyCap, kingSafetyFloor = caps
+    capped = features.copy()
+    capped[:, 5] = np.clip(features[:, 5], -activityCap, activityCap)
+
+    safety = features[:, 6]
+    rounded = np.round(safety)
+    capped[:, 6] = np.select([rounded > kingSafetyCap, rounded < -kingSafetyCap, rounded == 0],
+                             [kingSafetyCap, kingSafetyFloor, np.where(safety > 0, 1.0, -1.0)], rounded)
+    return capped
+
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -50, 50)))
+
+
+def logLoss(scores, labels, scale):
+    p = np.clip(sigmoid(scale * scores), 1e-12, 1 - 1e-12)
+    return float(-np.mean(labels * np.log(p) + (1 - labels) * np.log(1 - p)))
+
+
+def fitScale(scores, labels):
+    'Golden section search for the K that best maps the current scores onto results'
+    low, high = 1e-4, 10.0
+    ratio = (5 ** 0.5 - 1) / 2
+    for _ in range(60):
+        a = high - ratio * (high - low)
+        b = low + ratio * (high - low)
+        if logLoss(scores, labels, a) < logLoss(scores, labels, b):
+            high = b
+        else:
+            low = a
+    return (low + high) / 2
+
+
+def fitWeights(features, labels, weights, scale, epochs=20, batchSize=4096, rate=0.01, seed=2022):
+    """
+    Mini-batch gradient descent with Adam on the logistic loss of sigmoid(scale * features @ weights). Terms whose
+    feature column is always zero cannot be fitted and keep their weight.
+    :return: The fitted weights
+    """
+    weights = np.asarray(weights, dtype=np.float64).copy()
+    trainable = np.any(features != 0, axis=0)
+    first = np.zeros_like(weights)
+    second = np.zeros_like(weights)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    rng = np.random.default_rng(seed)
+    step = 0
+
+    for _ in range(epochs):
+        order = rng.permutation(len(labels))
+        for start in range(0, len(order), batchSize):
+            batch = order[start:start + batchSize]
+            x = features[batch]
+            error = sigmoid(scale * (x @ weights)) - labels[batch]
+            gradient = scale * (x.T @ error) / len(batch)
+            gradient[~trainable] = 0
+
+            step += 1
+            first = beta1 * first + (1 - beta1) * gradient
+            second = beta2 * second + (1 - beta2) * gradient * gradient
+            weights -= rate * (first / (1 - beta1 ** step)) / (np.sqrt(second / (1 - beta2 ** step)) + epsilon)
+
+    return weights
+
+
+def tune(paths, evaluator='calculateRapid', output='weights.json', processes=None, chunkSize=2000, skipPlies=8,
+         epochs=20, batchSize=4096, rate=0.01):
+    """
+    Runs the whole pipeline and writes a weight file with the tuned section replaced
+    :return: The tuned weights of the evaluator
+    """
+    processes = processes or multiprocessing.cpu_count()
+
+    start = time.time()
+    features, labels = buildDataset(paths, evaluator, processes, chunkSize, skipPlies)
+    print(f'Extracted {len(labels)} positions in {time.time() - start:.1f}s')
+    if len(labels) == 0:
+        raise ValueError('No labelled positions found')
+
+    if evaluator == 'calculateRapid':
+        features = applyCaps(features, WEIGHTS['calculateRapidCaps'])
+
+    initial = np.asarray(WEIGHTS[evaluator], dtype=np.float64)
+    scale = fitScale(features @ initial, labels)
+    print(f'K = {scale:.4f}, loss before tuning {logLoss(features @ initial, labels, scale):.6f}')
+
+    start = time.time()
+    tuned = fitWeights(features, labels, initial, scale, epochs, batchSize, rate)
+    print(f'Loss after tuning {logLoss(features @ tuned, labels, scale):.6f} in {time.time() - start:.1f}s')
+    for term, before, after in zip(TERMS[evaluator], initial, tuned):
+        print(f'    {term:>16}: {before:10.4f} -> {after:10.4f}')
+
+    weights = {name: list(values) for name, values in WEIGHTS.items()}
+    weights[evaluator] = tuned.tolist()
+    saveWeights(output, weights)
+    print(f'Wrote {output}')
+    return tuned
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune evaluation weights on labelled EPD or PGN positions')
+    parser.add_argument('paths', nargs='+', help='EPD files with c9/result operations or PGN files with results')
+    parser.add_argument('--evaluator', choices=TUNABLE, default='calculateRapid')
+    parser.add_argument('--output', default='weights.json')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--skip-plies', type=int, default=8, help='Opening plies of each PGN game to ignore')
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    tune(args.paths, args.evaluator, args.output, args.processes, args.chunk_size, args.skip_plies, args.epochs,
+         args.batch_size, args.rate)
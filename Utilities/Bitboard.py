@@ -0,0 +1,860 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import chess
+from .Tables import TABLES, rows
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Board constants. Squares follow the python-chess convention (a1 = 0, h8 = 63) and pieces are encoded as a
+# single int, piece_type | (color << 3), so black pieces are 1-6 and white pieces are 9-14.
+
+BB_ALL = 0xFFFF_FFFF_FFFF_FFFF
+BB_SQUARES = [1 << sq for sq in range(64)]
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING
+WHITE_CODE = 8
+
+# Castling rights as a 4-bit mask
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+STARTING_FEN = chess.STARTING_FEN
+# Moves a board can push beyond the history it was built with, the undo stacks are preallocated to this size
+MAX_PLY = 1024
+
+
+# Attack, ray and Zobrist tables come from the mapped table file, see Utilities.Tables
+KNIGHT_ATTACKS = TABLES['knight']
+KING_ATTACKS = TABLES['king']
+PAWN_ATTACKS = rows(TABLES['pawn'], 64)
+
+# Rays pointing towards higher square indices are scanned from the low bit, the others from the high bit.
+RAY_N, RAY_E, RAY_NE, RAY_NW, RAY_S, RAY_W, RAY_SW, RAY_SE = rows(TABLES['rays'], 64)
+
+BISHOP_RAYS = [RAY_NE[sq] | RAY_NW[sq] | RAY_SW[sq] | RAY_SE[sq] for sq in range(64)]
+ROOK_RAYS = [RAY_N[sq] | RAY_E[sq] | RAY_S[sq] | RAY_W[sq] for sq in range(64)]
+QUEEN_RAYS = [BISHOP_RAYS[sq] | ROOK_RAYS[sq] for sq in range(64)]
+
+# Squares strictly between two squares sharing a line, 0 otherwise
+BETWEEN = rows(TABLES['between'], 64)
+
+# Castling rights that survive a move touching the square
+CASTLING_KEEP = [15] * 64
+CASTLING_KEEP[chess.A1] = 15 ^ WHITE_QUEENSIDE
+CASTLING_KEEP[chess.E1] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_KEEP[chess.H1] = 15 ^ WHITE_KINGSIDE
+CASTLING_KEEP[chess.A8] = 15 ^ BLACK_QUEENSIDE
+CASTLING_KEEP[chess.E8] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_KEEP[chess.H8] = 15 ^ BLACK_KINGSIDE
+
+# King destination -> (rook from, rook to)
+CASTLING_ROOK = {chess.G1: (chess.H1, chess.F1), chess.C1: (chess.A1, chess.D1),
+                 chess.G8: (chess.H8, chess.F8), chess.C8: (chess.A8, chess.D8)}
+
+# Zobrist keys. Seeded so keys are stable across processes.
+ZOBRIST_PIECE = rows(TABLES['zobrist'][:16 * 64], 64)
+ZOBRIST_CASTLING = TABLES['zobrist'][16 * 64:16 * 64 + 16]
+ZOBRIST_EP = TABLES['zobrist'][16 * 64 + 16:16 * 64 + 24]
+ZOBRIST_SIDE = TABLES['zobrist'][16 * 64 + 24]
+
+_PIECE_SYMBOLS = '.pnbrqk..PNBRQK'
+
+
+# Magic slider attack tables: the blockers on the relevant squares are hashed by a multiplication into the attack
+# table of the square
+BISHOP_MASK, BISHOP_MAGIC, BISHOP_SHIFT, BISHOP_OFFSET = \
+    TABLES['bishopMask'], TABLES['bishopMagic'], TABLES['bishopShift'], TABLES['bishopOffset']
+ROOK_MASK, ROOK_MAGIC, ROOK_SHIFT, ROOK_OFFSET = \
+    TABLES['rookMask'], TABLES['rookMagic'], TABLES['rookShift'], TABLES['rookOffset']
+BISHOP_ATTACKS = TABLES['bishopAttacks']
+ROOK_ATTACKS = TABLES['rookAttacks']
+
+
+def bishop_attacks(sq, occupied):
+    index = ((occupied & BISHOP_MASK[sq]) * BISHOP_MAGIC[sq] & BB_ALL) >> BISHOP_SHIFT[sq]
+    return BISHOP_ATTACKS[BISHOP_OFFSET[sq] + index]
+
+
+def rook_attacks(sq, occupied):
+    index = ((occupied & ROOK_MASK[sq]) * ROOK_MAGIC[sq] & BB_ALL) >> ROOK_SHIFT[sq]
+    return ROOK_ATTACKS[ROOK_OFFSET[sq] + index]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Moves are 16-bit ints: bits 0-5 from square, bits 6-11 to square, bits 12-14 promotion piece type.
+
+def encode_move(from_square, to_square, promotion=0):
+    return from_square | (to_square << 6) | ((promotion or 0) << 12)
+
+
+def move_to_chess(move):
+    """
+    Converts an integer move into a chess.Move
+    :param move: The 16-bit move
+    :return: The equivalent chess.Move
+    """
+    return chess.Move(move & 63, (move >> 6) & 63, (move >> 12) or None)
+
+
+def move_from_chess(move: chess.Move):
+    """
+    Converts a chess.Move into an integer move
+    :param move: The chess.Move
+    :return: The equivalent 16-bit move
+    """
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+class BitBoard:
+    """
+    Compact search board built from integer bitboards. Make and unmake write into preallocated per-ply
+    stacks, moves are plain ints and move generation is pseudo-legal with legality checked lazily by is_legal.
+    The query methods mirror the part of the chess.Board API the searchers and evaluators use (turn, pieces,
+    piece_at, is_check, legal_moves, push, pop, outcome, fen) so the board can be passed straight to tabular.
+    Only standard chess is supported.
+    """
+    def __init__(self, fen: str = STARTING_FEN, capacity: int = MAX_PLY):
+        """
+        :param fen: The position
+        :param capacity: The number of moves that can be pushed, the size of the undo stacks
+        """
+        self.bb = [0] * 16
+        self.occupied_co = [0, 0]
+        self.occupied = 0
+        self.mailbox = [0] * 64
+        self.turn = chess.WHITE
+        self.castling = 0
+        self.ep_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.key = 0
+        self.ply = 0
+
+        self._move_stack = [0] * capacity
+        self._captured_stack = [0] * capacity
+        self._castling_stack = [0] * capacity
+        self._ep_stack = [None] * capacity
+        self._halfmove_stack = [0] * capacity
+        self._key_stack = [0] * capacity
+
+        self.set_fen(fen)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Conversion
+
+    @classmethod
+    def from_board(cls, board: chess.Board):
+        """
+        Builds a BitBoard from a chess.Board, replaying the move stack so repetition history is kept
+        :param board: The chess.Board to convert
+        :return: The equivalent BitBoard
+        """
+        bitboard = cls(board.root().fen(), len(board.move_stack) + MAX_PLY)
+        for move in board.move_stack:
+            bitboard.push(move_from_chess(move))
+        return bitboard
+
+    def to_board(self):
+        """
+        Builds a chess.Board of the current position. The last move is replayed onto the board so evaluators that
+        inspect move_stack[-1] keep working; older history is not carried over.
+        :return: The equivalent chess.Board
+        """
+        if self.ply == 0:
+            return chess.Board(self.fen())
+        move = self.pop()
+        board = chess.Board(self.fen())
+        self.push(move)
+        board.push(move_to_chess(move))
+        return board
+
+    def set_fen(self, fen: str):
+        parts = fen.split()
+        placement, turn, castling, ep = parts[0], parts[1], parts[2], parts[3]
+
+        self.bb = [0] * 16
+        self.occupied_co = [0, 0]
+        self.mailbox = [0] * 64
+        rank, file = 7, 0
+        for char in placement:
+            if char == '/':
+                rank -= 1
+                file = 0
+            elif char.isdigit():
+                file += int(char)
+            else:
+                piece = _PIECE_SYMBOLS.index(char)
+                sq = rank * 8 + file
+                self.bb[piece] |= BB_SQUARES[sq]
+                self.occupied_co[piece >> 3] |= BB_SQUARES[sq]
+                self.mailbox[sq] = piece
+                file += 1
+        self.occupied = self.occupied_co[0] | self.occupied_co[1]
+
+        self.turn = turn == 'w'
+        self.castling = 0
+        for char, right in (('K', WHITE_KINGSIDE), ('Q', WHITE_QUEENSIDE), ('k', BLACK_KINGSIDE), ('q', BLACK_QUEENSIDE)):
+            if char in castling:
+                self.castling |= right
+        self.ep_square = None if ep == '-' else chess.parse_square(ep)
+        self.halfmove_clock = int(parts[4]) if len(parts) > 4 else 0
+        self.fullmove_number = int(parts[5]) if len(parts) > 5 else 1
+        self.ply = 0
+        self.key = self._compute_key()
+
+    def fen(self):
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ''
+            empty = 0
+            for file in range(8):
+                piece = self.mailbox[rank * 8 + file]
+                if piece:
+                    if empty:
+                        row += str(empty)
+                        empty = 0
+                    row += _PIECE_SYMBOLS[piece]
+                else:
+                    empty += 1
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ''
+        for char, right in (('K', WHITE_KINGSIDE), ('Q', WHITE_QUEENSIDE), ('k', BLACK_KINGSIDE), ('q', BLACK_QUEENSIDE)):
+            if self.castling & right:
+                castling += char
+
+        # Only report the en passant square when a pawn can actually capture onto it
+        ep = '-'
+        if self.ep_square is not None and PAWN_ATTACKS[not self.turn][self.ep_square] & self.bb[PAWN | (self.turn << 3)]:
+            ep = chess.SQUARE_NAMES[self.ep_square]
+
+        return f"{'/'.join(rows)} {'w' if self.turn else 'b'} {castling or '-'} {ep} " \
+               f"{self.halfmove_clock} {self.fullmove_number}"
+
+    def _compute_key(self):
+        key = 0
+        for sq in range(64):
+            if self.mailbox[sq]:
+                key ^= ZOBRIST_PIECE[self.mailbox[sq]][sq]
+        key ^= ZOBRIST_CASTLING[self.castling]
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EP[self.ep_square & 7]
+        if not self.turn:
+            key ^= ZOBRIST_SIDE
+        return key
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Queries mirroring chess.Board
+
+    def pieces_mask(self, piece_type, color):
+        return self.bb[piece_type | (color << 3)]
+
+    def pieces(self, piece_type, color):
+        return chess.SquareSet(self.bb[piece_type | (color << 3)])
+
+    def piece_type_at(self, sq):
+        return self.mailbox[sq] & 7 or None
+
+    def piece_at(self, sq):
+        piece = self.mailbox[sq]
+        if not piece:
+            return None
+        return chess.Piece(piece & 7, bool(piece >> 3))
+
+    def king(self, color):
+        king = self.bb[KING | (color << 3)]
+        return king.bit_length() - 1 if king else None
+
+    def attacks_mask(self, sq):
+        piece = self.mailbox[sq]
+        piece_type = piece & 7
+        if piece_type == PAWN:
+            return PAWN_ATTACKS[piece >> 3][sq]
+        elif piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        elif piece_type == BISHOP:
+            return bishop_attacks(sq, self.occupied)
+        elif piece_type == ROOK:
+            return rook_attacks(sq, self.occupied)
+        elif piece_type == QUEEN:
+            return bishop_attacks(sq, self.occupied) | rook_attacks(sq, self.occupied)
+        elif piece_type == KING:
+            return KING_ATTACKS[sq]
+        return 0
+
+    def attackers_mask(self, color, sq, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
+        bb = self.bb
+        code = color << 3
+        queens = bb[QUEEN | code]
+        return (PAWN_ATTACKS[not color][sq] & bb[PAWN | code]) | (KNIGHT_ATTACKS[sq] & bb[KNIGHT | code]) | \
+               (KING_ATTACKS[sq] & bb[KING | code]) | \
+               (bishop_attacks(sq, occupied) & (bb[BISHOP | code] | queens)) | \
+               (rook_attacks(sq, occupied) & (bb[ROOK | code] | queens))
+
+    def attackers(self, color, sq):
+        return chess.SquareSet(self.attackers_mask(color, sq))
+
+    def is_attacked_by(self, color, sq):
+        bb = self.bb
+        code = color << 3
+        if PAWN_ATTACKS[not color][sq] & bb[PAWN | code] or KNIGHT_ATTACKS[sq] & bb[KNIGHT | code] or \
+                KING_ATTACKS[sq] & bb[KING | code]:
+            return True
+        queens = bb[QUEEN | code]
+        if BISHOP_RAYS[sq] & (bb[BISHOP | code] | queens) and \
+                bishop_attacks(sq, self.occupied) & (bb[BISHOP | code] | queens):
+            return True
+        if ROOK_RAYS[sq] & (bb[ROOK | code] | queens) and rook_attacks(sq, self.occupied) & (bb[ROOK | code] | queens):
+            return True
+        return False
+
+    def pinned_mask(self, color):
+        """
+        Finds the pieces of color pinned to their own king by an enemy slider
+        :param color: The color of the king
+        :return: A bitboard of the pinned pieces
+        """
+        bb = self.bb
+        king = bb[KING | (color << 3)]
+        if not king:
+            return 0
+        king_square = king.bit_length() - 1
+        code = (not color) << 3
+        queens = bb[QUEEN | code]
+        snipers = (ROOK_RAYS[king_square] & (bb[ROOK | code] | queens)) | \
+                  (BISHOP_RAYS[king_square] & (bb[BISHOP | code] | queens))
+        occupied = self.occupied
+        own = self.occupied_co[color]
+        pinned = 0
+        while snipers:
+            low = snipers & -snipers
+            snipers ^= low
+            blockers = BETWEEN[king_square][low.bit_length() - 1] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+        return pinned
+
+    def is_check(self):
+        king = self.bb[KING | (self.turn << 3)]
+        return bool(king) and self.is_attacked_by(not self.turn, king.bit_length() - 1)
+
+    @property
+    def move_stack(self):
+        return self._move_stack[:self.ply]
+
+    def peek(self):
+        return self._move_stack[self.ply - 1]
+
+    def peek_captured(self):
+        'Type of the piece that stood on the target square of the last move, 0 when it was empty'
+        if self.ply == 0:
+            raise IndexError('peek_captured on an empty move stack')
+        return self._captured_stack[self.ply - 1] & 7
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Make / unmake
+
+    def push(self, move):
+        """
+        Makes a pseudo-legal move. All undo information is written into the preallocated per-ply stacks.
+        :param move: The 16-bit move
+        """
+        ply = self.ply
+        bb = self.bb
+        mailbox = self.mailbox
+        occupied_co = self.occupied_co
+        ep_square = self.ep_square
+        castling = self.castling
+
+        self._move_stack[ply] = move
+        self._castling_stack[ply] = castling
+        self._ep_stack[ply] = ep_square
+        self._halfmove_stack[ply] = self.halfmove_clock
+        self._key_stack[ply] = self.key
+
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        promotion = move >> 12
+        piece = mailbox[from_square]
+        piece_type = piece & 7
+        us = self.turn
+        captured = mailbox[to_square]
+        self._captured_stack[ply] = captured
+
+        key = self.key ^ ZOBRIST_SIDE
+        if ep_square is not None:
+            key ^= ZOBRIST_EP[ep_square & 7]
+
+        self.halfmove_clock += 1
+        if captured:
+            to_mask = BB_SQUARES[to_square]
+            bb[captured] ^= to_mask
+            occupied_co[not us] ^= to_mask
+            key ^= ZOBRIST_PIECE[captured][to_square]
+            self.halfmove_clock = 0
+
+        from_to = BB_SQUARES[from_square] | BB_SQUARES[to_square]
+        bb[piece] ^= from_to
+        occupied_co[us] ^= from_to
+        mailbox[from_square] = 0
+        mailbox[to_square] = piece
+        key ^= ZOBRIST_PIECE[piece][from_square] ^ ZOBRIST_PIECE[piece][to_square]
+
+        self.ep_square = None
+        if piece_type == PAWN:
+            self.halfmove_clock = 0
+            if to_square == ep_square:
+                capture_square = to_square ^ 8
+                enemy_pawn = PAWN | ((not us) << 3)
+                bb[enemy_pawn] ^= BB_SQUARES[capture_square]
+                occupied_co[not us] ^= BB_SQUARES[capture_square]
+                mailbox[capture_square] = 0
+                key ^= ZOBRIST_PIECE[enemy_pawn][capture_square]
+            elif to_square - from_square == 16 or from_square - to_square == 16:
+                self.ep_square = (from_square + to_square) >> 1
+                key ^= ZOBRIST_EP[from_square & 7]
+            elif promotion:
+                promoted = promotion | (us << 3)
+                bb[piece] ^= BB_SQUARES[to_square]
+                bb[promoted] |= BB_SQUARES[to_square]
+                mailbox[to_square] = promoted
+                key ^= ZOBRIST_PIECE[piece][to_square] ^ ZOBRIST_PIECE[promoted][to_square]
+        elif piece_type == KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            rook_from, rook_to = CASTLING_ROOK[to_square]
+            rook = ROOK | (us << 3)
+            rook_mask = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            bb[rook] ^= rook_mask
+            occupied_co[us] ^= rook_mask
+            mailbox[rook_from] = 0
+            mailbox[rook_to] = rook
+            key ^= ZOBRIST_PIECE[rook][rook_from] ^ ZOBRIST_PIECE[rook][rook_to]
+
+        if castling:
+            new_castling = castling & CASTLING_KEEP[from_square] & CASTLING_KEEP[to_square]
+            if new_castling != castling:
+                key ^= ZOBRIST_CASTLING[castling] ^ ZOBRIST_CASTLING[new_castling]
+                self.castling = new_castling
+
+        if not us:
+            self.fullmove_number += 1
+        self.occupied = occupied_co[0] | occupied_co[1]
+        self.turn = not us
+        self.key = key
+        self.ply = ply + 1
+
+    def pop(self):
+        """
+        Unmakes the last move
+        :return: The move that was unmade
+        """
+        ply = self.ply - 1
+        self.ply = ply
+        bb = self.bb
+        mailbox = self.mailbox
+        occupied_co = self.occupied_co
+
+        move = self._move_stack[ply]
+        captured = self._captured_stack[ply]
+        ep_square = self._ep_stack[ply]
+        self.castling = self._castling_stack[ply]
+        self.ep_square = ep_square
+        self.halfmove_clock = self._halfmove_stack[ply]
+        self.key = self._key_stack[ply]
+
+        us = not self.turn
+        self.turn = us
+        if not us:
+            self.fullmove_number -= 1
+
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        piece = mailbox[to_square]
+
+        if move >> 12:
+            pawn = PAWN | (us << 3)
+            bb[piece] ^= BB_SQUARES[to_square]
+            bb[pawn] |= BB_SQUARES[to_square]
+            piece = pawn
+
+        from_to = BB_SQUARES[from_square] | BB_SQUARES[to_square]
+        bb[piece] ^= from_to
+        occupied_co[us] ^= from_to
+        mailbox[from_square] = piece
+        mailbox[to_square] = captured
+
+        piece_type = piece & 7
+        if captured:
+            bb[captured] |= BB_SQUARES[to_square]
+            occupied_co[not us] |= BB_SQUARES[to_square]
+        elif piece_type == PAWN and to_square == ep_square:
+            capture_square = to_square ^ 8
+            enemy_pawn = PAWN | ((not us) << 3)
+            bb[enemy_pawn] |= BB_SQUARES[capture_square]
+            occupied_co[not us] |= BB_SQUARES[capture_square]
+            mailbox[capture_square] = enemy_pawn
+        elif piece_type == KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            rook_from, rook_to = CASTLING_ROOK[to_square]
+            rook = ROOK | (us << 3)
+            rook_mask = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            bb[rook] ^= rook_mask
+            occupied_co[us] ^= rook_mask
+            mailbox[rook_to] = 0
+            mailbox[rook_from] = rook
+
+        self.occupied = occupied_co[0] | occupied_co[1]
+        return move
+
+    def push_uci(self, uci: str):
+        move = move_from_chess(chess.Move.from_uci(uci))
+        self.push(move)
+        return move
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Move generation
+
+    def generate_pseudo_legal(self, out, captures=True, quiets=True):
+        """
+        Appends pseudo-legal moves to a caller supplied list. Captures covers captures, en passant and promotions,
+        quiets covers everything else including castling.
+        :param out: The list to append the moves to
+        :param captures: Whether to generate captures and promotions
+        :param quiets: Whether to generate quiet moves
+        :return: The list that was passed in
+        """
+        us = self.turn
+        code = us << 3
+        bb = self.bb
+        occupied = self.occupied
+        enemy = self.occupied_co[not us]
+        append = out.append
+
+        targets = 0
+        if captures:
+            targets |= enemy
+        if quiets:
+            targets |= ~occupied & BB_ALL
+
+        if targets:
+            pieces = bb[KNIGHT | code]
+            while pieces:
+                low = pieces & -pieces
+                pieces ^= low
+                from_square = low.bit_length() - 1
+                attacks = KNIGHT_ATTACKS[from_square] & targets
+                while attacks:
+                    to = attacks & -attacks
+                    attacks ^= to
+                    append(from_square | (to.bit_length() - 1) << 6)
+
+            pieces = bb[BISHOP | code] | bb[QUEEN | code]
+            while pieces:
+                low = pieces & -pieces
+                pieces ^= low
+                from_square = low.bit_length() - 1
+                attacks = bishop_attacks(from_square, occupied) & targets
+                while attacks:
+                    to = attacks & -attacks
+                    attacks ^= to
+                    append(from_square | (to.bit_length() - 1) << 6)
+
+            pieces = bb[ROOK | code] | bb[QUEEN | code]
+            while pieces:
+                low = pieces & -pieces
+                pieces ^= low
+                from_square = low.bit_length() - 1
+                attacks = rook_attacks(from_square, occupied) & targets
+                while attacks:
+                    to = attacks & -attacks
+                    attacks ^= to
+                    append(from_square | (to.bit_length() - 1) << 6)
+
+            king = bb[KING | code]
+            if king:
+                from_square = king.bit_length() - 1
+                attacks = KING_ATTACKS[from_square] & targets
+                while attacks:
+                    to = attacks & -attacks
+                    attacks ^= to
+                    append(from_square | (to.bit_length() - 1) << 6)
+
+        # Pawns
+        pawns = bb[PAWN | code]
+        forward = 8 if us else -8
+        promotion_rank = 7 if us else 0
+        start_rank = 1 if us else 6
+        ep_square = self.ep_square
+        while pawns:
+            low = pawns & -pawns
+            pawns ^= low
+            from_square = low.bit_length() - 1
+            to_square = from_square + forward
+            promoting = to_square >> 3 == promotion_rank
+
+            if captures:
+                attacks = PAWN_ATTACKS[us][from_square]
+                hits = attacks & enemy
+                while hits:
+                    to = hits & -hits
+                    hits ^= to
+                    move = from_square | (to.bit_length() - 1) << 6
+                    if promoting:
+                        append(move | QUEEN << 12)
+                        append(move | ROOK << 12)
+                        append(move | BISHOP << 12)
+                        append(move | KNIGHT << 12)
+                    else:
+                        append(move)
+                if ep_square is not None and attacks & BB_SQUARES[ep_square]:
+                    append(from_square | ep_square << 6)
+
+            if not occupied & BB_SQUARES[to_square]:
+                move = from_square | to_square << 6
+                if promoting:
+                    if captures:
+                        append(move | QUEEN << 12)
+                        append(move | ROOK << 12)
+                        append(move | BISHOP << 12)
+                        append(move | KNIGHT << 12)
+                elif quiets:
+                    append(move)
+                    if from_square >> 3 == start_rank and not occupied & BB_SQUARES[to_square + forward]:
+                        append(from_square | (to_square + forward) << 6)
+
+        # Castling, the king may not start on, pass through or land on an attacked square
+        if quiets and self.castling:
+            them = not us
+            if us:
+                if self.castling & WHITE_KINGSIDE and not occupied & 0x60 and not self.is_attacked_by(them, 4) \
+                        and not self.is_attacked_by(them, 5) and not self.is_attacked_by(them, 6):
+                    append(4 | 6 << 6)
+                if self.castling & WHITE_QUEENSIDE and not occupied & 0x0E and not self.is_attacked_by(them, 4) \
+                        and not self.is_attacked_by(them, 3) and not self.is_attacked_by(them, 2):
+                    append(4 | 2 << 6)
+            else:
+                if self.castling & BLACK_KINGSIDE and not occupied & (0x60 << 56) and not self.is_attacked_by(them, 60) \
+                        and not self.is_attacked_by(them, 61) and not self.is_attacked_by(them, 62):
+                    append(60 | 62 << 6)
+                if self.castling & BLACK_QUEENSIDE and not occupied & (0x0E << 56) and \
+                        not self.is_attacked_by(them, 60) and not self.is_attacked_by(them, 59) \
+                        and not self.is_attacked_by(them, 58):
+                    append(60 | 58 << 6)
+
+        return out
+
+    def is_legal(self, move, in_check=None, pinned=None):
+        """
+        Lazily checks whether a pseudo-legal move leaves the mover's king safe. Outside of check only king moves,
+        en passant and moves of pinned pieces need a closer look, the rest are legal without a make/unmake.
+        :param move: The pseudo-legal move
+        :param in_check: Whether the side to move is in check, computed when not given
+        :param pinned: The pinned_mask of the side to move, computed when not given
+        :return: True if the move is legal
+        """
+        us = self.turn
+        king = self.bb[KING | (us << 3)]
+        if not king:
+            return True
+        king_square = king.bit_length() - 1
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+
+        if from_square == king_square:
+            if to_square - from_square == 2 or from_square - to_square == 2:
+                # Castling legality is fully checked during generation
+                return True
+            return not self.attackers_mask(not us, to_square, self.occupied ^ king)
+
+        if in_check is None:
+            in_check = self.is_attacked_by(not us, king_square)
+        if not in_check and not (to_square == self.ep_square and self.mailbox[from_square] & 7 == PAWN):
+            if pinned is None:
+                pinned = self.pinned_mask(us)
+            if not pinned & BB_SQUARES[from_square]:
+                return True
+            # A pinned piece may only slide along the pin line
+            return bool(BETWEEN[king_square][from_square] & BB_SQUARES[to_square]
+                        or BETWEEN[king_square][to_square] & BB_SQUARES[from_square])
+
+        self.push(move)
+        legal = not self.is_attacked_by(not us, king_square)
+        self.pop()
+        return legal
+
+    def is_pseudo_legal(self, move):
+        """
+        Checks a move that did not come from the generator, such as a move from the memo table, against the position
+        :param move: The 16-bit move
+        :return: True if generate_pseudo_legal would produce the move
+        """
+        us = self.turn
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        promotion = move >> 12
+        piece = self.mailbox[from_square]
+        if not piece or (piece >> 3) != us or self.occupied_co[us] & BB_SQUARES[to_square]:
+            return False
+
+        if piece & 7 == PAWN:
+            if to_square >> 3 == (7 if us else 0):
+                if not KNIGHT <= promotion <= QUEEN:
+                    return False
+            elif promotion:
+                return False
+            if PAWN_ATTACKS[us][from_square] & BB_SQUARES[to_square]:
+                return bool(self.occupied_co[not us] & BB_SQUARES[to_square]) or to_square == self.ep_square
+            forward = 8 if us else -8
+            if to_square == from_square + forward:
+                return not self.occupied & BB_SQUARES[to_square]
+            if to_square == from_square + 2 * forward and from_square >> 3 == (1 if us else 6):
+                return not self.occupied & (BB_SQUARES[from_square + forward] | BB_SQUARES[to_square])
+            return False
+
+        if promotion:
+            return False
+        if piece & 7 == KING and (to_square - from_square == 2 or from_square - to_square == 2):
+            return move in self.generate_pseudo_legal([], captures=False)
+        return bool(self.attacks_mask(from_square) & BB_SQUARES[to_square])
+
+    def generate_legal_moves(self):
+        in_check = self.is_check()
+        pinned = 0 if in_check else self.pinned_mask(self.turn)
+        for move in self.generate_pseudo_legal([]):
+            if self.is_legal(move, in_check, pinned):
+                yield move
+
+    @property
+    def legal_moves(self):
+        return list(self.generate_legal_moves())
+
+    def has_legal_move(self):
+        for _ in self.generate_legal_moves():
+            return True
+        return False
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Game end
+
+    def is_insufficient_material(self):
+        bb = self.bb
+        if bb[PAWN] | bb[PAWN | WHITE_CODE] | bb[ROOK] | bb[ROOK | WHITE_CODE] | bb[QUEEN] | bb[QUEEN | WHITE_CODE]:
+            return False
+        knights = bb[KNIGHT] | bb[KNIGHT | WHITE_CODE]
+        bishops = bb[BISHOP] | bb[BISHOP | WHITE_CODE]
+        if bin(knights | bishops).count('1') <= 1:
+            return True
+        # Only bishops, all on the same square colour
+        return not knights and (not bishops & chess.BB_DARK_SQUARES or not bishops & chess.BB_LIGHT_SQUARES)
+
+    def is_repetition(self, count=3):
+        key = self.key
+        seen = 1
+        ply = self.ply - 2
+        stop = self.ply - self.halfmove_clock
+        while ply >= stop and ply >= 0:
+            if self._key_stack[ply] == key:
+                seen += 1
+                if seen >= count:
+                    return True
+            ply -= 2
+        return False
+
+    def is_seventyfive_moves(self):
+        return self.halfmove_clock >= 150 and self.has_legal_move()
+
+    def is_fivefold_repetition(self):
+        return self.is_repetition(5)
+
+    def outcome(self):
+        """
+        Mirrors chess.Board.outcome() without claimable draws
+        :return: A chess.Outcome or None when the game is not over
+        """
+        if not self.has_legal_move():
+            if self.is_check():
+                return chess.Outcome(chess.Termination.CHECKMATE, not self.turn)
+            return chess.Outcome(chess.Termination.STALEMATE, None)
+        if self.is_insufficient_material():
+            return chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+        if self.halfmove_clock >= 150:
+            return chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+        if self.is_repetition(5):
+            return chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+        return None
+
+    def __str__(self):
+        return str(chess.BaseBoard(self.fen().split()[0]))
+
+
+def evaluation_for(evaluation):
+    """
+    Wraps an evaluation function so it can be called with a BitBoard. Evaluators marked with a truthy
+    bitboard_native attribute only use the shared query API and receive the BitBoard directly, the rest receive an
+    equivalent chess.Board.
+    :param evaluation: The evaluation function
+    :return: An evaluation function accepting a BitBoard
+    """
+    if getattr(evaluation, 'bitboard_native', False):
+        return evaluation
+
+    def adapted(board, color, context=None, alpha=None, beta=None):
+        # The node context describes the BitBoard, so it is not handed on with the converted board
+        return evaluation(board.to_board(), color, alpha=alpha, beta=beta)
+
+    return adapted
+
+
+def perft(board: BitBoard, depth: int):
+    """
+    Counts the leaf nodes of the legal move tree, see https://www.chessprogramming.org/Perft
+    :param board: The board to count from
+    :param depth: The depth to count to
+    :return: The number of leaf nodes
+    """
+    if depth == 0:
+        return 1
+    in_check = board.is_check()
+    pinned = 0 if in_check else board.pinned_mask(board.turn)
+    nodes = 0
+    for move in board.generate_pseudo_legal([]):
+        if not board.is_legal(move, in_check, pinned):
+            continue
+        if depth == 1:
+            nodes += 1
+        else:
+            board.push(move)
+            nodes += perft(board, depth - 1)
+            board.pop()
+    return nodes
+
+
+# Positions and node counts from https://www.chessprogramming.org/Perft_Results
+PERFT_SUITE = [
+    (STARTING_FEN, [20, 400, 8902, 197281]),
+    ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862]),
+    ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238]),
+    ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467]),
+    ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379]),
+    ('r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', [46, 2079, 89890]),
+]
+
+
+def verify_perft(max_depth: int = 3):
+    """
+    Runs the perft suite up to max_depth and raises an AssertionError on the first mismatch
+    :param max_depth: The deepest perft to run for each position
+    """
+    for fen, counts in PERFT_SUITE:
+        board = BitBoard(fen)
+        for depth, expected in enumerate(counts[:max_depth], start=1):
+            nodes = perft(board, depth)
+            assert nodes == expected, f'perft({depth}) of {fen} returned {nodes}, expected {expected}'
+            assert board.fen() == chess.Board(fen).fen(), 'board was not restored after perft'
+
+
+if __name__ == '__main__':
+    verify_perft(4)
+    print('perft verified')
@@ -2,11 +2,18 @@ import chess
 
 #Base node class for chess engine
 class Node(object):
+    #Slots keep the per-node footprint small, search trees hold hundreds of thousands of these
+    __slots__ = ('move', 'score', 'children', 'parent', 'visits', 'prior', 'virtual_loss')
+
     #Initialize tree node with name of the move and the score associated to the move
-    def __init__(self, move, score):
+    def __init__(self, move, score, prior=1.0, parent=None):
         self.move = move
         self.score = score
         self.children = []
+        self.parent = parent
+        self.visits = 0
+        self.prior = prior
+        self.virtual_loss = 0
 
     #Add the next move as a child node
     def next_move(self, obj):
@@ -15,3 +22,17 @@ class Node(object):
     #Checks to see if the node has children
     def has_children(self):
         return len(self.children) > 0
+
+    #Mean score of the node, counting pending virtual losses as lost playouts
+    def value(self):
+        visits = self.visits + self.virtual_loss
+        if visits == 0:
+            return 0.0
+        return (self.score - self.virtual_loss) / visits
+
+    #Finds the child reached by a move, None if it was never expanded
+    def child(self, move):
+        for child in self.children:
+            if child.move == move:
+                return child
+        return None
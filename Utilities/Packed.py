@@ -0,0 +1,311 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import random
+import time
+import chess
+import numpy as np
+from .Bitboard import BitBoard, PAWN_ATTACKS, PAWN, encode_move, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Fixed-size binary positions, 32 bytes instead of the 60 or so of a FEN, for caches, datasets and passing positions
+# between processes. The layout, all integers little-endian:
+#
+#   bytes  0-7   occupancy bitboard
+#   bytes  8-23  one nibble per occupied square in ascending square order, low nibble first, piece_type | color << 3
+#                as in Utilities.Bitboard (black 1-6, white 9-14). A position has at most 32 pieces.
+#   byte   24    bit 0 white to move, bits 1-4 castling rights (K, Q, k, q)
+#   byte   25    en passant file | 8 when a pawn can legally capture en passant, 0 otherwise
+#   bytes 26-27  halfmove clock
+#   bytes 28-29  fullmove number
+#   bytes 30-31  zero
+#
+# Castling rights are the standard ones of the rooks on their original squares, like the FEN of chess.Board, and the
+# en passant square is only kept when an en passant capture is legal, like in the FEN of chess.Board, so two boards
+# with the same FEN pack to the same bytes whatever their backend and whether the square was set by a move or a FEN.
+
+PACKED_SIZE = 32
+MAX_PIECES = 32
+
+# Castling bits of byte 24 and the rook square of every right
+CASTLING_ROOKS = ((WHITE_KINGSIDE, chess.H1), (WHITE_QUEENSIDE, chess.A1), (BLACK_KINGSIDE, chess.H8),
+                  (BLACK_QUEENSIDE, chess.A8))
+
+_SQUARES = np.arange(64, dtype=np.uint64)
+_SQUARE_BITS = np.left_shift(np.uint64(1), _SQUARES)
+
+
+def _legal_ep(board: BitBoard):
+    'The en passant square of a BitBoard when a pawn can capture there legally, like chess.Board.has_legal_en_passant'
+    ep_square = board.ep_square
+    if ep_square is None:
+        return None
+    pawns = PAWN_ATTACKS[not board.turn][ep_square] & board.bb[PAWN | (board.turn << 3)]
+    while pawns:
+        from_square = (pawns & -pawns).bit_length() - 1
+        if board.is_legal(encode_move(from_square, ep_square)):
+            return ep_square
+        pawns &= pawns - 1
+    return None
+
+
+def _board_state(board):
+    """
+    The fields of a board that are packed
+    :param board: A chess.Board or a Utilities.Bitboard.BitBoard
+    :return: Tuple of the occupancy, the white pieces, the six piece type masks, whether white is to move, the castling
+    bits, the en passant square or None and the two clocks
+    """
+    if isinstance(board, BitBoard):
+        bb = board.bb
+        masks = tuple(bb[piece_type] | bb[piece_type | 8] for piece_type in range(1, 7))
+        return (board.occupied, board.occupied_co[chess.WHITE], masks, board.turn, board.castling, _legal_ep(board),
+                board.halfmove_clock, board.fullmove_number)
+
+    rights = board.clean_castling_rights()
+    castling = 0
+    for bit, rook in CASTLING_ROOKS:
+        if rights & chess.BB_SQUARES[rook]:
+            castling |= bit
+    ep_square = board.ep_square if board.ep_square is not None and board.has_legal_en_passant() else None
+    return (board.occupied, board.occupied_co[chess.WHITE],
+            (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings), board.turn, castling,
+            ep_square, board.halfmove_clock, board.fullmove_number)
+
+
+def _trailer(turn, castling, ep_square, halfmove_clock, fullmove_number):
+    'Bytes 24-31 as an integer'
+    ep = 0 if ep_square is None else (ep_square & 7) | 8
+    return (bool(turn) | castling << 1) | ep << 8 | min(halfmove_clock, 0xFFFF) << 16 | \
+        min(fullmove_number, 0xFFFF) << 32
+
+
+def pack(board):
+    """
+    Packs a position into 32 bytes
+    :param board: A chess.Board or a Utilities.Bitboard.BitBoard
+    :return: The packed position as bytes
+    """
+    occupied, white, masks, turn, castling, ep_square, halfmove_clock, fullmove_number = _board_state(board)
+    if occupied.bit_count() > MAX_PIECES:
+        raise ValueError(f'Cannot pack a position with more than {MAX_PIECES} pieces')
+
+    pawns, knights, bishops, rooks, queens, kings = masks
+    nibbles = 0
+    shift = 0
+    remaining = occupied
+    while remaining:
+        bit = remaining & -remaining
+        remaining ^= bit
+        if pawns & bit:
+            code = 1
+        elif knights & bit:
+            code = 2
+        elif bishops & bit:
+            code = 3
+        elif rooks & bit:
+            code = 4
+        elif queens & bit:
+            code = 5
+        else:
+            code = 6
+        if white & bit:
+            code |= 8
+        nibbles |= code << shift
+        shift += 4
+
+    return (occupied | nibbles << 64 | _trailer(turn, castling, ep_square, halfmove_clock, fullmove_number) << 192) \
+        .to_bytes(PACKED_SIZE, 'little')
+
+
+def unpack(data) -> chess.Board:
+    """
+    Builds the chess.Board of a packed position, without move history
+    :param data: The 32 bytes of pack
+    :return: The chess.Board
+    """
+    value = int.from_bytes(data[:PACKED_SIZE], 'little')
+    occupied = value & 0xFFFF_FFFF_FFFF_FFFF
+    nibbles = value >> 64
+    masks = [0] * 16
+    remaining = occupied
+    while remaining:
+        bit = remaining & -remaining
+        remaining ^= bit
+        masks[nibbles & 15] |= bit
+        nibbles >>= 4
+    trailer = value >> 192
+    return _build(masks, trailer & 1, (trailer >> 1) & 15, (trailer >> 8) & 15, (trailer >> 16) & 0xFFFF,
+                  (trailer >> 32) & 0xFFFF)
+
+
+def _build(masks, turn, castling, ep, halfmove_clock, fullmove_number):
+    'chess.Board from piece masks indexed by piece code and the decoded trailer fields'
+    board = chess.Board(None)
+    board.pawns = masks[1] | masks[9]
+    board.knights = masks[2] | masks[10]
+    board.bishops = masks[3] | masks[11]
+    board.rooks = masks[4] | masks[12]
+    board.queens = masks[5] | masks[13]
+    board.kings = masks[6] | masks[14]
+    board.occupied_co[chess.WHITE] = masks[9] | masks[10] | masks[11] | masks[12] | masks[13] | masks[14]
+    board.occupied_co[chess.BLACK] = masks[1] | masks[2] | masks[3] | masks[4] | masks[5] | masks[6]
+    board.occupied = board.occupied_co[chess.WHITE] | board.occupied_co[chess.BLACK]
+    board.promoted = 0
+
+    board.turn = bool(turn)
+    board.castling_rights = 0
+    for bit, rook in CASTLING_ROOKS:
+        if castling & bit:
+            board.castling_rights |= chess.BB_SQUARES[rook]
+    board.ep_square = (ep & 7) + (40 if turn else 16) if ep & 8 else None
+    board.halfmove_clock = halfmove_clock
+    board.fullmove_number = fullmove_number
+    return board
+
+
+def pack_batch(boards) -> np.ndarray:
+    """
+    Packs many positions at once. Only reading the bitboards of each board is done per board, placing the pieces into
+    the nibble list is vectorised.
+    :param boards: chess.Board or Utilities.Bitboard.BitBoard objects
+    :return: A uint8 array of shape (len(boards), 32), row i is pack(boards[i])
+    """
+    states = [_board_state(board) for board in boards]
+    count = len(states)
+    packed = np.zeros((count, PACKED_SIZE), dtype=np.uint8)
+    if not count:
+        return packed
+
+    occupied = np.array([state[0] for state in states], dtype=np.uint64)
+    white = np.array([state[1] for state in states], dtype=np.uint64)
+    masks = np.array([state[2] for state in states], dtype=np.uint64)
+    trailers = np.array([_trailer(*state[3:]) for state in states], dtype=np.uint64)
+
+    # Piece code of every square, then the codes of the occupied squares moved to the front in square order
+    codes = np.zeros((count, 64), dtype=np.uint8)
+    for piece_type in range(6):
+        present = (masks[:, piece_type, None] >> _SQUARES) & np.uint64(1)
+        codes |= (present * np.uint64(piece_type + 1)).astype(np.uint8)
+    codes |= (((white[:, None] >> _SQUARES) & np.uint64(1)) << np.uint64(3)).astype(np.uint8)
+    occupancy = ((occupied[:, None] >> _SQUARES) & np.uint64(1)).astype(bool)
+    if (occupancy.sum(axis=1) > MAX_PIECES).any():
+        raise ValueError(f'Cannot pack a position with more than {MAX_PIECES} pieces')
+    order = np.argsort(~occupancy, axis=1, kind='stable')[:, :MAX_PIECES]
+    listed = np.take_along_axis(codes, order, axis=1)
+
+    packed[:, 0:8] = occupied.astype('<u8').view(np.uint8).reshape(count, 8)
+    packed[:, 8:24] = listed[:, 0::2] | (listed[:, 1::2] << 4)
+    packed[:, 24:32] = trailers.astype('<u8').view(np.uint8).reshape(count, 8)
+    return packed
+
+
+def decode_batch(packed: np.ndarray):
+    """
+    Vectorised decoding of packed positions into arrays, for datasets that are consumed as arrays rather than boards
+    :param packed: A uint8 array of shape (n, 32)
+    :return: Dict of 'pieces', a (n, 16) uint64 array of bitboards indexed by piece code like BitBoard.bb,
+    'mailbox', a (n, 64) uint8 array of the piece code on every square, and (n,) arrays 'turn', 'castling',
+    'ep_square' (-1 for none), 'halfmove_clock' and 'fullmove_number'
+    """
+    packed = np.ascontiguousarray(packed, dtype=np.uint8).reshape(-1, PACKED_SIZE)
+    count = len(packed)
+    occupied = packed[:, 0:8].copy().view('<u8')[:, 0]
+    listed = np.empty((count, MAX_PIECES), dtype=np.uint8)
+    listed[:, 0::2] = packed[:, 8:24] & 15
+    listed[:, 1::2] = packed[:, 8:24] >> 4
+
+    # Unused nibbles are zero, so writing them to the empty squares the order points at leaves those squares empty
+    occupancy = ((occupied[:, None] >> _SQUARES) & np.uint64(1)).astype(bool)
+    order = np.argsort(~occupancy, axis=1, kind='stable')[:, :MAX_PIECES]
+    mailbox = np.zeros((count, 64), dtype=np.uint8)
+    np.put_along_axis(mailbox, order, listed, axis=1)
+
+    pieces = np.zeros((count, 16), dtype=np.uint64)
+    for code in (1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 13, 14):
+        pieces[:, code] = np.bitwise_or.reduce(np.where(mailbox == code, _SQUARE_BITS, np.uint64(0)), axis=1)
+
+    turn = (packed[:, 24] & 1).astype(bool)
+    ep = packed[:, 25]
+    ep_square = np.where(ep & 8, (ep & 7).astype(np.int16) + np.where(turn, 40, 16), -1).astype(np.int16)
+    return {'pieces': pieces, 'mailbox': mailbox, 'turn': turn, 'castling': (packed[:, 24] >> 1) & 15,
+            'ep_square': ep_square, 'halfmove_clock': packed[:, 26:28].copy().view('<u2')[:, 0],
+            'fullmove_number': packed[:, 28:30].copy().view('<u2')[:, 0]}
+
+
+def unpack_batch(packed: np.ndarray):
+    """
+    Builds the chess.Board of every packed position
+    :param packed: A uint8 array of shape (n, 32)
+    :return: A list of chess.Board
+    """
+    arrays = decode_batch(packed)
+    pieces = arrays['pieces'].tolist()
+    raw = np.ascontiguousarray(packed, dtype=np.uint8).reshape(-1, PACKED_SIZE)
+    return [_build(masks, row[24] & 1, (row[24] >> 1) & 15, row[25], halfmove_clock, fullmove_number)
+            for masks, row, halfmove_clock, fullmove_number in zip(pieces, raw.tolist(),
+                                                                   arrays['halfmove_clock'].tolist(),
+                                                                   arrays['fullmove_number'].tolist())]
+
+
+def random_positions(count: int, seed: int = 2022):
+    'Positions of random games of random length, with castling rights, en passant squares and promotions among them'
+    rand = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(rand.randrange(1, 120)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rand.choice(moves))
+            boards.append(board.copy(stack=False))
+    return boards[:count]
+
+
+def verify_packing(count: int = 2000):
+    """
+    Packs random positions of chess.Board and BitBoard one at a time and in a batch and raises an AssertionError on the
+    first position that does not come back as the same FEN, bitboards and mailbox
+    :param count: The number of positions
+    """
+    boards = random_positions(count)
+    packed = pack_batch(boards)
+    arrays = decode_batch(packed)
+    for index, (board, unpacked) in enumerate(zip(boards, unpack_batch(packed))):
+        data = pack(board)
+        bitboard = BitBoard.from_board(board)
+        assert len(data) == PACKED_SIZE
+        assert pack(bitboard) == data, f'BitBoard of {board.fen()} packed differently'
+        assert bytes(packed[index]) == data, f'pack_batch of {board.fen()} differs from pack'
+        assert unpack(data).fen() == board.fen(), f'{board.fen()} unpacked as {unpack(data).fen()}'
+        assert unpacked.fen() == board.fen(), f'{board.fen()} batch unpacked as {unpacked.fen()}'
+        assert arrays['pieces'][index].tolist() == list(bitboard.bb), f'bitboards of {board.fen()} differ'
+        assert arrays['mailbox'][index].tolist() == list(bitboard.mailbox), f'mailbox of {board.fen()} differs'
+
+
+def benchmark(count: int = 10000):
+    'Prints the time per position of FEN strings and of packing, one at a time and in a batch'
+    boards = random_positions(count)
+    fens = [board.fen() for board in boards]
+    packed = pack_batch(boards)
+    rows = [bytes(row) for row in packed]
+    timings = (('fen', lambda: [board.fen() for board in boards]),
+               ('pack', lambda: [pack(board) for board in boards]),
+               ('pack_batch', lambda: pack_batch(boards)),
+               ('chess.Board(fen)', lambda: [chess.Board(fen) for fen in fens]),
+               ('unpack', lambda: [unpack(row) for row in rows]),
+               ('unpack_batch', lambda: unpack_batch(packed)),
+               ('decode_batch', lambda: decode_batch(packed)))
+    print(f'{count} positions, {sum(map(len, fens)) / count:.1f} bytes per FEN, {PACKED_SIZE} packed')
+    for name, function in timings:
+        start = time.perf_counter()
+        function()
+        print(f'{name:>16}: {(time.perf_counter() - start) / count * 1e6:6.1f}us per position')
+
+
+if __name__ == '__main__':
+    verify_packing()
+    print('packing verified')
+    benchmark()
@@ -0,0 +1,35 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import threading
+
+
+def bounded_imap(pool, function, iterable, inflight: int):
+    """
+    Ordered pool.imap that submits at most inflight tasks ahead of the consumer. pool.imap on its own drains the
+    input iterable as fast as it can, which keeps every pending task in memory when the input is a large file.
+    :param pool: The multiprocessing pool to run the tasks on
+    :param function: The picklable function to apply
+    :param iterable: The lazily produced task arguments
+    :param inflight: The maximum number of submitted but unconsumed tasks
+    :return: A generator of results in input order
+    """
+    semaphore = threading.Semaphore(inflight)
+    stopped = threading.Event()
+
+    def gated():
+        for item in iterable:
+            semaphore.acquire()
+            if stopped.is_set():
+                return
+            yield item
+
+    try:
+        for result in pool.imap(function, gated()):
+            semaphore.release()
+            yield result
+    finally:
+        # Unblock the pool's task feeder if the consumer stops early
+        stopped.set()
+        semaphore.release()
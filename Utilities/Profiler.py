@@ -0,0 +1,204 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Sampling profiler for the searchers. cProfile hooks every call and the recursive searchers make millions of small
+# calls, so it slows them down several times and mostly measures itself. This profiler instead wakes up every interval
+# on its own thread, reads the current stack of the profiled thread with sys._current_frames and counts it, leaving the
+# search untouched in between.
+#
+# The counts are written as collapsed stacks, one line of semicolon separated frames outermost first and the count,
+# which flamegraph.pl, speedscope and inferno read directly. The first frame of every stack is the phase of the search
+# the sample fell in, so the flame graph splits into them at the root:
+#
+#   evaluation       inside an evaluation function of the Evaluate package
+#   move generation  generating, ordering or checking the legality of moves
+#   make/unmake      pushing and popping moves
+#   hashing          table keys, lookups and stores, FENs and packed positions
+#   search           everything else, the search functions themselves
+#
+# The outermost frame of a phase decides, so the legal moves an evaluation generates count as evaluation.
+#
+# The environment variable CHESS_ENGINE_PROFILE turns profiling on for Engine and Statistics.py, set it to the path of
+# the output file.
+
+PROFILE_PATH = os.environ.get('CHESS_ENGINE_PROFILE')
+
+EVALUATION = 'evaluation'
+MOVE_GENERATION = 'move generation'
+MAKE_MOVE = 'make/unmake'
+HASHING = 'hashing'
+SEARCH = 'search'
+
+_EVALUATE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Evaluate')
+
+# Phases of functions by name, files that are a phase as a whole are matched in phase_of
+_FUNCTION_PHASES = {
+    'generate_pseudo_legal': MOVE_GENERATION, 'generate_legal_moves': MOVE_GENERATION,
+    'generate_pseudo_legal_moves': MOVE_GENERATION, 'generate_legal_captures': MOVE_GENERATION,
+    'generate_castling_moves': MOVE_GENERATION, 'capture_moves': MOVE_GENERATION, 'is_legal': MOVE_GENERATION,
+    'pinned_mask': MOVE_GENERATION,
+    'push': MAKE_MOVE, 'pop': MAKE_MOVE,
+    'key': HASHING, 'hash': HASHING, 'lookup': HASHING, 'lookup_key': HASHING, 'store': HASHING,
+    'store_key': HASHING, 'pack': HASHING, 'fen': HASHING, 'board_fen': HASHING, 'epd': HASHING,
+    '_transposition_key': HASHING,
+}
+
+_phases = {}
+
+
+def phase_of(code):
+    """
+    The phase a function belongs to
+    :param code: The code object of the function
+    :return: One of the phase names or None for the functions of no phase
+    """
+    if code in _phases:
+        return _phases[code]
+
+    filename = os.path.abspath(code.co_filename)
+    if filename.startswith(_EVALUATE_DIRECTORY):
+        phase = EVALUATION
+    elif os.path.basename(filename) == 'MovePicker.py':
+        phase = MOVE_GENERATION
+    else:
+        phase = _FUNCTION_PHASES.get(code.co_name)
+    _phases[code] = phase
+    return phase
+
+
+def collapse(frame):
+    """
+    The collapsed stack of a frame
+    :param frame: The innermost frame of the stack
+    :return: The stack as a string, the phase of the search first and the frames outermost first
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame.f_code)
+        frame = frame.f_back
+    frames.reverse()
+
+    phase = SEARCH
+    for code in frames:
+        found = phase_of(code)
+        if found is not None:
+            phase = found
+            break
+    return ';'.join([phase] + [f'{os.path.basename(code.co_filename)}:{code.co_name}' for code in frames])
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread at a fixed interval and counts the collapsed stacks, see the comment at the top of
+    the module. One profiler can sample many runs one after the other, the counts add up and write() always writes all
+    of them.
+
+    Example:
+        profiler = SamplingProfiler('search.folded')
+        with profiler.sampling():
+            iterativedeepening(...)
+    """
+    def __init__(self, path: str = None, interval: float = 0.001):
+        """
+        :param path: The file the collapsed stacks are written to at the end of every sampling() block, None to only
+        keep them in counts
+        :param interval: The time in seconds between two samples. The sampler needs the interpreter lock to read a
+        stack, so intervals below sys.getswitchinterval() are stretched to it while the profiled thread runs.
+        """
+        self.path = path
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def sampling(self):
+        'Samples the calling thread while the block runs'
+        ident = threading.get_ident()
+        done = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(ident, done), daemon=True)
+        sampler.start()
+        try:
+            yield self
+        finally:
+            done.set()
+            sampler.join()
+            if self.path is not None:
+                self.write(self.path)
+
+    def _sample(self, ident, done):
+        while not done.wait(self.interval):
+            frame = sys._current_frames().get(ident)
+            if frame is None:
+                return
+            stack = collapse(frame)
+            with self._lock:
+                self.counts[stack] += 1
+                self.samples += 1
+
+    def phases(self):
+        'The number of samples of every phase'
+        totals = Counter()
+        with self._lock:
+            for stack, count in self.counts.items():
+                totals[stack.split(';', 1)[0]] += count
+        return totals
+
+    def write(self, path: str):
+        'Writes the collapsed stacks to path, most frequent first'
+        with self._lock:
+            lines = [f'{stack} {count}\n' for stack, count in self.counts.most_common()]
+        with open(path, 'w') as file:
+            file.writelines(lines)
+
+    def report(self, file=sys.stderr):
+        'Prints the share of every phase'
+        totals = self.phases()
+        print(f'{self.samples} samples every {self.interval * 1000:.1f}ms', file=file)
+        for phase, count in totals.most_common():
+            print(f'  {phase:<16} {count:>7} {count / max(self.samples, 1):>7.1%}', file=file)
+
+
+def profiler_for(path: str = None, interval: float = 0.001):
+    """
+    The profiler of a run
+    :param path: The output file, CHESS_ENGINE_PROFILE when None
+    :param interval: The sampling interval in seconds
+    :return: A SamplingProfiler, or None when profiling is off
+    """
+    path = path or PROFILE_PATH
+    return SamplingProfiler(path, interval) if path else None
+
+
+if __name__ == '__main__':
+    import argparse
+    import chess
+    from Evaluate import EVALUATORS
+    from Search import iterativedeepening
+    from Utilities import Memo
+
+    parser = argparse.ArgumentParser(description='Profile a search and write its collapsed stacks')
+    parser.add_argument('output', help='The collapsed stack file')
+    parser.add_argument('--fen', default=chess.STARTING_FEN)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--evaluator', choices=sorted(EVALUATORS), default='calculateRapid')
+    parser.add_argument('--backend', choices=('chess', 'bitboard'), default='chess')
+    parser.add_argument('--interval', type=float, default=0.001)
+    args = parser.parse_args()
+
+    profiler = SamplingProfiler(args.output, args.interval)
+    start = time.perf_counter()
+    with profiler.sampling():
+        iterativedeepening(args.depth, float('inf'), chess.Board(args.fen), EVALUATORS[args.evaluator], Memo(),
+                           backend=args.backend)
+    print(f'Searched in {time.perf_counter() - start:.2f}s', file=sys.stderr)
+    profiler.report()
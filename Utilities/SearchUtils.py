@@ -2,11 +2,25 @@
 # Last Updated: 04/24/2022
 # Version:      1.2
 
+import sys
 import chess
 import hashlib
+from .Packed import pack
+
+
+def board_key(board):
+    """
+    Hash key of a board. A chess.Board is keyed by its 32 packed bytes of Utilities.Packed, which hold the same
+    fields as its FEN and are built in a fraction of the time, a BitBoard by its incrementally updated Zobrist key.
+    """
+    if isinstance(board, chess.Board):
+        return int.from_bytes(hashlib.sha256(pack(board)).digest()[:8], 'little')
+    return board.key
 
 
 class MemoNode:
+    __slots__ = ('move', 'depth', 'score', 'node_type', 'age')
+
     def __init__(self, move, depth, score, node_type, age):
         self.move = move
         self.depth = depth
@@ -21,27 +35,152 @@ class Memo:
     Hash keys are generated by the first 8 bits of the sha256 hashing algorithm and the
     replacement strategy replaces collisions based on the half-move clock of the position.
     Newer positions, higher half-move clock, will replace older positions.
+    The killer moves by remaining depth and the history scores of quiet moves that caused cutoffs are kept next to
+    the table for the move ordering of Search.MovePicker, nodes counts the positions searched with the table.
     """
     def __init__(self):
         self.table = dict()
+        self.killers = dict()
+        self.history = dict()
+        self.nodes = 0
+
+    def key(self, board):
+        'Hash key of a board, see board_key'
+        return board_key(board)
 
-    def hash(self, fen: str):
-        return int.from_bytes(hashlib.sha256(bytes(fen, encoding='utf8')).digest()[:8], 'little')
+    def lookup(self, board):
+        'Node of a chess.Board or BitBoard, None when the position is not in the table'
+        return self.lookup_key(board_key(board))
 
-    def lookup(self, fen):
-        key = self.hash(fen)
+    def lookup_key(self, key):
         if key in self.table:
             return self.table[key]
         return None
 
-    def store(self, fen, move, depth, score, node_type, age):
-        key = self.hash(fen)
-        if key not in self.table:
+    def store(self, board, move, depth, score, node_type, age):
+        'Stores the node of a chess.Board or BitBoard'
+        self.store_key(board_key(board), move, depth, score, node_type, age)
+
+    def store_key(self, key, move, depth, score, node_type, age):
+        node = self.table.get(key)
+        if node is None:
             self.table[key] = MemoNode(move, depth, score, node_type, age)
             return
 
-        if age > self.table[key].age:
-            self.table[key] = MemoNode(move, depth, score, node_type, age)
+        # Replacements overwrite the existing node instead of allocating a new one
+        if age > node.age:
+            node.move = move
+            node.depth = depth
+            node.score = score
+            node.node_type = node_type
+            node.age = age
+
+    def memory_usage(self):
+        """
+        Accounts the memory held by the table. Objects shared between entries, like interned node types and small
+        integers, are counted once.
+        :return: Dict with the number of entries, the bytes of the dict, its keys, the MemoNode objects, the moves
+        and scores they hold and the killer and history tables, the total bytes and the bytes per entry
+        """
+        seen = set()
+
+        def size(obj):
+            if obj is None or id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            total = sys.getsizeof(obj)
+            if hasattr(obj, '__dict__'):
+                total += sys.getsizeof(obj.__dict__)
+            return total
+
+        usage = {'entries': len(self.table), 'table': sys.getsizeof(self.table), 'keys': 0, 'nodes': 0, 'moves': 0,
+                 'scores': 0}
+        for key, node in self.table.items():
+            usage['keys'] += size(key)
+            usage['nodes'] += size(node) + size(node.node_type) + size(node.depth) + size(node.age)
+            usage['moves'] += size(node.move)
+            usage['scores'] += size(node.score)
+
+        usage['ordering'] = sys.getsizeof(self.killers) + sys.getsizeof(self.history)
+        for killers in self.killers.values():
+            usage['ordering'] += size(killers) + sum(size(move) for move in killers)
+        for move, score in self.history.items():
+            usage['ordering'] += size(move) + size(score)
+
+        usage['total'] = usage['table'] + usage['keys'] + usage['nodes'] + usage['moves'] + usage['scores'] \
+            + usage['ordering']
+        usage['bytes_per_entry'] = (usage['total'] - usage['ordering']) / usage['entries'] if usage['entries'] else 0.0
+        return usage
+
+
+class NodeContext:
+    """
+    Work shared by the search and the evaluation of a single node. The hash key is computed when the context is
+    created, the legal moves, check status, outcome and per-piece attack maps are computed on first use and reused
+    by every later caller at the same node.
+    """
+    __slots__ = ('board', 'key', 'moves', '_in_check', '_attacks')
+
+    def __init__(self, board, key):
+        self.board = board
+        self.key = key
+        self.moves = None
+        self._in_check = None
+        self._attacks = [None, None]
+
+    def legal_moves(self):
+        if self.moves is None:
+            self.moves = list(self.board.legal_moves)
+        return self.moves
+
+    def is_check(self):
+        if self._in_check is None:
+            self._in_check = self.board.is_check()
+        return self._in_check
+
+    def outcome(self):
+        """
+        Mirrors board.outcome(), reusing the generated move list when there is one
+        :return: A chess.Outcome or None when the game is not over
+        """
+        board = self.board
+        if self.moves is None:
+            has_moves = any(board.generate_legal_moves())
+        else:
+            has_moves = len(self.moves) > 0
+
+        if not has_moves:
+            if self.is_check():
+                return chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+            return chess.Outcome(chess.Termination.STALEMATE, None)
+        return self.draw_outcome()
+
+    def draw_outcome(self):
+        'The draws by rule of outcome(), which do not need the legal moves'
+        board = self.board
+        if board.is_insufficient_material():
+            return chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+        if board.halfmove_clock >= 150:
+            return chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+        if board.is_fivefold_repetition():
+            return chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+        return None
+
+    def attacks(self, color):
+        """
+        Attack maps of the non-pawn pieces of color
+        :param color: The color of the pieces
+        :return: A list of (piece type, square, attack mask) tuples
+        """
+        attacks = self._attacks[color]
+        if attacks is None:
+            board = self.board
+            attacks = []
+            for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING):
+                for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                    attacks.append((piece_type, square, board.attacks_mask(square)))
+            self._attacks[color] = attacks
+        return attacks
 
 
 def searchMax(depth, board: chess.Board, evaluation):
@@ -0,0 +1,38 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+
+def read_lines(path: str):
+    """
+    Lazily reads the non-empty, non-comment lines of a text file such as an EPD or FEN dump
+    :param path: The file to read
+    :return: A generator of stripped lines
+    """
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def read_pgn_games(path: str):
+    """
+    Lazily splits a PGN file into the raw text of its games without parsing them, so a single game is in memory at
+    a time and the expensive parsing can happen in worker processes
+    :param path: The PGN file to read
+    :return: A generator of game texts
+    """
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        lines = []
+        in_moves = False
+        for line in handle:
+            if line.startswith('[') and in_moves:
+                yield ''.join(lines)
+                lines = []
+                in_moves = False
+            elif line.strip() and not line.startswith('['):
+                in_moves = True
+            lines.append(line)
+        if in_moves:
+            yield ''.join(lines)
@@ -0,0 +1,346 @@
+# Date:         10/19/2026
+# Last Updated: 10/19/2026
+# Version:      1.0
+
+import hashlib
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Precomputed lookup tables shared by the bitboard backend and the evaluators. Generating them, the magic slider
+# tables in particular, takes seconds in pure Python, so they are built once into a versioned binary file and every
+# later import maps that file read-only. The mapped pages are shared by every process of a multiprocessing pool.
+#
+# File layout: a 24 byte header (magic, version, table count, byte order check, source hash), a directory of (name,
+# offset, length) entries and the tables themselves as native 64-bit unsigned ints. Offsets and lengths count 64-bit
+# words from the start of the data section. The source hash is taken over this module, so a file written by any other
+# version of the generators is rebuilt like one with the wrong magic, version or byte order.
+
+TABLES_VERSION = 2
+TABLES_MAGIC = b'CTBL'
+BYTE_ORDER_CHECK = 0x0102_0304
+TABLES_PATH = os.environ.get('CHESS_ENGINE_TABLES') or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), f'tables.v{TABLES_VERSION}.bin')
+
+_HEADER = struct.Struct('<4sIII8s')
+_ENTRY = struct.Struct('<16sQQ')
+
+with open(os.path.abspath(__file__), 'rb') as _source:
+    SOURCE_HASH = hashlib.sha256(_source.read()).digest()[:8]
+
+BB_ALL = 0xFFFF_FFFF_FFFF_FFFF
+BB_SQUARES = [1 << sq for sq in range(64)]
+
+
+def _step_attacks(deltas):
+    table = []
+    for sq in range(64):
+        mask = 0
+        for file_delta, rank_delta in deltas:
+            file = (sq & 7) + file_delta
+            rank = (sq >> 3) + rank_delta
+            if 0 <= file < 8 and 0 <= rank < 8:
+                mask |= BB_SQUARES[rank * 8 + file]
+        table.append(mask)
+    return table
+
+
+def _ray(file_delta, rank_delta):
+    table = []
+    for sq in range(64):
+        mask = 0
+        file = (sq & 7) + file_delta
+        rank = (sq >> 3) + rank_delta
+        while 0 <= file < 8 and 0 <= rank < 8:
+            mask |= BB_SQUARES[rank * 8 + file]
+            file += file_delta
+            rank += rank_delta
+        table.append(mask)
+    return table
+
+
+# Ray directions in table order. The first four point towards higher square indices.
+RAY_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1))
+
+
+def _between(rays):
+    table = [0] * 4096
+    for ray in rays:
+        for sq in range(64):
+            mask = ray[sq]
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                target = low.bit_length() - 1
+                table[sq * 64 + target] = ray[sq] & ~ray[target] & ~low
+    return table
+
+
+def _zobrist():
+    # Seeded so keys are stable across processes and rebuilds: 16 x 64 piece keys, 16 castling keys, 8 en passant
+    # file keys and the side to move key
+    rng = random.Random(2022)
+    return [rng.getrandbits(64) for _ in range(16 * 64 + 16 + 8 + 1)]
+
+
+def _slide(sq, occupied, directions):
+    attacks = 0
+    for file_delta, rank_delta in directions:
+        file = (sq & 7) + file_delta
+        rank = (sq >> 3) + rank_delta
+        while 0 <= file < 8 and 0 <= rank < 8:
+            square = BB_SQUARES[rank * 8 + file]
+            attacks |= square
+            if occupied & square:
+                break
+            file += file_delta
+            rank += rank_delta
+    return attacks
+
+
+def _relevant_mask(sq, directions):
+    'Squares whose occupancy changes the slider attacks from sq, the last square of every ray never does'
+    mask = 0
+    for file_delta, rank_delta in directions:
+        file = (sq & 7) + file_delta
+        rank = (sq >> 3) + rank_delta
+        while 0 <= file + file_delta < 8 and 0 <= rank + rank_delta < 8:
+            mask |= BB_SQUARES[rank * 8 + file]
+            file += file_delta
+            rank += rank_delta
+    return mask
+
+
+def _magics(directions, seed, spare=0):
+    """
+    Finds a magic multiplier for every square, see https://www.chessprogramming.org/Magic_Bitboards. Candidates are
+    checked for collisions against every occupancy subset at once with NumPy. Each spare index bit doubles the table
+    of a square but makes a working magic far quicker to find.
+    :return: The mask, magic, shift and offset tables and the flat attack table
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    masks, magics, shifts, offsets, attacks = [], [], [], [], []
+
+    for sq in range(64):
+        mask = _relevant_mask(sq, directions)
+        bits = bin(mask).count('1') + spare
+
+        # Every subset of the mask, carry-rippler enumeration
+        subsets = []
+        subset = 0
+        while True:
+            subsets.append(subset)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+        occupancies = np.array(subsets, dtype=np.uint64)
+        targets = np.array([_slide(sq, occupied, directions) for occupied in subsets], dtype=np.uint64)
+        shift = np.uint64(64 - bits)
+
+        scratch = np.zeros(1 << bits, dtype=np.uint64)
+        while True:
+            for candidate in (rng.integers(0, BB_ALL, 64, dtype=np.uint64, endpoint=True) &
+                              rng.integers(0, BB_ALL, 64, dtype=np.uint64, endpoint=True) &
+                              rng.integers(0, BB_ALL, 64, dtype=np.uint64, endpoint=True)).tolist():
+                if bin((mask * candidate) & 0xFF00_0000_0000_0000).count('1') < 6:
+                    continue
+                # Occupancies sharing an index must share their attacks, so writing them all and reading them back
+                # only round trips when there is no destructive collision
+                index = (occupancies * np.uint64(candidate)) >> shift
+                scratch[index] = targets
+                if np.array_equal(scratch[index], targets):
+                    break
+            else:
+                continue
+            break
+
+        table = np.zeros(1 << bits, dtype=np.uint64)
+        table[index] = targets
+        masks.append(mask)
+        magics.append(candidate)
+        shifts.append(64 - bits)
+        offsets.append(sum(len(part) for part in attacks))
+        attacks.append(table.tolist())
+
+    return masks, magics, shifts, offsets, [value for part in attacks for value in part]
+
+
+def _king_area(difs, rows):
+    'The 5x5 (rows = 2) and 5x8 (rows = 3) king areas of calculateRapid, with its exact boundary test'
+    table = []
+    for king in range(64):
+        mask = 0
+        for d in difs:
+            if king + d >= 0 and king + d < 64 and \
+                    ((d > 0 and math.floor((king + d)/8 - king/d) <= rows) or (d < 0 and math.ceil((king + d)/8 - king/d) >= -rows)):
+                mask |= BB_SQUARES[king + d]
+        table.append(mask)
+    return table
+
+
+def _row_valid(king, dif, index):
+    return king + dif >= 0 and king + dif < 64 and math.floor(king + dif / 8) == math.floor(king / 8)
+
+
+def _col_valid(king, dif, index):
+    return king + dif >= 0 and king + dif < 64
+
+
+def _diag_valid(king, dif, index):
+    return king + dif >= 0 and king + dif < 64 and abs(math.floor(king + dif / 8) - math.floor(king / 8)) == index + 1
+
+
+# The lanes scanned by the calculateRapid king protection loops, in table order
+KING_LANES = (
+    ([8, 16, 24, 32, 40, 48, 56], _col_valid),
+    ([-8, -16, -24, -32, -40, -48, -56], _col_valid),
+    ([1, 2, 3, 4, 5, 6, 7], _row_valid),
+    ([-1, -2, -3, -4, -5, -6, -7], _row_valid),
+    ([7, 14, 21, 28, 35, 42, 49], _diag_valid),
+    ([9, 18, 27, 36, 45, 54, 63], _diag_valid),
+    ([-9, -18, -27, -36, -45, -54, -63], _diag_valid),
+    ([-7, -14, -21, -28, -35, -42, -49], _diag_valid),
+)
+
+
+# Lanes towards higher square indices meet their first piece at the low bit, the others at the high bit
+LANE_UPWARDS = tuple(difs[0] > 0 for difs, _ in KING_LANES)
+
+
+def _king_lanes():
+    'Valid squares of every lane up to the first invalid one, 0 when the first step is already invalid'
+    table = []
+    for difs, valid in KING_LANES:
+        for king in range(64):
+            mask = 0
+            for index, d in enumerate(difs):
+                if not valid(king, d, index):
+                    break
+                mask |= BB_SQUARES[king + d]
+            table.append(mask)
+    return table
+
+
+def generate_tables():
+    """
+    Builds every table from scratch
+    :return: A dict of table name to list of 64-bit ints
+    """
+    rays = [_ray(file_delta, rank_delta) for file_delta, rank_delta in RAY_DIRECTIONS]
+    bishop = _magics(RAY_DIRECTIONS[2:4] + RAY_DIRECTIONS[6:8], 2022, spare=1)
+    rook = _magics(RAY_DIRECTIONS[0:2] + RAY_DIRECTIONS[4:6], 2023, spare=1)
+
+    tables = {
+        'knight': _step_attacks(((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))),
+        'king': _step_attacks(((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))),
+        'pawn': _step_attacks(((-1, -1), (1, -1))) + _step_attacks(((-1, 1), (1, 1))),
+        'rays': [mask for ray in rays for mask in ray],
+        'between': _between(rays),
+        'zobrist': _zobrist(),
+        'pawnShield': _king_area([-18, -17, -16, -15, -14, -10, -9, -8, -7, -6, -2, -1, 1, 2, 6, 7, 8, 9, 10, 14, 15,
+                                  16, 17, 18], 2),
+        'kingZone': _king_area([d for d in range(-23, 24) if d != 0], 3),
+        'kingLanes': _king_lanes(),
+    }
+    for prefix, (masks, magics, shifts, offsets, attacks) in (('bishop', bishop), ('rook', rook)):
+        tables[prefix + 'Mask'] = masks
+        tables[prefix + 'Magic'] = magics
+        tables[prefix + 'Shift'] = shifts
+        tables[prefix + 'Offset'] = offsets
+        tables[prefix + 'Attacks'] = attacks
+    return tables
+
+
+def write_tables(path, tables):
+    'Writes the tables to path, through a temporary file so readers never see a partial file'
+    directory = []
+    offset = 0
+    for name, values in tables.items():
+        directory.append(_ENTRY.pack(name.encode(), offset, len(values)))
+        offset += len(values)
+
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(_HEADER.pack(TABLES_MAGIC, TABLES_VERSION, len(tables), BYTE_ORDER_CHECK, SOURCE_HASH))
+        handle.write(b''.join(directory))
+        for values in tables.values():
+            handle.write(struct.pack(f'={len(values)}Q', *values))
+    os.replace(temporary, path)
+
+
+def map_tables(path):
+    """
+    Maps a table file read-only
+    :param path: The file written by write_tables
+    :return: A dict of table name to a memoryview of 64-bit ints backed by the mapping
+    """
+    with open(path, 'rb') as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count, order, source = _HEADER.unpack_from(mapping, 0)
+    if magic != TABLES_MAGIC or version != TABLES_VERSION:
+        raise ValueError(f'{path} is not a version {TABLES_VERSION} table file')
+    if source != SOURCE_HASH:
+        raise ValueError(f'{path} was generated by a different version of {os.path.basename(__file__)}')
+    if struct.pack('=I', order) != struct.pack('<I', BYTE_ORDER_CHECK):
+        raise ValueError(f'{path} was written on a machine with a different byte order')
+
+    start = _HEADER.size + count * _ENTRY.size
+    data = memoryview(mapping)[start:]
+    if len(data) % 8:
+        raise ValueError(f'{path} is truncated')
+    words = data.cast('Q')
+
+    tables = {}
+    for index in range(count):
+        name, offset, length = _ENTRY.unpack_from(mapping, _HEADER.size + index * _ENTRY.size)
+        if offset + length > len(words):
+            raise ValueError(f'{path} is truncated')
+        tables[name.rstrip(b'\0').decode()] = words[offset:offset + length]
+    return tables
+
+
+def load_tables(path=TABLES_PATH):
+    """
+    Maps the table file, building it first when it is missing, stale or damaged. When the file cannot be written the
+    freshly generated tables are used from memory.
+    :param path: The table file
+    :return: A dict of table name to a sequence of 64-bit ints
+    """
+    try:
+        return map_tables(path)
+    except (OSError, ValueError, struct.error):
+        pass
+
+    tables = generate_tables()
+    try:
+        write_tables(path, tables)
+        return map_tables(path)
+    except OSError as error:
+        print(f'Could not cache lookup tables to {path}: {error}', file=sys.stderr)
+        return tables
+
+
+TABLES = load_tables()
+
+
+def rows(table, width):
+    'Splits a flat table into rows of width entries'
+    return [table[start:start + width] for start in range(0, len(table), width)]
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    write_tables(TABLES_PATH, generate_tables())
+    print(f'Generated {TABLES_PATH} in {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    map_tables(TABLES_PATH)
+    print(f'Mapped in {(time.perf_counter() - start) * 1000:.2f}ms')
@@ -1 +1 @@
-from .SearchUtils import Memo, MemoNode
\ No newline at end of file
+from .SearchUtils import Memo, MemoNode, NodeContext, board_key
@@ -0,0 +1,25 @@
+import chess
+from Utilities.Bitboard import BitBoard, MAX_PLY, move_from_chess, verify_perft
+
+
+def test_perft():
+    verify_perft(3)
+
+
+def test_from_board_long_game():
+    # Knights shuffling back and forth play a game far longer than MAX_PLY without ending it
+    board = chess.Board()
+    shuffle = [chess.Move.from_uci(uci) for uci in ('g1f3', 'g8f6', 'f3g1', 'f6g8')]
+    while len(board.move_stack) < 4 * MAX_PLY:
+        board.push(shuffle[len(board.move_stack) % 4])
+
+    bitboard = BitBoard.from_board(board)
+    assert bitboard.fen() == board.fen()
+    assert bitboard.is_repetition(3)
+
+    # The search still has MAX_PLY plies of room on top of the game
+    for ply in range(MAX_PLY):
+        bitboard.push(move_from_chess(shuffle[ply % 4]))
+    for _ in range(MAX_PLY):
+        bitboard.pop()
+    assert bitboard.fen() == board.fen()
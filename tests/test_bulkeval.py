@@ -0,0 +1,56 @@
+import csv
+import math
+import chess
+import pytest
+from BulkEval import bulkEvaluate, evaluateChunk, readBinary
+from Evaluate import EVALUATORS, POSITION_EVALUATORS
+
+LINES = [
+    chess.STARTING_FEN,
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - bm Rb1; id "perft 3";',
+    'not a position',
+]
+
+
+@pytest.mark.parametrize('name', sorted(POSITION_EVALUATORS))
+def test_chunk_scores(name):
+    scores = evaluateChunk((name, 'turn', LINES))
+    assert all(math.isfinite(score) for score in scores[:-1]), f'{name} scored {scores}'
+    assert math.isnan(scores[-1])
+
+
+def test_perspective():
+    black = chess.Board(LINES[1]).mirror().fen()
+    turn = evaluateChunk(('calculateRapid', 'turn', [black]))[0]
+    white = evaluateChunk(('calculateRapid', 'white', [black]))[0]
+    assert turn == POSITION_EVALUATORS['calculateRapid'](chess.Board(black), chess.BLACK)
+    assert white == POSITION_EVALUATORS['calculateRapid'](chess.Board(black), chess.WHITE)
+
+
+def test_history_evaluators_rejected(tmp_path):
+    rejected = set(EVALUATORS) - set(POSITION_EVALUATORS)
+    assert rejected, 'every evaluator scores positions without history'
+    for name in rejected:
+        with pytest.raises(ValueError):
+            bulkEvaluate([], str(tmp_path / 'scores.csv'), name)
+
+
+@pytest.mark.parametrize('outputFormat', ['csv', 'binary'])
+def test_bulk_evaluate(tmp_path, outputFormat):
+    path = tmp_path / 'positions.fen'
+    path.write_text('\n'.join(LINES) + '\n')
+    output = tmp_path / 'scores'
+    count, _ = bulkEvaluate([str(path)], str(output), outputFormat=outputFormat, processes=2, chunkSize=3)
+    assert count == len(LINES)
+
+    expected = evaluateChunk(('calculateRapid', 'turn', LINES))
+    if outputFormat == 'binary':
+        scores = list(readBinary(str(output)))
+    else:
+        with open(output, newline='') as handle:
+            rows = list(csv.reader(handle))[1:]
+        assert [row[0] for row in rows] == LINES
+        scores = [float(row[1]) for row in rows]
+    assert math.isnan(scores[-1])
+    assert scores[:-1] == pytest.approx(expected[:-1])
@@ -0,0 +1,9 @@
+from Search.Core import verify_allocations, verify_scores
+
+
+def test_scores_match_tabular():
+    verify_scores(3)
+
+
+def test_allocations_bounded():
+    verify_allocations(3)
@@ -0,0 +1,18 @@
+import chess
+from Evaluate import evaluateScore
+from Evaluate.evaluation import chessToIndex
+from Search import tabular
+from Utilities import Memo
+
+
+def test_evaluate_score_index_positional():
+    board = chess.Board()
+    board.push_uci('e2e4')
+    assert evaluateScore(board, chess.BLACK, chessToIndex) == evaluateScore(board, chess.BLACK)
+
+
+def test_evaluate_score_in_search():
+    board = chess.Board()
+    board.push_uci('e2e4')
+    score, move = tabular(2, float('-inf'), float('inf'), board, board.turn, evaluateScore, Memo())
+    assert move in board.legal_moves
@@ -0,0 +1,24 @@
+from Evaluate.fused import fusedEval, lastCaptured, randomPositions, verifyFused
+from Utilities.Bitboard import BitBoard
+
+POSITIONS = randomPositions(games=8, plies=60)
+
+
+def test_fused_matches_eval():
+    verifyFused(POSITIONS)
+
+
+def test_fused_on_bitboard():
+    for board, color in POSITIONS[::7]:
+        assert fusedEval(BitBoard.from_board(board), color) == fusedEval(board, color)
+
+
+def test_last_captured():
+    captured = []
+    for board, _ in POSITIONS[::2]:
+        fen = board.fen()
+        moves = list(board.move_stack)
+        captured.append(lastCaptured(board))
+        assert captured[-1] == lastCaptured(BitBoard.from_board(board))
+        assert board.fen() == fen and board.move_stack == moves
+    assert any(captured), 'the games have no captures'
@@ -0,0 +1,56 @@
+import chess
+import pytest
+from Utilities import Memo, board_key
+from Utilities.Bitboard import BitBoard
+from Utilities.Packed import pack, random_positions, unpack, verify_packing
+
+
+def test_packing():
+    verify_packing(500)
+
+
+def test_board_key():
+    boards = random_positions(200, seed=7)
+    keys = {board_key(board) for board in boards}
+    assert len(keys) == len({board.fen() for board in boards})
+    # Move counters are part of the key like they are part of the FEN
+    board = chess.Board()
+    assert board_key(board) == board_key(chess.Board())
+    assert board_key(board) != board_key(chess.Board(board.fen().replace(' 0 1', ' 5 1')))
+
+
+def test_memo_lookup_store():
+    memo = Memo()
+    board = chess.Board()
+    bitboard = BitBoard.from_board(board)
+    move = chess.Move.from_uci('e2e4')
+    assert memo.lookup(board) is None
+    memo.store(board, move, 3, 25, 'EXACT', 0)
+    node = memo.lookup(board)
+    assert (node.move, node.depth, node.score) == (move, 3, 25)
+    assert memo.lookup_key(memo.key(board)) is node
+
+    memo.store(bitboard, move, 2, 10, 'EXACT', 0)
+    assert memo.lookup(bitboard).score == 10
+
+    # Older positions do not replace newer ones
+    memo.store(board, None, 5, -5, 'EXACT', -1)
+    assert memo.lookup(board).score == 25
+    memo.store(board, None, 5, -5, 'EXACT', 1)
+    assert memo.lookup(board).score == -5
+
+
+@pytest.mark.parametrize('fen, uci', [
+    ('rnbqkbnr/ppp1pppp/8/4P3/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 2', 'f7f5'),
+    ('rnbqkbnr/ppp1pppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 2', 'e2e4'),
+    ('8/3p4/8/K3P2r/8/8/8/7k b - - 0 1', 'd7d5'),
+    ('8/8/8/8/1k3p1R/8/4P3/8 w - - 0 1', 'e2e4'),
+    ('5k2/8/8/8/5p2/8/4P3/4KR2 w - - 0 1', 'e2e4'),
+])
+def test_pack_en_passant(fen, uci):
+    board = chess.Board(fen)
+    board.push_uci(uci)
+    bitboard = BitBoard.from_board(board)
+    loaded = BitBoard(board.fen())
+    assert pack(board) == pack(bitboard) == pack(loaded) == pack(chess.Board(board.fen()))
+    assert unpack(pack(bitboard)).fen() == board.fen()
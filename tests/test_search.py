@@ -0,0 +1,34 @@
+import chess
+import pytest
+from Evaluate import EVALUATORS
+from Search import iterativedeepening
+from Search.TimeManager import TimeManager
+from Utilities import Memo
+
+MATED = 'rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3'
+STALEMATED = '7k/5Q2/6K1/8/8/8/8/8 b - - 0 1'
+
+
+@pytest.mark.parametrize('backend', ['chess', 'bitboard'])
+@pytest.mark.parametrize('fen', [MATED, STALEMATED])
+def test_multipv_terminal_root(fen, backend):
+    evaluation = EVALUATORS['calculateRapid']
+    score, move = iterativedeepening(3, 5, chess.Board(fen), evaluation, Memo(), backend=backend)
+    assert move is None
+
+    updates = []
+    ranked = iterativedeepening(3, 5, chess.Board(fen), evaluation, Memo(), backend=backend, multipv_count=3,
+                                callback=updates.append)
+    assert ranked == []
+    assert [update['depth'] for update in updates] == [1, 2, 3]
+    assert all(update['pv'] == [] and update['score'] == score for update in updates)
+
+
+@pytest.mark.parametrize('backend', ['chess', 'bitboard'])
+@pytest.mark.parametrize('fen', [MATED, STALEMATED])
+def test_multipv_terminal_root_time_manager(fen, backend):
+    manager = TimeManager(10)
+    ranked = iterativedeepening(3, 5, chess.Board(fen), EVALUATORS['calculateRapid'], Memo(), backend=backend,
+                                multipv_count=3, time_manager=manager)
+    assert ranked == []
+    assert manager.best_move is None
@@ -0,0 +1,45 @@
+import pytest
+from Utilities import Tables
+
+SMALL = {'first': [0, 1, 2 ** 64 - 1], 'second': [42]}
+
+
+def test_tables_match_generators():
+    generated = Tables.generate_tables()
+    assert set(Tables.TABLES) == set(generated)
+    for name, values in generated.items():
+        assert list(Tables.TABLES[name]) == values, f'{name} differs from the generators'
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'tables.bin'
+    Tables.write_tables(path, SMALL)
+    assert {name: list(values) for name, values in Tables.map_tables(path).items()} == SMALL
+
+
+def test_stale_source_rejected(tmp_path, monkeypatch):
+    path = tmp_path / 'tables.bin'
+    with monkeypatch.context() as patch:
+        patch.setattr(Tables, 'SOURCE_HASH', b'\0' * 8)
+        Tables.write_tables(path, SMALL)
+    with pytest.raises(ValueError):
+        Tables.map_tables(path)
+
+
+def test_stale_file_rebuilt(tmp_path, monkeypatch):
+    path = tmp_path / 'tables.bin'
+    with monkeypatch.context() as patch:
+        patch.setattr(Tables, 'SOURCE_HASH', b'\0' * 8)
+        Tables.write_tables(path, {'old': [1]})
+    monkeypatch.setattr(Tables, 'generate_tables', lambda: SMALL)
+    assert {name: list(values) for name, values in Tables.load_tables(path).items()} == SMALL
+    assert set(Tables.map_tables(path)) == set(SMALL)
+
+
+def test_truncated_file_rejected(tmp_path):
+    path = tmp_path / 'tables.bin'
+    Tables.write_tables(path, SMALL)
+    data = path.read_bytes()
+    path.write_bytes(data[:-8])
+    with pytest.raises(ValueError):
+        Tables.map_tables(path)